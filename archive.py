@@ -0,0 +1,431 @@
+"""
+On-disk columnar archive of ticks and bars, partitioned by symbol and date.
+
+Layout: <root>/<symbol>/<YYYY-MM-DD>/<column>.bin, one raw little-endian array
+per column, kept in time order. New rows are appended; rows older than the
+newest archived row (late history, out-of-order ticks) are merged into their
+partition by rewriting it from the first row after them. Re-delivered history
+is stored once; live trades are always stored. Reads memory-map the
+column files, so weeks of data can be scanned without loading it into RAM.
+Each column is written separately, so a crash mid-append can leave some
+columns a few rows longer than others; those rows are cut off before the
+partition is appended to again, which keeps the columns aligned.
+
+ArchiveWriter applies appends on a background thread, so the stream handler
+and bar listeners never wait for the disk.
+"""
+
+import os
+import queue
+import threading
+import numpy as np
+import pandas as pd
+from collections import Counter
+from trading_app.tick_store import to_nanoseconds, to_nanoseconds_array
+from trading_app.utils.logger import get_logger
+
+log = get_logger("archive")
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+TICK_ARCHIVE_COLUMNS = {"timestamp": "<i8", "price": "<f8", "volume": "<f8"}
+BAR_ARCHIVE_COLUMNS = {"timestamp": "<i8", "open": "<f8", "high": "<f8", "low": "<f8", "close": "<f8", "volume": "<f8"}
+
+
+def _days(timestamps):
+    """
+    Split sorted nanosecond timestamps by day.
+    :return: List of (YYYY-MM-DD, start, end) slices.
+    """
+    days = timestamps // NS_PER_DAY
+    bounds = np.concatenate(([0], np.flatnonzero(days[1:] != days[:-1]) + 1, [len(days)]))
+    return [(str(np.datetime64(int(days[start]), "D")), start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+class ColumnarArchive:
+    def __init__(self, root, columns, unique_timestamps=False):
+        """
+        :param root: Directory holding the archive.
+        :param columns: Ordered {column: numpy dtype}; the first column must be "timestamp".
+        :param unique_timestamps: True if a symbol has at most one row per timestamp (bars).
+        """
+        self.root = root
+        self.columns = columns
+        self.unique_timestamps = unique_timestamps
+        self.last_timestamps = {}  # {symbol: last archived timestamp or None}, loaded lazily
+        self.repaired = set()  # Partition paths cut back to whole rows since the archive was opened
+        self.merged = 0  # Rows written before the last archived timestamp of their symbol
+        self.duplicates = 0  # History rows skipped because the same row was already archived
+        os.makedirs(root, exist_ok=True)
+
+    def symbols(self):
+        """
+        Symbols with at least one partition.
+        """
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def dates(self, symbol):
+        """
+        Partition dates (YYYY-MM-DD strings) for a symbol, oldest first.
+        """
+        path = self._symbol_path(symbol)
+        if not os.path.isdir(path):
+            return []
+        return sorted(os.listdir(path))
+
+    def _symbol_path(self, symbol):
+        return os.path.join(self.root, str(symbol).replace("/", "_"))
+
+    def partition_path(self, symbol, date):
+        return os.path.join(self._symbol_path(symbol), date)
+
+    def last_timestamp(self, symbol):
+        """
+        Latest timestamp archived for a symbol, or None.
+        """
+        if symbol not in self.last_timestamps:
+            dates = self.dates(symbol)
+            timestamps = self._load_partition(symbol, dates[-1])["timestamp"] if dates else ()
+            self.last_timestamps[symbol] = int(timestamps[-1]) if len(timestamps) else None
+        return self.last_timestamps[symbol]
+
+    def _rows(self, arrays, start, end):
+        return list(zip(*(np.asarray(arrays[name][start:end]).tolist() for name in self.columns)))
+
+    def append(self, symbol, timestamps, history=False, **columns):
+        """
+        Append rows for one symbol, split into daily partitions.
+        Rows at or after the last archived timestamp are appended; older ones are
+        merged into their partition in time order. Distinct trades may share a
+        timestamp, price and size, so live rows are always stored; only history
+        (`history=True`, rows the feed may deliver again) skips rows already
+        stored. An archive with one row per timestamp (bars) skips rows at a
+        timestamp it already holds.
+        :param symbol: Symbol the rows belong to.
+        :param timestamps: Row times (anything to_nanoseconds_array accepts).
+        :param history: True for re-deliverable history, deduplicated against stored rows.
+        :param columns: Arrays for the remaining columns.
+        :return: Number of rows written.
+        """
+        timestamps = to_nanoseconds_array(timestamps)
+        arrays = {"timestamp": timestamps}
+        for name, dtype in self.columns.items():
+            if name != "timestamp":
+                arrays[name] = np.asarray(columns[name], dtype=dtype)
+
+        if len(timestamps) > 1 and (timestamps[1:] < timestamps[:-1]).any():
+            order = np.argsort(timestamps, kind="stable")
+            arrays = {name: values[order] for name, values in arrays.items()}
+            timestamps = arrays["timestamp"]
+
+        written = 0
+        last = self.last_timestamp(symbol)
+        if last is not None:
+            dedupe = history or self.unique_timestamps
+            # Rows sharing the last timestamp are only checked against stored rows when deduplicating
+            first_new = np.searchsorted(timestamps, last, side="right" if dedupe else "left")
+            if first_new:
+                written += self._merge(symbol, {name: values[:first_new] for name, values in arrays.items()}, dedupe)
+                arrays = {name: values[first_new:] for name, values in arrays.items()}
+                timestamps = arrays["timestamp"]
+        if len(timestamps) == 0:
+            return written
+
+        for date, start, end in _days(timestamps):
+            self._write(self.partition_path(symbol, date), {name: values[start:end] for name, values in arrays.items()})
+        self.last_timestamps[symbol] = int(timestamps[-1])
+        return written + len(timestamps)
+
+    def _merge(self, symbol, arrays, dedupe):
+        """
+        Merge rows at or before the last archived timestamp into their partitions.
+        Each partition is rewritten from its first row after the earliest merged
+        one, so rows arriving slightly late cost little.
+        :param dedupe: Skip rows already stored: a row equal to a stored row, timestamp
+                       and values alike, once per stored copy, or any row at a stored
+                       timestamp for an archive with one row per timestamp.
+        :return: Number of rows written.
+        """
+        written = 0
+        for date, start, end in _days(arrays["timestamp"]):
+            path = self.partition_path(symbol, date)
+            rows = {name: values[start:end] for name, values in arrays.items()}
+            stored = self._load_partition(symbol, date)
+            timestamps = stored["timestamp"]
+            if dedupe:
+                first = np.searchsorted(timestamps, rows["timestamp"][0], side="left")
+                later = np.searchsorted(timestamps, rows["timestamp"][-1], side="right")
+                if self.unique_timestamps:
+                    keep = ~np.isin(rows["timestamp"], timestamps[first:later])
+                else:
+                    copies = Counter(self._rows(stored, first, later))
+                    keep = np.ones(end - start, dtype=bool)
+                    for offset, row in enumerate(self._rows(rows, 0, end - start)):
+                        if copies[row]:
+                            copies[row] -= 1
+                            keep[offset] = False
+                duplicates = int((~keep).sum())
+                if duplicates:
+                    self.duplicates += duplicates
+                    log.debug("Skipped %d rows of %s %s already archived", duplicates, symbol, date)
+                if not keep.any():
+                    continue
+                rows = {name: values[keep] for name, values in rows.items()}
+
+            first = np.searchsorted(timestamps, rows["timestamp"][0], side="right")
+            merged = {name: np.concatenate((np.array(stored[name][first:]), rows[name])) for name in self.columns}
+            order = np.argsort(merged["timestamp"], kind="stable")
+            del stored, timestamps  # Release the memory maps before truncating the files
+            # Cut the partition back to the rows before the merge, then append the
+            # merged rows; a crash in between loses rows but leaves the columns aligned
+            self.repaired.discard(path)
+            self._truncate(path, first)
+            self._write(path, {name: values[order] for name, values in merged.items()})
+            self.merged += len(rows["timestamp"])
+            written += len(rows["timestamp"])
+            log.debug("Merged %d late rows into %s %s", len(rows["timestamp"]), symbol, date)
+        return written
+
+    def _write(self, path, arrays):
+        """
+        Append rows to every column file of a partition.
+        """
+        os.makedirs(path, exist_ok=True)
+        if path not in self.repaired:
+            self._repair(path)
+            self.repaired.add(path)
+        try:
+            for name, dtype in self.columns.items():
+                with open(os.path.join(path, f"{name}.bin"), "ab") as column_file:
+                    column_file.write(np.ascontiguousarray(arrays[name], dtype=dtype).tobytes())
+        except BaseException:
+            # Columns may now differ in length: repair before the next append
+            self.repaired.discard(path)
+            raise
+
+    def _repair(self, path):
+        """
+        Truncate every column file of a partition to the rows all columns hold in
+        full, dropping what a torn append left at the end of some of them.
+        """
+        sizes = {}
+        for name in self.columns:
+            column_path = os.path.join(path, f"{name}.bin")
+            sizes[name] = os.path.getsize(column_path) if os.path.exists(column_path) else 0
+        self._truncate(path, min(sizes[name] // np.dtype(dtype).itemsize for name, dtype in self.columns.items()))
+
+    def _truncate(self, path, rows):
+        """
+        Cut every column file of a partition down to `rows` rows.
+        """
+        for name, dtype in self.columns.items():
+            column_path = os.path.join(path, f"{name}.bin")
+            if os.path.exists(column_path) and os.path.getsize(column_path) > rows * np.dtype(dtype).itemsize:
+                os.truncate(column_path, rows * np.dtype(dtype).itemsize)
+
+    def _load_partition(self, symbol, date):
+        """
+        Memory-map every column of a partition.
+        A partially written row (e.g. after a crash mid-append) is ignored.
+        """
+        path = self.partition_path(symbol, date)
+        arrays = {}
+        for name, dtype in self.columns.items():
+            column_path = os.path.join(path, f"{name}.bin")
+            size = os.path.getsize(column_path) if os.path.exists(column_path) else 0
+            if size < np.dtype(dtype).itemsize:
+                arrays[name] = np.empty(0, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(column_path, dtype=dtype, mode="r", shape=(size // np.dtype(dtype).itemsize,))
+        rows = min(len(values) for values in arrays.values())
+        return {name: values[:rows] for name, values in arrays.items()}
+
+    def read(self, symbol, start=None, end=None):
+        """
+        Read rows with start <= timestamp < end, memory-mapped where possible.
+        :param symbol: Symbol to read.
+        :param start: Inclusive start time (None for the beginning).
+        :param end: Exclusive end time (None for the end).
+        :return: Dictionary of column arrays. A single partition is returned as
+                 memmap views; several partitions are concatenated.
+        """
+        start = None if start is None else to_nanoseconds(start)
+        end = None if end is None else to_nanoseconds(end)
+        first_day = None if start is None else str(np.datetime64(start // NS_PER_DAY, "D"))
+        last_day = None if end is None else str(np.datetime64((end - 1) // NS_PER_DAY, "D"))
+
+        parts = []
+        for date in self.dates(symbol):
+            if (first_day is not None and date < first_day) or (last_day is not None and date > last_day):
+                continue
+            arrays = self._load_partition(symbol, date)
+            timestamps = arrays["timestamp"]
+            low = 0 if start is None else np.searchsorted(timestamps, start, side="left")
+            high = len(timestamps) if end is None else np.searchsorted(timestamps, end, side="left")
+            if high > low:
+                parts.append({name: values[low:high] for name, values in arrays.items()})
+
+        if not parts:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in self.columns.items()}
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) for name in self.columns}
+
+    def tail(self, symbol, rows):
+        """
+        Read the newest `rows` rows of a symbol, opening partitions from the newest back.
+        :return: Dictionary of column arrays in time order.
+        """
+        parts = []
+        remaining = rows
+        for date in reversed(self.dates(symbol)):
+            if remaining <= 0:
+                break
+            arrays = self._load_partition(symbol, date)
+            count = len(arrays["timestamp"])
+            parts.append({name: values[max(0, count - remaining):] for name, values in arrays.items()})
+            remaining -= count
+        if not parts:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in self.columns.items()}
+        return {name: np.concatenate([part[name] for part in reversed(parts)]) for name in self.columns}
+
+    def read_frame(self, symbol, start=None, end=None):
+        """
+        Read a time range as a DataFrame with a symbol column and datetime timestamps.
+        """
+        arrays = self.read(symbol, start, end)
+        frame = pd.DataFrame({name: np.asarray(values) for name, values in arrays.items()})
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"])
+        frame.insert(1, "symbol", symbol)
+        return frame
+
+
+class TickArchive(ColumnarArchive):
+    def __init__(self, root):
+        """
+        Archive of trades: timestamp, price, volume per symbol and date.
+        """
+        super().__init__(root, TICK_ARCHIVE_COLUMNS)
+
+    def append_ticks(self, symbol, timestamps, prices, volumes, history=False):
+        return self.append(symbol, timestamps, history=history, price=prices, volume=volumes)
+
+    def append_batch(self, batch):
+        """
+        Append every trade of a decoded TradeBatch; its historical trades are
+        skipped where already archived.
+        :return: Number of rows written.
+        """
+        historical, live = batch.split_historical()
+        written = sum(self.append_ticks(*columns) for columns in live.by_symbol())
+        return written + sum(self.append_ticks(*columns, history=True) for columns in historical.by_symbol())
+
+    def append_records(self, ticks, history=False):
+        """
+        Append a list of tick dictionaries.
+        :param history: True for historical trades, skipped where already archived.
+        :return: Number of rows written.
+        """
+        written = 0
+        for symbol, group in pd.DataFrame(ticks).groupby("symbol", sort=False):
+            written += self.append_ticks(symbol, group["timestamp"].tolist(), group["price"], group["volume"], history)
+        return written
+
+
+class BarArchive(ColumnarArchive):
+    def __init__(self, root):
+        """
+        Archive of OHLCV bars per symbol and date, one bar per timestamp.
+        """
+        super().__init__(root, BAR_ARCHIVE_COLUMNS, unique_timestamps=True)
+
+    def append_bar(self, bar):
+        """
+        Append one bar dictionary; usable as a DataAggregator bar listener.
+        """
+        return self.append(bar["symbol"], [to_nanoseconds(bar["timestamp"])],
+                           **{name: [bar[name]] for name in self.columns if name != "timestamp"})
+
+    def append_bars(self, bars):
+        """
+        Append a list of bar dictionaries of any symbols in one write per symbol.
+        :return: Number of rows written.
+        """
+        by_symbol = {}
+        for bar in bars:
+            by_symbol.setdefault(bar["symbol"], []).append(bar)
+        written = 0
+        for symbol, symbol_bars in by_symbol.items():
+            written += self.append(
+                symbol, [to_nanoseconds(bar["timestamp"]) for bar in symbol_bars],
+                **{name: [bar[name] for bar in symbol_bars] for name in self.columns if name != "timestamp"},
+            )
+        return written
+
+
+class ArchiveWriter:
+    def __init__(self, archive):
+        """
+        Apply appends to an archive on a background thread, in the order they
+        were made. The queue is unbounded: rows are never dropped, and a disk
+        slower than the feed shows as a growing pending() count.
+        :param archive: TickArchive or BarArchive to write to.
+        """
+        self.archive = archive
+        self.queue = queue.Queue()
+        self.written = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name="archive-writer", daemon=True)
+        self.thread.start()
+
+    def append_batch(self, batch):
+        self.queue.put((self.archive.append_batch, (batch,)))
+
+    def append_records(self, ticks, history=False):
+        self.queue.put((self.archive.append_records, (ticks, history)))
+
+    def append_bar(self, bar):
+        """
+        Queue one bar; usable as a DataAggregator bar listener.
+        """
+        self.queue.put((self.archive.append_bar, (bar,)))
+
+    def append_bars(self, bars):
+        """
+        Queue a list of bars; usable as a RetentionPolicy spill.
+        """
+        self.queue.put((self.archive.append_bars, (list(bars),)))
+
+    def pending(self):
+        """
+        Appends queued and not yet written.
+        """
+        return self.queue.qsize()
+
+    def flush(self):
+        """
+        Wait until every queued append has been written.
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Write out every queued append and stop the thread.
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                append, arguments = item
+                self.written += append(*arguments)
+            except Exception:
+                self.errors += 1
+                log.exception("Archive write failed")
+            finally:
+                self.queue.task_done()
@@ -8,17 +8,21 @@ Created on Sun Dec  1 14:14:25 2024
 
 import requests
 from trading_app.constants import DEMO_API_URL, LIVE_API_URL, USE_LIVE_ENV
+from trading_app.utils.logger import get_logger
+
+log = get_logger("credentials")
 
 class Authenticator:
-    def __init__(self, demo_credentials, live_credentials):
+    def __init__(self, demo_credentials, live_credentials, api_url=None):
         """
         Initialize the Authenticator with demo and live credentials.
         :param demo_credentials: A dictionary with 'username', 'password', 'apiKey' for demo.
         :param live_credentials: A dictionary with 'username', 'password', 'apiKey' for live.
+        :param api_url: Override the API URL chosen by USE_LIVE_ENV.
         """
         self.demo_credentials = demo_credentials
         self.live_credentials = live_credentials
-        self.api_url = LIVE_API_URL if USE_LIVE_ENV else DEMO_API_URL
+        self.api_url = api_url or (LIVE_API_URL if USE_LIVE_ENV else DEMO_API_URL)
         self.token = None
 
     def authenticate(self):
@@ -39,10 +43,10 @@ class Authenticator:
             response = requests.post(url, json=payload)
             response.raise_for_status()
             self.token = response.json()["token"]
-            print(f"Authentication successful! Token: {self.token}")
+            log.info("Authentication successful!")
             return self.token
         except requests.exceptions.RequestException as e:
-            print(f"Authentication failed: {e}")
+            log.error("Authentication failed: %s", e)
             raise
 
     def get_token(self):
@@ -0,0 +1,154 @@
+"""
+Warm start of the indicators from historical data.
+
+With full-window moving averages the strategy cannot trade until the longest
+window has filled, which takes 1000 minutes of live bars. Backfill feeds
+history through the same aggregator and indicators before live ticks are
+processed, so the averages are valid as soon as the first live bar closes:
+
+- seed_archive: 30-second bars from the BarArchive written by earlier runs,
+- seed_ticks: ticks, such as the "historical" trades sent on subscription,
+  aggregated to bars in one vectorized pass per symbol.
+
+No strategy is run on history, so no orders are placed for past bars.
+"""
+
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from trading_app.decoders import TradeBatch
+from trading_app.tick_store import TickStore, to_nanoseconds_array
+from trading_app.data_aggregation import BAR_INTERVAL_NS
+from trading_app.records import Bar, PRICE_COLUMNS, as_bar
+from trading_app.utils.logger import get_logger
+
+log = get_logger("backfill")
+
+MINUTE_NS = pd.Timedelta("1min").value
+
+
+def ticks_by_symbol(ticks):
+    """
+    Yield (symbol, timestamps, prices, volumes) for ticks in any of the forms the app uses.
+    :param ticks: TradeBatch, TickStore, DataFrame or list of tick dictionaries.
+    """
+    if isinstance(ticks, TickStore):
+        for symbol in ticks.symbols():
+            yield (symbol, *ticks.buffer(symbol).view())
+        return
+    if not isinstance(ticks, TradeBatch):
+        frame = pd.DataFrame(ticks)
+        if frame.empty:
+            return
+        ticks = TradeBatch(
+            frame["symbol"].to_numpy(dtype=object), to_nanoseconds_array(frame["timestamp"]),
+            frame["price"].to_numpy(dtype="float64"), frame["volume"].to_numpy(dtype="float64"),
+            np.ones(len(frame), dtype=bool),
+        )
+    yield from ticks.by_symbol()
+
+
+class Backfill:
+    def __init__(self, data_aggregator, indicators, minutes=None):
+        """
+        :param data_aggregator: DataAggregator shared with the live pipeline.
+        :param indicators: Indicators shared with the live pipeline.
+        :param minutes: History used per symbol, in minutes (the longest moving
+                        average window plus one when omitted).
+        """
+        self.data_aggregator = data_aggregator
+        self.indicators = indicators
+        self.minutes = minutes or max(indicators.windows) + 1
+        self.minute_bars = defaultdict(int)  # {symbol: 1-minute bars seeded}
+
+    def _cutoff(self, symbol):
+        """
+        Latest time already covered for a symbol; older history is ignored.
+        """
+        cutoffs = []
+        if symbol in self.data_aggregator.last_tick:
+            cutoffs.append(self.data_aggregator.last_tick[symbol])
+        if symbol in self.indicators.last_bar_fed:
+            cutoffs.append(pd.Timestamp(self.indicators.last_bar_fed[symbol]).value + BAR_INTERVAL_NS - 1)
+        return max(cutoffs) if cutoffs else None
+
+    def seed_bars(self, bars):
+        """
+        Feed closed 30-second bars to the indicators, skipping any already seen.
+        :param bars: Iterable of Bars (or bar dictionaries) in time order.
+        :return: Number of 1-minute bars produced.
+        """
+        produced = 0
+        for bar in bars:
+            bar = as_bar(bar)
+            last = self.indicators.last_bar_fed.get(bar.symbol)
+            if last is not None and bar.timestamp <= last:
+                continue
+            for minute_bar in self.indicators.add_bar(bar):
+                self.indicators.update_moving_averages(minute_bar)
+                self.minute_bars[minute_bar["symbol"]] += 1
+                produced += 1
+        return produced
+
+    def seed_ticks(self, ticks):
+        """
+        Aggregate historical ticks and feed the closed bars to the indicators.
+        Only the last `minutes` minutes with ticks of each symbol are used, and ticks at or
+        before what the aggregator and indicators already hold are dropped.
+        The last interval stays open in the aggregator for live ticks to complete.
+        :param ticks: TradeBatch, TickStore, DataFrame or list of tick dictionaries.
+        :return: {symbol: 1-minute bars produced}.
+        """
+        return {
+            symbol: self.seed_symbol(symbol, timestamps, prices, volumes)
+            for symbol, timestamps, prices, volumes in ticks_by_symbol(ticks)
+        }
+
+    def seed_symbol(self, symbol, timestamps, prices, volumes):
+        """
+        Seed one symbol from tick arrays (see seed_ticks).
+        :return: Number of 1-minute bars produced.
+        """
+        timestamps = to_nanoseconds_array(timestamps)
+        if len(timestamps) == 0:
+            return 0
+        prices = np.asarray(prices, dtype="float64")
+        volumes = np.asarray(volumes, dtype="float64")
+        if len(timestamps) > 1 and (timestamps[1:] < timestamps[:-1]).any():
+            order = np.argsort(timestamps, kind="stable")
+            timestamps, prices, volumes = timestamps[order], prices[order], volumes[order]
+
+        # The last `minutes` minutes holding ticks, plus the still open one: counted
+        # by bars rather than elapsed time, so session halts and weekends are skipped
+        minutes = np.unique(timestamps // MINUTE_NS)
+        keep = timestamps >= minutes[-min(len(minutes), self.minutes + 1)] * MINUTE_NS
+        cutoff = self._cutoff(symbol)
+        if cutoff is not None:
+            keep &= timestamps > cutoff
+        if not keep.any():
+            return 0
+        bars = self.data_aggregator.add_ticks(symbol, timestamps[keep], prices[keep], volumes[keep])
+        produced = self.seed_bars(bars)
+        log.info("Backfilled %d 1-minute bars for %s from %d ticks (ready: %s)",
+                 produced, symbol, int(keep.sum()), self.indicators.ready(symbol))
+        return produced
+
+    def seed_archive(self, archive, symbols):
+        """
+        Seed from the newest archived 30-second bars of each symbol.
+        :param archive: trading_app.archive.BarArchive.
+        :param symbols: Symbols to load.
+        :return: {symbol: 1-minute bars produced}.
+        """
+        produced = {}
+        rows = 2 * self.minutes + 2  # Two 30-second bars per minute
+        for symbol in symbols:
+            arrays = archive.tail(symbol, rows)
+            if len(arrays["timestamp"]) == 0:
+                continue
+            columns = [np.asarray(arrays[name]).tolist() for name in ("timestamp",) + PRICE_COLUMNS]
+            bars = [Bar(row[0], symbol, *row[1:]) for row in zip(*columns)]
+            produced[symbol] = self.seed_bars(bars)
+            log.info("Backfilled %d 1-minute bars for %s from the archive (ready: %s)",
+                     produced[symbol], symbol, self.indicators.ready(symbol))
+        return produced
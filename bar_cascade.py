@@ -0,0 +1,157 @@
+import pandas as pd
+from collections import defaultdict
+from trading_app.records import Bar, as_bar
+
+# Timeframes built by the cascade, smallest first; the first is the input bar size
+CASCADE_TIMEFRAMES = ("30s", "1min", "5min", "15min", "1h")
+
+
+class TimeframeBuilder:
+    def __init__(self, timeframe, child_timeframe):
+        """
+        Builds bars of one timeframe from closed bars of the next smaller timeframe.
+        :param timeframe: Pandas offset string for this level (e.g. "5min").
+        :param child_timeframe: Pandas offset string of the input bars (e.g. "1min").
+        """
+        self.timeframe = timeframe
+        self.interval_ns = pd.Timedelta(timeframe).value
+        self.child_ns = pd.Timedelta(child_timeframe).value
+        if self.interval_ns % self.child_ns:
+            raise ValueError(f"{timeframe} is not a multiple of {child_timeframe}")
+        self.open_bars = {}  # {symbol: (bucket_ns, bar)}
+
+    def add(self, bar):
+        """
+        Merge a closed child bar into the symbol's open bar in O(1).
+        The open bar closes when its last child arrives, or when a child from a
+        later bucket arrives (a gap in the data).
+        :param bar: Bar (or dictionary with timestamp, symbol, open, high, low, close, volume).
+        :return: List of Bars closed by this child bar (zero, one or two).
+        """
+        bar = as_bar(bar)
+        symbol = bar.symbol
+        timestamp = bar.time_ns
+        bucket = timestamp // self.interval_ns * self.interval_ns
+        closed = []
+
+        entry = self.open_bars.get(symbol)
+        if entry is not None and entry[0] != bucket:
+            closed.append(self.open_bars.pop(symbol)[1])
+            entry = None
+
+        if entry is None:
+            self.open_bars[symbol] = (bucket, Bar(bucket, symbol, bar.open, bar.high, bar.low, bar.close, bar.volume))
+        else:
+            entry[1].merge(bar.high, bar.low, bar.close, bar.volume)
+
+        if timestamp + self.child_ns >= bucket + self.interval_ns:
+            closed.append(self.open_bars.pop(symbol)[1])
+        return closed
+
+    def flush(self, symbol=None):
+        """
+        Close open bars without waiting for more data.
+        :param symbol: Only flush this symbol (all symbols if None).
+        :return: List of closed bars.
+        """
+        symbols = list(self.open_bars) if symbol is None else [symbol]
+        return [self.open_bars.pop(name)[1] for name in symbols if name in self.open_bars]
+
+    def snapshot(self):
+        """
+        Open bars per symbol, for a checkpoint.
+        """
+        return {symbol: (bucket, bar.astuple()) for symbol, (bucket, bar) in self.open_bars.items()}
+
+    def restore(self, state):
+        self.open_bars = {symbol: (bucket, Bar(*values)) for symbol, (bucket, values) in state.items()}
+
+
+class BarCascade:
+    def __init__(self, timeframes=CASCADE_TIMEFRAMES):
+        """
+        Multi-timeframe bar cascade: each closed bar updates the next timeframe's
+        open bar, so every level costs O(1) per input bar.
+        :param timeframes: Offset strings, smallest first. The first is the size of
+                           the bars fed in (DataAggregator's 30-second bars).
+        """
+        self.timeframes = tuple(timeframes)
+        self.levels = [
+            TimeframeBuilder(timeframe, child)
+            for child, timeframe in zip(self.timeframes, self.timeframes[1:])
+        ]
+        self.subscribers = defaultdict(list)  # {timeframe: [callback, ...]}
+
+    def subscribe(self, timeframe, callback):
+        """
+        Register a callback for bar-close events at one timeframe.
+        :param timeframe: One of the cascade's timeframes.
+        :param callback: Called with each closed bar dictionary.
+        """
+        if timeframe not in self.timeframes:
+            raise ValueError(f"Unknown timeframe {timeframe}; expected one of {self.timeframes}")
+        self.subscribers[timeframe].append(callback)
+
+    def attach(self, aggregator):
+        """
+        Feed the cascade from every bar a DataAggregator finalizes.
+        """
+        aggregator.add_bar_listener(self.on_bar)
+
+    def on_bar(self, bar):
+        """
+        Push a closed base-timeframe bar through every level.
+        :param bar: Closed bar (Bar or dictionary) at the cascade's first timeframe.
+        :return: Dictionary of {timeframe: [closed bars]} for levels that closed.
+        """
+        bar = as_bar(bar)
+        closed = {self.timeframes[0]: [bar]}
+        self._notify(self.timeframes[0], [bar])
+        children = [bar]
+        for level in self.levels:
+            parents = []
+            for child in children:
+                parents.extend(level.add(child))
+            if not parents:
+                break
+            closed[level.timeframe] = parents
+            self._notify(level.timeframe, parents)
+            children = parents
+        return closed
+
+    def flush(self, symbol=None):
+        """
+        Close every open bar at every level, e.g. at the end of a session.
+        :return: Dictionary of {timeframe: [closed bars]}.
+        """
+        closed = {}
+        carried = []
+        for level in self.levels:
+            bars = []
+            for child in carried:
+                bars.extend(level.add(child))
+            bars.extend(level.flush(symbol))
+            if bars:
+                closed[level.timeframe] = bars
+                self._notify(level.timeframe, bars)
+            carried = bars
+        return closed
+
+    def snapshot(self):
+        """
+        Open bars of every level, for a checkpoint.
+        :return: {timeframe: {symbol: (bucket_ns, bar)}}.
+        """
+        return {level.timeframe: level.snapshot() for level in self.levels}
+
+    def restore(self, state):
+        """
+        Replace the open bars of every level with those of a snapshot().
+        """
+        for level in self.levels:
+            level.restore(state.get(level.timeframe, {}))
+
+    def _notify(self, timeframe, bars):
+        for callback in self.subscribers.get(timeframe, ()):
+            for bar in bars:
+                callback(bar)
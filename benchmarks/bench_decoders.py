@@ -0,0 +1,122 @@
+"""
+Compare the stdlib JSON decode path with the typed TradeBatch fast path.
+
+Run from the directory containing trading_app:
+    python -m trading_app.benchmarks.bench_decoders
+    python -m trading_app.benchmarks.bench_decoders --recorded frames.jsonl
+
+A recorded file holds one raw WebSocket frame per line.
+"""
+
+import io
+import json
+import time
+import argparse
+import contextlib
+import numpy as np
+import pandas as pd
+from trading_app.decoders import JsonDecoder, TradeFrameDecoder, TradeBatch, orjson
+from trading_app.websocket_handler import WebSocketHandler
+
+
+def make_frames(count, trades_per_frame, symbols=("NQ.Z24",), seed=1):
+    """
+    Build synthetic "trades" frames shaped like the Ironbeam stream.
+    :return: List of JSON strings.
+    """
+    rng = np.random.default_rng(seed)
+    timestamp = pd.Timestamp("2024-12-03T09:30:00").value
+    price = 21000.0
+    frames = []
+    for _ in range(count):
+        trades = []
+        for _ in range(trades_per_frame):
+            timestamp += int(rng.integers(1_000_000, 50_000_000))
+            price += float(rng.choice([-0.25, 0.0, 0.25]))
+            trades.append({
+                "symbol": str(rng.choice(symbols)),
+                "price": price,
+                "volume": int(rng.integers(1, 10)),
+                "timestamp": timestamp,
+            })
+        frames.append(json.dumps({"trades": trades}))
+    return frames
+
+
+def load_frames(path):
+    """
+    Load recorded frames, one per line.
+    """
+    with open(path) as frames_file:
+        return [line.rstrip("\n") for line in frames_file if line.strip()]
+
+
+def run_stdlib(frames):
+    """
+    json.loads + per-trade dictionaries (the original path).
+    """
+    handler = WebSocketHandler(decoder=JsonDecoder())
+    for frame in frames:
+        data = handler.decoder.decode(frame)
+        handler.handle_trade_data(data["trades"])
+    return len(handler.live_ticks)
+
+
+def run_fast(frames):
+    """
+    Typed decode straight into a columnar TradeBatch.
+    """
+    handler = WebSocketHandler(decoder=TradeFrameDecoder(min_batch=1))
+    for frame in frames:
+        handler.handle_trade_batch(handler.decoder.decode(frame))
+    return len(handler.live_ticks)
+
+
+def run_adaptive(frames):
+    """
+    Default decoder: typed path for larger frames, dictionaries for small ones.
+    """
+    handler = WebSocketHandler()
+    for frame in frames:
+        data = handler.decoder.decode(frame)
+        if isinstance(data, TradeBatch):
+            handler.handle_trade_batch(data)
+        else:
+            handler.handle_trade_data(data["trades"])
+    return len(handler.live_ticks)
+
+
+def time_path(function, frames, repeat):
+    """
+    Best wall time of `repeat` runs, with handler output discarded.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            ticks = function(frames)
+            best = min(best, time.perf_counter() - start)
+    return best, ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recorded", help="File of recorded frames, one per line")
+    parser.add_argument("--frames", type=int, default=2000, help="Synthetic frames to generate")
+    parser.add_argument("--trades-per-frame", type=int, default=20, help="Trades in each synthetic frame")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path; the best is reported")
+    args = parser.parse_args()
+
+    frames = load_frames(args.recorded) if args.recorded else make_frames(args.frames, args.trades_per_frame)
+    print(f"{len(frames)} frames, orjson {'available' if orjson else 'not installed'}")
+
+    results = {}
+    for name, function in (("stdlib", run_stdlib), ("fast", run_fast), ("adaptive", run_adaptive)):
+        seconds, ticks = time_path(function, frames, args.repeat)
+        results[name] = seconds
+        print(f"{name:>8}: {seconds * 1e3:9.1f} ms  {ticks / seconds:12,.0f} ticks/s  {seconds / len(frames) * 1e6:8.1f} us/frame")
+    print(f"speedup: fast {results['stdlib'] / results['fast']:.2f}x, adaptive {results['stdlib'] / results['adaptive']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Offline micro-benchmarks for the hot paths of the trading pipeline.
+
+Each benchmark runs on synthetic ticks at several volumes and reports
+throughput, per-call latency percentiles and peak traced memory. Results can
+be written as JSON and compared against an earlier run.
+
+Run from the directory containing trading_app:
+    python -m trading_app.benchmarks.bench_pipeline
+    python -m trading_app.benchmarks.bench_pipeline --volumes 1e3,1e4,1e5,1e6,1e7 --output after.json
+    python -m trading_app.benchmarks.bench_pipeline --compare before.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import contextlib
+import subprocess
+import numpy as np
+import pandas as pd
+from trading_app.websocket_handler import WebSocketHandler
+from trading_app.decoders import JsonDecoder
+from trading_app.data_aggregation import DataAggregator
+from trading_app.indicators import Indicators, MOVING_AVERAGE_WINDOWS
+from trading_app.trading_logic import TradingLogic
+from trading_app.replay import RecordingOrderEntry
+
+SYMBOL = "NQ.Z24"
+TRADES_PER_FRAME = 50
+TICKS_PER_BAR = 100
+BARS_PER_CALL = 100
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def make_ticks(count, interval_ns=100_000_000, seed=1):
+    """
+    Synthetic random-walk ticks.
+    :return: (timestamps int64 ns, prices float64, volumes float64)
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = pd.Timestamp("2024-12-03T09:30:00").value + np.arange(count, dtype="int64") * interval_ns
+    prices = 21000.0 + np.cumsum(rng.choice([-0.25, 0.0, 0.25], size=count))
+    volumes = rng.integers(1, 10, size=count).astype("float64")
+    return timestamps, prices, volumes
+
+
+def make_tick_records(count):
+    timestamps, prices, volumes = make_ticks(count)
+    return [
+        {"timestamp": timestamp, "symbol": SYMBOL, "price": price, "volume": volume}
+        for timestamp, price, volume in zip(timestamps.tolist(), prices.tolist(), volumes.tolist())
+    ]
+
+
+def make_bars(count, interval="30s"):
+    """
+    Synthetic OHLCV bar dictionaries.
+    """
+    timestamps = pd.date_range("2024-12-03T09:30:00", periods=count, freq=interval)
+    closes = make_ticks(count)[1]
+    return [
+        {"timestamp": timestamp, "symbol": SYMBOL, "open": close, "high": close + 0.5,
+         "low": close - 0.5, "close": close, "volume": 10.0}
+        for timestamp, close in zip(timestamps, closes.tolist())
+    ]
+
+
+def chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+# Each setup function takes a volume in ticks (or bars) and returns
+# (function called once per input, list of inputs, number of items processed).
+
+def setup_handle_trade_data(volume):
+    handler = WebSocketHandler(decoder=JsonDecoder())
+    frames = chunks(make_tick_records(volume), TRADES_PER_FRAME)
+    return handler.handle_trade_data, frames, volume
+
+
+def setup_add_tick(volume):
+    aggregator = DataAggregator()
+    return aggregator.add_tick, make_tick_records(volume), volume
+
+
+def setup_create_bar(volume):
+    aggregator = DataAggregator()
+    ticks = make_tick_records(volume)
+
+    def create_bar(bar_ticks):
+        # Ticks of one interval are folded into the open bar, which is then finalized
+        for tick in bar_ticks:
+            aggregator.add_tick(dict(tick, timestamp=bar_ticks[0]["timestamp"]))
+        return aggregator._create_bar(SYMBOL)
+
+    return create_bar, chunks(ticks, TICKS_PER_BAR), volume
+
+
+def setup_aggregate_to_one_minute(volume):
+    indicators = Indicators()
+    return indicators.aggregate_to_one_minute, chunks(make_bars(volume), BARS_PER_CALL), volume
+
+
+def setup_calculate_moving_averages(volume):
+    indicators = Indicators()
+
+    def calculate(minute_bars):
+        indicators.one_minute_records.extend(minute_bars)
+        indicators.calculate_moving_averages()
+
+    return calculate, chunks(make_bars(volume, "1min"), BARS_PER_CALL), volume
+
+
+def setup_execute_strategy(volume):
+    trading_logic = TradingLogic(indicators=Indicators(), order_entry=RecordingOrderEntry())
+    indicators = trading_logic.indicators
+    rows = []
+    for bar in make_bars(volume, "1min"):
+        indicators.last_close[SYMBOL] = bar["close"]
+        rows.append(indicators.update_moving_averages(bar))
+    records = indicators.ma_records_by_symbol[SYMBOL] = []
+
+    def execute(row):
+        records.append(row)
+        trading_logic.execute_strategy(SYMBOL)
+
+    return execute, rows, volume
+
+
+BENCHMARKS = {
+    "handle_trade_data": setup_handle_trade_data,
+    "add_tick": setup_add_tick,
+    "create_bar": setup_create_bar,
+    "aggregate_to_one_minute": setup_aggregate_to_one_minute,
+    "calculate_moving_averages": setup_calculate_moving_averages,
+    "execute_strategy": setup_execute_strategy,
+}
+
+
+def run_calls(function, inputs):
+    """
+    Call function on every input, timing each call.
+    :return: int64 array of per-call latencies in nanoseconds.
+    """
+    latencies = np.empty(len(inputs), dtype="int64")
+    clock = time.perf_counter_ns
+    for index, item in enumerate(inputs):
+        start = clock()
+        function(item)
+        latencies[index] = clock() - start
+    return latencies
+
+
+def peak_memory(setup, volume):
+    """
+    Peak memory traced while the benchmark runs (setup excluded), in bytes.
+    """
+    function, inputs, _ = setup(volume)
+    tracemalloc.start()
+    try:
+        for item in inputs:
+            function(item)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(name, volume, measure_memory=True):
+    """
+    Run one benchmark at one volume, with handler output discarded.
+    :return: Result dictionary.
+    """
+    setup = BENCHMARKS[name]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        function, inputs, items = setup(volume)
+        latencies = run_calls(function, inputs)
+        memory = peak_memory(setup, volume) if measure_memory else None
+
+    seconds = latencies.sum() / 1e9
+    return {
+        "benchmark": name,
+        "volume": volume,
+        "calls": len(inputs),
+        "seconds": seconds,
+        "items_per_second": items / seconds if seconds else None,
+        "latency_us": {
+            f"p{percentile:g}": float(value) / 1e3
+            for percentile, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES))
+        } | {"max": float(latencies.max()) / 1e3},
+        "peak_memory_bytes": memory,
+    }
+
+
+def environment():
+    """
+    Commit and library versions recorded with the results.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": pd.Timestamp.now(tz="UTC").isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def compare(results, baseline_path):
+    """
+    Print the throughput change of each result against a saved run.
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = {
+            (result["benchmark"], result["volume"]): result
+            for result in json.load(baseline_file)["results"]
+        }
+    print(f"\nChange vs {baseline_path} (items/s, p99 latency):")
+    for result in results:
+        before = baseline.get((result["benchmark"], result["volume"]))
+        if before is None or not before["items_per_second"] or not result["items_per_second"]:
+            continue
+        speed = result["items_per_second"] / before["items_per_second"]
+        p99 = result["latency_us"]["p99"] / before["latency_us"]["p99"] if before["latency_us"]["p99"] else float("nan")
+        flag = "  REGRESSION" if speed < 0.9 else ""
+        print(f"{result['benchmark']:>26} {result['volume']:>10,}: {speed:6.2f}x throughput, {p99:6.2f}x p99{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--volumes", default="1e3,1e4,1e5", help="Comma-separated tick/bar counts, e.g. 1e3,1e4,1e5,1e6,1e7")
+    parser.add_argument("--only", help="Comma-separated benchmark names to run")
+    parser.add_argument("--budget", type=float, default=60.0,
+                        help="Skip a volume when the previous one suggests it would take longer than this (seconds)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced peak-memory pass")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    volumes = [int(float(volume)) for volume in args.volumes.split(",")]
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    print(f"Moving averages {MOVING_AVERAGE_WINDOWS}, volumes {volumes}")
+
+    results = []
+    for name in names:
+        previous = None
+        for volume in sorted(volumes):
+            if previous is not None and previous["seconds"] * volume / previous["volume"] > args.budget:
+                print(f"{name:>26} {volume:>10,}: skipped (over {args.budget:g}s budget)")
+                continue
+            result = run_benchmark(name, volume, measure_memory=not args.no_memory)
+            results.append(result)
+            previous = result
+            latency = result["latency_us"]
+            memory = result["peak_memory_bytes"]
+            print(
+                f"{name:>26} {volume:>10,}: {result['items_per_second']:12,.0f} items/s"
+                f"  p50 {latency['p50']:9.1f} us  p99 {latency['p99']:9.1f} us  max {latency['max']:10.1f} us"
+                + (f"  peak {memory / 2**20:8.1f} MiB" if memory is not None else "")
+            )
+            sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"environment": environment(), "results": results}, output_file, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Checkpoints of the pipeline state for fast restarts.
+
+Without a checkpoint a restart loses the open bars, the moving averages and the
+strategy's signals and positions, and rebuilding them from history is slow.
+A Checkpointer snapshots the DataAggregator, Indicators and TradingLogic into
+one compressed file. The file is written next to its final path and renamed
+into place, so a crash mid-write leaves the previous checkpoint intact.
+
+On startup restore() loads the checkpoint and replays only the archived ticks
+received after it was taken, so the time to get ready depends on the snapshot
+size and the time since the last checkpoint, not on the length of the session.
+"""
+
+import os
+import time
+import zlib
+import pickle
+import asyncio
+from trading_app.backfill import Backfill
+from trading_app.utils.logger import get_logger
+
+log = get_logger("checkpoint")
+
+CHECKPOINT_VERSION = 2
+
+
+class Checkpointer:
+    def __init__(self, path, data_aggregator, indicators, trading_logic=None, tick_archive=None):
+        """
+        :param path: Checkpoint file.
+        :param data_aggregator: DataAggregator of the live pipeline.
+        :param indicators: Indicators of the live pipeline.
+        :param trading_logic: Optional TradingLogic whose signals and positions are kept.
+        :param tick_archive: Optional TickArchive holding the ticks received after
+                             the last checkpoint, replayed on restore.
+        """
+        self.path = path
+        self.data_aggregator = data_aggregator
+        self.indicators = indicators
+        self.trading_logic = trading_logic
+        self.tick_archive = tick_archive
+        self.backfill = Backfill(data_aggregator, indicators)
+        self.saved = 0
+        self.last_size = 0  # Bytes written by the last save
+
+    def snapshot(self):
+        """
+        Take a snapshot of every component. The snapshot shares no mutable data
+        with the components, so it can be written while they keep running.
+        """
+        return {
+            "version": CHECKPOINT_VERSION,
+            "created": time.time(),
+            "aggregator": self.data_aggregator.snapshot(),
+            "indicators": self.indicators.snapshot(),
+            "strategy": self.trading_logic.snapshot() if self.trading_logic is not None else None,
+        }
+
+    def write(self, state):
+        """
+        Atomically replace the checkpoint file with a snapshot.
+        :return: Size of the file in bytes.
+        """
+        data = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as checkpoint_file:
+            checkpoint_file.write(data)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temporary, self.path)
+        try:
+            # Make the rename itself durable
+            directory_fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            pass  # Directories cannot be opened on this platform
+        else:
+            try:
+                os.fsync(directory_fd)
+            except OSError:
+                pass
+            finally:
+                os.close(directory_fd)
+        self.saved += 1
+        self.last_size = len(data)
+        return len(data)
+
+    def save(self):
+        """
+        Snapshot the components and write the checkpoint.
+        :return: Size of the file in bytes.
+        """
+        started = time.perf_counter()
+        size = self.write(self.snapshot())
+        log.info("Checkpoint written to %s: %d bytes in %.3fs", self.path, size, time.perf_counter() - started)
+        return size
+
+    async def save_periodically(self, interval):
+        """
+        Write a checkpoint every `interval` seconds until cancelled. The snapshot
+        is taken on the event loop, between pipeline steps, and written from a
+        worker thread.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                state = self.snapshot()
+                size = await asyncio.to_thread(self.write, state)
+                log.debug("Checkpoint written to %s: %d bytes", self.path, size)
+            except Exception as e:
+                log.exception("Error writing checkpoint: %s", e)
+
+    def load(self):
+        """
+        Read the checkpoint file.
+        :return: The snapshot, or None if there is no usable checkpoint.
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "rb") as checkpoint_file:
+                state = pickle.loads(zlib.decompress(checkpoint_file.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError) as e:
+            log.warning("Ignoring unreadable checkpoint %s: %s", self.path, e)
+            return None
+        if not isinstance(state, dict) or state.get("version") != CHECKPOINT_VERSION:
+            log.warning("Ignoring checkpoint %s written by another version", self.path)
+            return None
+        return state
+
+    def restore(self):
+        """
+        Load the checkpoint into the components, then bring them up to date:
+        bars the aggregator had closed but the indicators had not yet seen are
+        fed to the indicators, and archived ticks newer than the snapshot are
+        replayed. The strategy is not run on the replayed data, so no order is
+        sent for a bar that may already have been traded before the restart.
+        :return: {symbol: ticks replayed}, or None if there was no checkpoint to restore.
+        """
+        started = time.perf_counter()
+        state = self.load()
+        if state is None:
+            return None
+        try:
+            self.indicators.restore(state["indicators"])
+        except ValueError as e:
+            log.warning("Ignoring checkpoint %s: %s", self.path, e)
+            return None
+        self.data_aggregator.restore(state["aggregator"])
+        if self.trading_logic is not None and state["strategy"] is not None:
+            self.trading_logic.restore(state["strategy"])
+
+        for bars in self.data_aggregator.aggregated_bars.values():
+            self.backfill.seed_bars(bars)
+        replayed = self.replay_ticks() if self.tick_archive is not None else {}
+        if self.trading_logic is not None:
+            # The strategy resumes after the newest replayed bar
+            self.trading_logic.catch_up()
+        log.info("Restored checkpoint from %s taken %.0fs ago: replayed %d ticks in %.3fs",
+                 self.path, time.time() - state["created"], sum(replayed.values()), time.perf_counter() - started)
+        return replayed
+
+    def replay_ticks(self):
+        """
+        Aggregate the archived ticks received after the last tick of each symbol
+        in the aggregator, and feed the bars they close to the indicators.
+        :return: {symbol: ticks replayed}.
+        """
+        replayed = {}
+        for symbol, last_tick in list(self.data_aggregator.last_tick.items()):
+            arrays = self.tick_archive.read(symbol, start=last_tick + 1)
+            replayed[symbol] = len(arrays["timestamp"])
+            if replayed[symbol]:
+                bars = self.data_aggregator.add_ticks(symbol, arrays["timestamp"], arrays["price"], arrays["volume"])
+                self.backfill.seed_bars(bars)
+        return replayed
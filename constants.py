@@ -34,6 +34,85 @@ DEMO_API_URL = os.getenv("DEMO_API_URL", "https://demo.ironbeamapi.com/v2")
 LIVE_API_URL = os.getenv("LIVE_API_URL", "https://live.ironbeamapi.com/v2")
 API_URL = LIVE_API_URL if USE_LIVE_ENV else DEMO_API_URL
 
+# WebSocket base URL; derived from API_URL (https -> wss) unless set
+STREAM_URL = os.getenv("STREAM_URL") or API_URL.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+
+# Trading account used for order entry
+ACCOUNT_ID = os.getenv("TRADING_APP_ACCOUNT_ID")
+
+# Credential cache: lifetimes and refresh margin in seconds, optional file for warm restarts
+TOKEN_TTL = float(os.getenv("TOKEN_TTL", 3600))
+STREAM_ID_TTL = float(os.getenv("STREAM_ID_TTL", 300))
+CREDENTIAL_REFRESH_MARGIN = float(os.getenv("CREDENTIAL_REFRESH_MARGIN", 60))
+SESSION_CACHE_PATH = os.getenv("SESSION_CACHE_PATH")
+
+# Order HTTP client: pooled keep-alive connections and (connect, read) timeouts in seconds
+ORDER_POOL_SIZE = int(os.getenv("ORDER_POOL_SIZE", 10))
+ORDER_TIMEOUT = (
+    float(os.getenv("ORDER_CONNECT_TIMEOUT", 3.05)),
+    float(os.getenv("ORDER_READ_TIMEOUT", 10)),
+)
+
+# Order requests per second allowed by the broker and how many may go out back to back
+ORDER_RATE_LIMIT = float(os.getenv("ORDER_RATE_LIMIT", 10))
+ORDER_RATE_BURST = int(os.getenv("ORDER_RATE_BURST", 5))
+
+# Seconds without order events on the stream before orders and positions are
+# polled in bulk (0 disables polling), and closed orders kept in the order book
+ORDER_POLL_INTERVAL = float(os.getenv("ORDER_POLL_INTERVAL", 5))
+ORDER_RETENTION = int(os.getenv("ORDER_RETENTION", 1000))
+
+# Maximum number of ticks held in memory per symbol (oldest ticks are overwritten)
+TICK_BUFFER_CAPACITY = int(os.getenv("TICK_BUFFER_CAPACITY", 1_000_000))
+
+# Maximum number of items waiting in each pipeline stage queue
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 10_000))
+
+# Bracket order distances in points from the reference price
+STOP_LOSS_POINTS = float(os.getenv("STOP_LOSS_POINTS", 10))
+TAKE_PROFIT_POINTS = float(os.getenv("TAKE_PROFIT_POINTS", 20))
+
+# Seconds between latency histogram exports (0 disables) and the JSON-lines file they go to
+LATENCY_EXPORT_INTERVAL = float(os.getenv("LATENCY_EXPORT_INTERVAL", 0))
+LATENCY_EXPORT_PATH = os.getenv("LATENCY_EXPORT_PATH")
+
+# Directory of the on-disk tick and bar archive (archiving is off when unset)
+ARCHIVE_PATH = os.getenv("ARCHIVE_PATH")
+
+# Number of ticks aggregated per vectorized step when replaying recorded data
+REPLAY_CHUNK_SIZE = int(os.getenv("REPLAY_CHUNK_SIZE", 100_000))
+
+# Stream connections the symbols are spread over, symbols per subscribe message
+# (1 sends one message per symbol) and how long the merged feed waits for a
+# slower shard before releasing ticks out of order, in seconds
+STREAM_SHARDS = int(os.getenv("STREAM_SHARDS", 1))
+SUBSCRIPTION_BATCH_SIZE = int(os.getenv("SUBSCRIPTION_BATCH_SIZE", 1))
+STREAM_MERGE_DELAY = float(os.getenv("STREAM_MERGE_DELAY", 0.05))
+
+# Logging: default level, per-category overrides ("trades=DEBUG,bars=WARNING"),
+# keep one record in N, records per second, "text" or "json", output file
+# (standard error when unset) and records queued for the writer before dropping
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "trades=100")
+LOG_RATE_LIMITS = os.getenv("LOG_RATE_LIMITS", "trades=10,bars=20")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_PATH = os.getenv("LOG_PATH")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10_000))
+
+# Items kept in memory (0 keeps everything): 30-second bars per symbol, and
+# 1-minute bars and moving average rows per symbol; older ones are dropped or
+# spilled to the archive. Seconds between memory gauge reports (0 disables).
+BAR_RETENTION = int(os.getenv("BAR_RETENTION", 2880))
+MINUTE_BAR_RETENTION = int(os.getenv("MINUTE_BAR_RETENTION", 1440))
+MA_RETENTION = int(os.getenv("MA_RETENTION", 1440))
+MEMORY_REPORT_INTERVAL = float(os.getenv("MEMORY_REPORT_INTERVAL", 300))
+
+# Checkpoint file of the aggregator, indicator and strategy state (off when unset)
+# and seconds between checkpoints
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH")
+CHECKPOINT_INTERVAL = float(os.getenv("CHECKPOINT_INTERVAL", 60))
+
 # Hardcoded symbols maximum 10
 SYMBOLS = {
     #"ES": "ESZ24",  # E-mini S&P 500 December 2024
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import threading
+import requests
+from trading_app.constants import (
+    API_URL, DEMO_CREDENTIALS, LIVE_CREDENTIALS, TOKEN_TTL, STREAM_ID_TTL,
+    CREDENTIAL_REFRESH_MARGIN, SESSION_CACHE_PATH,
+)
+from trading_app.auth import Authenticator
+from trading_app.utils.logger import get_logger
+
+log = get_logger("credentials")
+
+
+class CredentialService:
+    def __init__(self, authenticator=None, api_url=API_URL, cache_path=SESSION_CACHE_PATH,
+                 token_ttl=TOKEN_TTL, stream_id_ttl=STREAM_ID_TTL,
+                 refresh_margin=CREDENTIAL_REFRESH_MARGIN, spare_stream_ids=1):
+        """
+        Process-wide cache of the auth token and ready-to-use streamIds.
+        Authenticates once, keeps spare streamIds so reconnects never wait on
+        /stream/create, and can refresh both in the background before they expire.
+        :param authenticator: Authenticator used for /auth (created if omitted).
+        :param api_url: Base API URL for /stream/create.
+        :param cache_path: Optional JSON file persisting the token and spare streamIds.
+        :param token_ttl: Seconds a token is treated as valid.
+        :param stream_id_ttl: Seconds an unused streamId is treated as valid.
+        :param refresh_margin: Refresh credentials this many seconds before expiry.
+        :param spare_stream_ids: Number of unused streamIds kept ready.
+        """
+        self.authenticator = authenticator or Authenticator(
+            demo_credentials=DEMO_CREDENTIALS,
+            live_credentials=LIVE_CREDENTIALS
+        )
+        self.api_url = api_url
+        self.cache_path = cache_path
+        self.token_ttl = token_ttl
+        self.stream_id_ttl = stream_id_ttl
+        self.refresh_margin = refresh_margin
+        self.spare_stream_ids = spare_stream_ids
+
+        self.lock = threading.RLock()  # Held only to read or swap the cached credentials
+        self.authenticating = threading.Lock()  # Held for the /auth round trip, one at a time
+        self.token = None
+        self.token_expires_at = 0.0  # Wall-clock time, so it survives a restart
+        self.stream_ids = []  # Spare [(streamId, expires_at), ...], oldest first
+        self.refresh_thread = None
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()  # Set to refresh before the next interval
+        self.load()
+
+    def load(self):
+        """
+        Load a still-valid token and spare streamIds from the cache file.
+        """
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path) as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring unreadable credential cache: %s", e)
+            return
+
+        now = time.time()
+        with self.lock:
+            if cached.get("token_expires_at", 0) > now:
+                self.token = cached["token"]
+                self.token_expires_at = cached["token_expires_at"]
+                self.stream_ids = [
+                    (stream_id, expires_at) for stream_id, expires_at in cached.get("stream_ids", [])
+                    if expires_at > now
+                ]
+                log.info("Loaded cached credentials.")
+
+    def save(self):
+        """
+        Atomically write the token and spare streamIds to the cache file.
+        """
+        if not self.cache_path:
+            return
+        with self.lock:
+            cached = {
+                "token": self.token,
+                "token_expires_at": self.token_expires_at,
+                "stream_ids": self.stream_ids,
+            }
+        temp_path = f"{self.cache_path}.tmp"
+        descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w") as cache_file:
+            json.dump(cached, cache_file)
+        os.replace(temp_path, self.cache_path)
+
+    def _expires_soon(self, expires_at):
+        return expires_at - time.time() <= self.refresh_margin
+
+    def authenticate(self):
+        """
+        Authenticate now and cache the new token.
+        :return: The authentication token.
+        """
+        with self.authenticating:
+            return self._authenticate()
+
+    def _authenticate(self):
+        # The request runs outside self.lock, so get_token() keeps returning
+        # the still-valid cached token while a refresh is in flight
+        token = self.authenticator.authenticate()
+        with self.lock:
+            self.token = token
+            self.token_expires_at = time.time() + self.token_ttl
+            self.stream_ids = []  # streamIds belong to the old token
+        self.save()
+        return token
+
+    def _valid_token(self):
+        with self.lock:
+            if self.token and self.token_expires_at > time.time():
+                return self.token
+            return None
+
+    def get_token(self):
+        """
+        Get the cached token, authenticating only if there is none or it expired.
+        Callers without a valid token wait for a single /auth request.
+        :return: The authentication token.
+        """
+        token = self._valid_token()
+        if token:
+            return token
+        with self.authenticating:
+            # Another caller may have authenticated while this one waited
+            return self._valid_token() or self._authenticate()
+
+    def invalidate_token(self):
+        """
+        Drop the cached token, e.g. after the server rejected it.
+        """
+        with self.lock:
+            self.token = None
+            self.token_expires_at = 0.0
+            self.stream_ids = []
+        self.save()
+
+    def create_stream_id(self):
+        """
+        Create a new streamId using the Ironbeam API.
+        :return: The new streamId.
+        """
+        try:
+            url = f"{self.api_url}/stream/create"
+            headers = {"Authorization": f"Bearer {self.get_token()}"}
+            response = requests.get(url, headers=headers, timeout=10)
+            response.raise_for_status()
+            stream_id = response.json().get("streamId")
+            log.info("Created new streamId: %s", stream_id)
+            return stream_id
+        except requests.exceptions.RequestException as e:
+            log.error("Error creating streamId: %s", e)
+            raise
+
+    def get_stream_id(self):
+        """
+        Hand out an unused streamId, taking a spare if one is ready.
+        Each call returns a different streamId.
+        :return: A streamId.
+        """
+        with self.lock:
+            now = time.time()
+            self.stream_ids = [entry for entry in self.stream_ids if entry[1] > now]
+            if self.stream_ids:
+                stream_id, _ = self.stream_ids.pop(0)
+                self.save()
+                self.wake_event.set()  # Let the refresh thread replace the spare
+                return stream_id
+        return self.create_stream_id()
+
+    def top_up_stream_ids(self):
+        """
+        Create streamIds until the configured number of fresh spares is ready.
+        """
+        with self.lock:
+            self.stream_ids = [entry for entry in self.stream_ids if not self._expires_soon(entry[1])]
+            missing = self.spare_stream_ids - len(self.stream_ids)
+        for _ in range(missing):
+            stream_id = self.create_stream_id()
+            with self.lock:
+                self.stream_ids.append((stream_id, time.time() + self.stream_id_ttl))
+        if missing > 0:
+            self.save()
+
+    def refresh(self):
+        """
+        Re-authenticate if the token is close to expiry and restore spare streamIds.
+        """
+        if not self.token or self._expires_soon(self.token_expires_at):
+            self.authenticate()
+        self.top_up_stream_ids()
+
+    def _refresh_loop(self, interval):
+        while not self.stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                log.error("Credential refresh failed: %s", e)
+            self.wake_event.wait(interval)
+            self.wake_event.clear()
+
+    def start_refresh(self, interval=15):
+        """
+        Start refreshing credentials on a background thread.
+        :param interval: Seconds between refresh checks.
+        """
+        if self.refresh_thread is not None and self.refresh_thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.refresh_thread = threading.Thread(
+            target=self._refresh_loop, args=(interval,), name="credential-refresh", daemon=True
+        )
+        self.refresh_thread.start()
+
+    def stop_refresh(self):
+        """
+        Stop the background refresh thread.
+        """
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.refresh_thread is not None:
+            self.refresh_thread.join()
+            self.refresh_thread = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_credential_service():
+    """
+    Get the process-wide CredentialService, creating it on first use.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = CredentialService()
+        return _service
@@ -1,65 +1,179 @@
+import logging
+import numpy as np
 import pandas as pd
 from datetime import timedelta
 from collections import defaultdict
+from trading_app.tick_store import to_nanoseconds, to_nanoseconds_array
+from trading_app.records import Bar, BarSeries
+from trading_app.latency import stamp
+from trading_app.retention import RetentionPolicy, usage
+from trading_app.constants import BAR_RETENTION
+from trading_app.utils.logger import get_logger
+
+log = get_logger("bars")
+
+BAR_INTERVAL_NS = pd.Timedelta("30s").value
 
 
 class DataAggregator:
-    def __init__(self):
+    def __init__(self, retention=BAR_RETENTION, spill=None):
         """
         Initialize the data aggregator for 30-second bars.
+        Ticks are not kept: each one is folded into its symbol's open bar, and
+        finalized bars are stored column-wise in a BarSeries per symbol.
+        :param retention: Finalized bars kept per symbol (0 keeps every bar).
+        :param spill: Optional callable receiving bars as they are dropped from memory.
+        """
+        self.open_bars = {}  # {symbol: Bar of the interval still receiving ticks}
+        self.aggregated_bars = defaultdict(BarSeries)  # {symbol: BarSeries}, the newest `retention` bars
+        self.retention = RetentionPolicy(retention, spill)
+        self.last_interval = defaultdict(lambda: None)  # {symbol: start of the last tick's interval, in ns}
+        self.last_tick = {}  # {symbol: nanosecond timestamp of the latest tick added}
+        self.bar_listeners = []  # Callables invoked with each finalized bar
+
+    def add_bar_listener(self, callback):
         """
-        self.tick_data = defaultdict(list)  # {symbol: [tick1, tick2, ...]}
-        self.aggregated_bars = defaultdict(list)  # {symbol: [bar1, bar2, ...]}
-        self.last_interval = defaultdict(lambda: None)  # {symbol: last_interval}
+        Register a callable that receives every bar as soon as it is finalized.
+        :param callback: Called with the Bar.
+        """
+        self.bar_listeners.append(callback)
+
+    def _publish_bar(self, bar):
+        for callback in self.bar_listeners:
+            callback(bar)
 
     def add_tick(self, tick):
         """
         Add a tick to the aggregator and update 30-second bars.
         :param tick: Dictionary with tick data. Example:
                      {"timestamp": ..., "symbol": ..., "price": ..., "volume": ...}
+        :return: The bar finalized by this tick, or None.
         """
         symbol = tick.get("symbol")
         if not symbol:
-            print("Invalid tick: Missing symbol.")
-            return
-
-        # Convert timestamp to pandas datetime if not already
-        tick["timestamp"] = pd.to_datetime(tick["timestamp"])
+            log.warning("Invalid tick: Missing symbol.")
+            return None
 
         # Determine the 30-second interval for the tick
-        interval_start = tick["timestamp"].floor("30s")
+        timestamp = to_nanoseconds(tick["timestamp"])
+        interval_start = timestamp // BAR_INTERVAL_NS * BAR_INTERVAL_NS
 
         # Check if the interval has changed
+        bar = None
         if self.last_interval[symbol] is not None and interval_start > self.last_interval[symbol]:
             # Finalize the bar for the previous interval
-            self._create_bar(symbol)
+            bar = self._create_bar(symbol)
 
-        # Add the tick to the symbol's tick data
-        self.tick_data[symbol].append(tick)
+        # Fold the tick into the symbol's open bar
+        price = tick["price"]
+        open_bar = self.open_bars.get(symbol)
+        if open_bar is None:
+            self.open_bars[symbol] = Bar(interval_start, symbol, price, price, price, price, tick["volume"])
+        else:
+            open_bar.merge(price, price, price, tick["volume"])
         self.last_interval[symbol] = interval_start
+        self.last_tick[symbol] = timestamp
+        stamp("add_tick")
+        return bar
+
+    def add_ticks(self, symbol, timestamps, prices, volumes):
+        """
+        Add a batch of ticks for one symbol and build 30-second bars in a vectorized pass.
+        Produces the same bars as calling add_tick for each tick in order; the last
+        interval stays open exactly as it would on the per-tick path.
+        :param symbol: The symbol the ticks belong to.
+        :param timestamps: Array of tick times (int nanoseconds, datetime64 or strings).
+        :param prices: Array of trade prices.
+        :param volumes: Array of trade volumes.
+        :return: List of the bars finalized by the batch.
+        """
+        timestamps = to_nanoseconds_array(timestamps)
+        prices = np.asarray(prices, dtype="float64")
+        volumes = np.asarray(volumes, dtype="float64")
+        if len(timestamps) == 0:
+            return []
+
+        # Bucket by interval with integer arithmetic; a new bar starts wherever the
+        # interval moves forward from the previous tick, as in add_tick
+        buckets = timestamps // BAR_INTERVAL_NS * BAR_INTERVAL_NS
+        starts = np.concatenate(([0], np.flatnonzero(buckets[1:] > buckets[:-1]) + 1))
+        ends = np.append(starts[1:], len(timestamps))
+        highs = np.maximum.reduceat(prices, starts)
+        lows = np.minimum.reduceat(prices, starts)
+        totals = np.add.reduceat(volumes, starts)
+
+        bars = []
+        last_interval = self.last_interval[symbol]
+        if last_interval is not None and buckets[0] > last_interval:
+            bar = self._create_bar(symbol)
+            if bar is not None:
+                bars.append(bar)
+
+        # Ticks of the first group join the open bar, if there is one
+        first_complete = 0
+        if len(starts) > 1 and symbol in self.open_bars:
+            self.open_bars[symbol].merge(highs[0], lows[0], prices[ends[0] - 1], totals[0])
+            bars.append(self._create_bar(symbol))
+            first_complete = 1
+
+        # Every group but the last is a finished bar
+        complete = slice(first_complete, len(starts) - 1)
+        if complete.start < complete.stop:
+            group_starts = starts[complete]
+            columns = (buckets[group_starts], prices[group_starts], highs[complete], lows[complete],
+                       prices[ends[complete] - 1], totals[complete])
+            series = self.aggregated_bars[symbol]
+            series.extend_arrays(symbol, *columns)
+            new_bars = [
+                Bar(interval, symbol, bar_open, high, low, close, volume)
+                for interval, bar_open, high, low, close, volume in zip(*(column.tolist() for column in columns))
+            ]
+            self.retention.trim(series)
+            for bar in new_bars:
+                self._publish_bar(bar)
+            stamp("bar_close")
+            bars.extend(new_bars)
+
+        # The last group stays open until a later interval arrives
+        last_start = starts[-1]
+        open_bar = self.open_bars.get(symbol)
+        if open_bar is None or len(starts) > 1:
+            self.open_bars[symbol] = Bar(int(buckets[last_start]), symbol, float(prices[last_start]),
+                                         float(highs[-1]), float(lows[-1]), float(prices[-1]), float(totals[-1]))
+        else:
+            open_bar.merge(float(highs[-1]), float(lows[-1]), float(prices[-1]), float(totals[-1]))
+        self.last_interval[symbol] = int(buckets[-1])
+        self.last_tick[symbol] = int(timestamps[-1])
+        log.info("Aggregated %d 30-second bars for %s from %d ticks.", len(bars), symbol, len(timestamps))
+        stamp("add_ticks")
+        return bars
+
+    def add_tick_buffer(self, symbol, buffer):
+        """
+        Add every tick held in a columnar TickBuffer.
+        :param symbol: The symbol the buffer belongs to.
+        :param buffer: trading_app.tick_store.TickBuffer.
+        :return: List of the bars finalized by the batch.
+        """
+        return self.add_ticks(symbol, *buffer.view())
 
     def _create_bar(self, symbol):
         """
-        Create a single 30-second bar from the accumulated ticks.
+        Finalize the symbol's open bar.
         :param symbol: The symbol for the bar.
+        :return: The new bar, or None if there were no ticks.
         """
-        ticks = self.tick_data[symbol]
-        if not ticks:
-            return
-
-        # Aggregate the tick data into OHLCV format
-        ohlc = {
-            "timestamp": ticks[0]["timestamp"].floor("30s"),
-            "symbol": symbol,
-            "open": ticks[0]["price"],
-            "high": max(tick["price"] for tick in ticks),
-            "low": min(tick["price"] for tick in ticks),
-            "close": ticks[-1]["price"],
-            "volume": sum(tick["volume"] for tick in ticks),
-        }
-        self.aggregated_bars[symbol].append(ohlc)
-        self.tick_data[symbol] = []  # Clear the processed ticks
-        print(f"Aggregated 30-second bar for {symbol}: {ohlc}")
+        bar = self.open_bars.pop(symbol, None)
+        if bar is None:
+            return None
+
+        self.aggregated_bars[symbol].append(bar)
+        self.retention.trim(self.aggregated_bars[symbol])
+        self._publish_bar(bar)
+        stamp("bar_close")
+        if log.isEnabledFor(logging.INFO):
+            log.info("Aggregated 30-second bar for %s", symbol, extra={"data": bar.to_dict()})
+        return bar
 
     def get_aggregated_bars(self, symbol):
         """
@@ -68,6 +182,39 @@ class DataAggregator:
         :return: List of 30-second bars for the symbol.
         """
         # Finalize the current interval bar before returning
-        if self.tick_data[symbol]:
+        if symbol in self.open_bars:
             self._create_bar(symbol)
         return self.aggregated_bars.get(symbol, [])
+
+    def snapshot(self):
+        """
+        State needed to carry on after a restart: the open bar of each symbol,
+        the retained bars and the last interval and tick per symbol.
+        :return: Dictionary of plain values and arrays (see checkpoint.Checkpointer).
+        """
+        return {
+            "open_bars": {symbol: bar.astuple() for symbol, bar in self.open_bars.items()},
+            "aggregated_bars": {symbol: bars.copy() for symbol, bars in self.aggregated_bars.items() if bars},
+            "last_interval": {symbol: interval for symbol, interval in self.last_interval.items() if interval is not None},
+            "last_tick": dict(self.last_tick),
+        }
+
+    def restore(self, state):
+        """
+        Replace the aggregator's state with one taken by snapshot().
+        """
+        self.open_bars = {symbol: Bar(*values) for symbol, values in state["open_bars"].items()}
+        self.aggregated_bars = defaultdict(
+            BarSeries, {symbol: bars.copy() for symbol, bars in state["aggregated_bars"].items()}
+        )
+        self.last_interval = defaultdict(lambda: None, state["last_interval"])
+        self.last_tick = dict(state["last_tick"])
+
+    def memory_usage(self):
+        """
+        Gauges of the bars held in memory.
+        """
+        return {
+            "aggregated_bars": usage(*self.aggregated_bars.values()),
+            "open_bars": usage(list(self.open_bars.values())),
+        }
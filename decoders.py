@@ -0,0 +1,130 @@
+import json
+import numpy as np
+from trading_app.tick_store import to_nanoseconds_array
+
+try:
+    import orjson  # Optional, faster JSON parser
+except ImportError:
+    orjson = None
+
+
+def fast_loads(frame):
+    """
+    Parse a JSON frame with orjson when installed, otherwise with the stdlib.
+    """
+    if orjson is not None:
+        return orjson.loads(frame)
+    return json.loads(frame)
+
+
+class TradeBatch:
+    __slots__ = ("symbols", "timestamps", "prices", "volumes", "is_historical")
+
+    def __init__(self, symbols, timestamps, prices, volumes, is_historical):
+        """
+        Columnar batch of trades decoded from one "trades" frame.
+        :param symbols: numpy object array of symbols.
+        :param timestamps: int64 nanoseconds since the epoch.
+        :param prices: float64 prices.
+        :param volumes: float64 volumes.
+        :param is_historical: bool flags.
+        """
+        self.symbols = symbols
+        self.timestamps = timestamps
+        self.prices = prices
+        self.volumes = volumes
+        self.is_historical = is_historical
+
+    @classmethod
+    def from_trades(cls, trades):
+        """
+        Build a batch from the list of trade objects in a frame.
+        """
+        count = len(trades)
+        return cls(
+            np.array([trade.get("symbol") for trade in trades], dtype=object),
+            to_nanoseconds_array([trade.get("timestamp") for trade in trades]),
+            np.array([trade.get("price") for trade in trades], dtype="float64"),
+            np.array([trade.get("volume") for trade in trades], dtype="float64"),
+            np.fromiter((trade.get("is_historical", False) for trade in trades), dtype=bool, count=count),
+        )
+
+    @classmethod
+    def concatenate(cls, batches):
+        """
+        Join batches end to end into one batch.
+        """
+        return cls(*(np.concatenate([getattr(batch, column) for batch in batches]) for column in cls.__slots__))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def select(self, mask):
+        """
+        Get the trades where mask is True as a new batch.
+        """
+        return TradeBatch(self.symbols[mask], self.timestamps[mask], self.prices[mask],
+                          self.volumes[mask], self.is_historical[mask])
+
+    def split_historical(self):
+        """
+        Split into (historical, live) batches.
+        """
+        if not self.is_historical.any():
+            return self.select(slice(0, 0)), self
+        return self.select(self.is_historical), self.select(~self.is_historical)
+
+    def by_symbol(self):
+        """
+        Yield (symbol, timestamps, prices, volumes) for each symbol in the batch.
+        """
+        if len(self) == 0:
+            return
+        first = self.symbols[0]
+        if (self.symbols == first).all():
+            yield first, self.timestamps, self.prices, self.volumes
+            return
+        for symbol in dict.fromkeys(self.symbols.tolist()):
+            mask = self.symbols == symbol
+            yield symbol, self.timestamps[mask], self.prices[mask], self.volumes[mask]
+
+    def to_records(self):
+        """
+        Convert to a list of tick dictionaries.
+        """
+        return [
+            {"timestamp": timestamp, "symbol": symbol, "price": price, "volume": volume}
+            for symbol, timestamp, price, volume in zip(
+                self.symbols.tolist(), self.timestamps.tolist(), self.prices.tolist(), self.volumes.tolist()
+            )
+        ]
+
+
+class JsonDecoder:
+    """
+    Stdlib decoder: every frame becomes plain Python objects.
+    """
+    def decode(self, frame):
+        return json.loads(frame)
+
+
+class TradeFrameDecoder:
+    def __init__(self, loads=fast_loads, min_batch=4):
+        """
+        Decoder with a typed fast path for "trades" frames.
+        Trade frames with at least `min_batch` trades are decoded straight into a
+        columnar TradeBatch; smaller frames (where array setup costs more than it
+        saves) and any other frame are returned as parsed JSON.
+        :param loads: JSON parsing function.
+        :param min_batch: Smallest number of trades decoded into a TradeBatch.
+        """
+        self.loads = loads
+        self.min_batch = min_batch
+
+    def decode(self, frame):
+        data = self.loads(frame)
+        if isinstance(data, dict) and len(data) == 1:
+            trades = data.get("trades")
+            if isinstance(trades, list) and len(trades) >= self.min_batch:
+                return TradeBatch.from_trades(trades)
+        return data
@@ -0,0 +1,379 @@
+"""
+Indicator registry and shared computation graph.
+
+Each indicator is a class registered under a name. It declares the indicators
+it is computed from, and it has two forms that give the same values:
+
+- update(bar, *inputs): the next value for one closed bar in O(1), from state
+  kept per symbol,
+- batch(columns, *inputs): every value over a whole history at once, for
+  backtests and sweeps.
+
+An IndicatorGraph holds one node per unique (timeframe, indicator, params),
+created the first time any consumer requires it, with its inputs added first.
+On each bar close every node of that timeframe is updated once for the bar's
+symbol, in dependency order, and all consumers read the same value. Bollinger
+Bands on the 200-minute SMA reuse the SMA node the crossover strategy already
+updates, for example.
+"""
+
+import copy
+import math
+import inspect
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from trading_app.moving_averages import RollingMean
+from trading_app.records import BarSeries, as_bar
+
+# {name: Indicator subclass}
+INDICATORS = {}
+
+
+def register(cls):
+    """
+    Class decorator adding an Indicator subclass to the registry under its name.
+    """
+    INDICATORS[cls.name] = cls
+    return cls
+
+
+class Indicator:
+    name = None
+    fields = None  # Names of the values of an indicator producing a tuple per bar
+
+    def inputs(self):
+        """
+        Indicators this one is computed from, as (name, params) pairs on the same
+        timeframe. Their values are passed to update() and batch() in this order.
+        """
+        return ()
+
+    def label(self):
+        """
+        Column name of the indicator's values (e.g. "ema_50").
+        """
+        params = inspect.signature(type(self)).parameters
+        values = [str(getattr(self, name)) for name in params if getattr(self, name) is not None]
+        return "_".join([self.name] + values)
+
+    def update(self, bar, *inputs):
+        raise NotImplementedError
+
+    def batch(self, columns, *inputs):
+        raise NotImplementedError
+
+
+@register
+class SMA(Indicator):
+    name = "sma"
+
+    def __init__(self, window, min_periods=None):
+        """
+        Simple moving average of the closes.
+        :param window: Window length in bars.
+        :param min_periods: Bars needed before a value is produced (None requires a full window).
+        """
+        self.window = window
+        self.min_periods = min_periods
+        self.mean = RollingMean(window, min_periods)
+
+    def update(self, bar, *inputs):
+        return self.mean.update(bar.close)
+
+    def batch(self, columns, *inputs):
+        min_periods = self.window if self.min_periods is None else self.min_periods
+        return pd.Series(columns["close"]).rolling(self.window, min_periods=min_periods).mean().to_numpy()
+
+
+@register
+class EMA(Indicator):
+    name = "ema"
+
+    def __init__(self, window):
+        """
+        Exponential moving average of the closes with alpha = 2 / (window + 1),
+        starting from the first close and produced once `window` bars are in.
+        """
+        self.window = window
+        self.alpha = 2.0 / (window + 1)
+        self.count = 0
+        self.average = math.nan
+
+    def update(self, bar, *inputs):
+        close = bar.close
+        self.count += 1
+        self.average = close if self.count == 1 else self.average + self.alpha * (close - self.average)
+        return self.average if self.count >= self.window else math.nan
+
+    def batch(self, columns, *inputs):
+        closes = pd.Series(columns["close"])
+        return closes.ewm(span=self.window, adjust=False, min_periods=self.window).mean().to_numpy()
+
+
+@register
+class ATR(Indicator):
+    name = "atr"
+
+    def __init__(self, window=14):
+        """
+        Average true range with Wilder's smoothing (alpha = 1 / window); the first
+        bar's true range is its high - low.
+        """
+        self.window = window
+        self.count = 0
+        self.average = math.nan
+        self.previous_close = None
+
+    def update(self, bar, *inputs):
+        true_range = bar.high - bar.low
+        if self.previous_close is not None:
+            true_range = max(true_range, abs(bar.high - self.previous_close), abs(bar.low - self.previous_close))
+        self.previous_close = bar.close
+        self.count += 1
+        self.average = true_range if self.count == 1 else self.average + (true_range - self.average) / self.window
+        return self.average if self.count >= self.window else math.nan
+
+    def batch(self, columns, *inputs):
+        high, low, close = (np.asarray(columns[name], dtype="float64") for name in ("high", "low", "close"))
+        previous = np.concatenate(([np.nan], close[:-1]))
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+        smoothed = pd.Series(true_range).ewm(alpha=1.0 / self.window, adjust=False, min_periods=self.window)
+        return smoothed.mean().to_numpy()
+
+
+@register
+class VWAP(Indicator):
+    name = "vwap"
+
+    def __init__(self, window):
+        """
+        Volume-weighted average of the typical price (high + low + close) / 3 over
+        the last `window` bars; NaN while the window holds no volume.
+        """
+        self.window = window
+        self.weighted = RollingMean(window, None)
+        self.volume = RollingMean(window, None)
+
+    def update(self, bar, *inputs):
+        typical = (bar.high + bar.low + bar.close) / 3
+        weighted = self.weighted.update(typical * bar.volume)
+        volume = self.volume.update(bar.volume)
+        return weighted / volume if volume > 0 else math.nan
+
+    def batch(self, columns, *inputs):
+        volume = pd.Series(columns["volume"], dtype="float64")
+        typical = (pd.Series(columns["high"]) + pd.Series(columns["low"]) + pd.Series(columns["close"])) / 3
+        weighted = (typical * volume).rolling(self.window).sum()
+        total = volume.rolling(self.window).sum()
+        return (weighted / total.where(total > 0)).to_numpy()
+
+
+@register
+class StdDev(Indicator):
+    name = "stddev"
+
+    def __init__(self, window, ddof=0):
+        """
+        Rolling standard deviation of the closes over a full window.
+        Closes are taken relative to the first one seen, so the running sums of
+        squares stay small.
+        """
+        self.window = window
+        self.ddof = ddof
+        self.reference = None
+        self.mean = RollingMean(window, None)
+        self.mean_square = RollingMean(window, None)
+
+    def label(self):
+        return f"stddev_{self.window}" if self.ddof == 0 else f"stddev_{self.window}_{self.ddof}"
+
+    def update(self, bar, *inputs):
+        if self.reference is None:
+            self.reference = bar.close
+        offset = bar.close - self.reference
+        mean = self.mean.update(offset)
+        mean_square = self.mean_square.update(offset * offset)
+        if math.isnan(mean):
+            return math.nan
+        variance = max(mean_square - mean * mean, 0.0) * self.window / (self.window - self.ddof)
+        return math.sqrt(variance)
+
+    def batch(self, columns, *inputs):
+        return pd.Series(columns["close"]).rolling(self.window).std(ddof=self.ddof).to_numpy()
+
+
+@register
+class Bollinger(Indicator):
+    name = "bollinger"
+    fields = ("middle", "upper", "lower")
+
+    def __init__(self, window=20, width=2.0):
+        """
+        Bollinger Bands: the SMA of the closes and `width` standard deviations
+        above and below it, computed from the shared sma and stddev nodes.
+        """
+        self.window = window
+        self.width = width
+
+    def inputs(self):
+        return (("sma", {"window": self.window}), ("stddev", {"window": self.window}))
+
+    def update(self, bar, middle, deviation):
+        return (middle, middle + self.width * deviation, middle - self.width * deviation)
+
+    def batch(self, columns, middle, deviation):
+        return np.column_stack((middle, middle + self.width * deviation, middle - self.width * deviation))
+
+
+def _bind(cls, params):
+    """
+    Parameters of an indicator with defaults filled in, so equal requests share a key.
+    """
+    bound = inspect.signature(cls).bind(**params)
+    bound.apply_defaults()
+    return tuple(bound.arguments.items())
+
+
+class IndicatorNode:
+    def __init__(self, key, cls, params, inputs):
+        """
+        One unique indicator in the graph, with its state for each symbol.
+        :param key: (timeframe, name, params) key of the node.
+        :param cls: Indicator subclass.
+        :param params: Constructor parameters.
+        :param inputs: Keys of the nodes whose values are passed to the indicator.
+        """
+        self.key = key
+        self.cls = cls
+        self.params = params
+        self.inputs = inputs
+        self.prototype = cls(**params)  # Unused instance for labels and batch computation
+        self.label = self.prototype.label()
+        self.states = {}  # {symbol: Indicator instance}
+
+    def state(self, symbol):
+        indicator = self.states.get(symbol)
+        if indicator is None:
+            indicator = self.states[symbol] = self.cls(**self.params)
+        return indicator
+
+
+class IndicatorGraph:
+    def __init__(self):
+        """
+        Nodes are kept per timeframe in the order they were added, which puts
+        every node after its inputs.
+        """
+        self.nodes = {}  # {key: IndicatorNode}
+        self.by_timeframe = defaultdict(list)  # {timeframe: [IndicatorNode, ...]} in dependency order
+        self.values = defaultdict(dict)  # {symbol: {key: latest value}}
+        self.updates = 0  # Node updates computed
+
+    def require(self, name, timeframe="1min", **params):
+        """
+        Get the key of an indicator node, adding it and its inputs if needed.
+        :param name: Registered indicator name (see INDICATORS).
+        :param timeframe: Bar timeframe the indicator is computed on.
+        :param params: Indicator parameters.
+        :return: Key to read the indicator's values with.
+        """
+        cls = INDICATORS.get(name)
+        if cls is None:
+            raise ValueError(f"Unknown indicator {name}; expected one of {sorted(INDICATORS)}")
+        key = (timeframe, name, _bind(cls, params))
+        if key not in self.nodes:
+            params = dict(key[2])
+            inputs = tuple(self.require(input_name, timeframe, **input_params)
+                           for input_name, input_params in cls(**params).inputs())
+            node = self.nodes[key] = IndicatorNode(key, cls, params, inputs)
+            self.by_timeframe[timeframe].append(node)
+        return key
+
+    def timeframes(self):
+        """
+        Timeframes with at least one node.
+        """
+        return list(self.by_timeframe)
+
+    def label(self, key):
+        """
+        Column name of a node's values.
+        """
+        return self.nodes[key].label
+
+    def update(self, bar, timeframe="1min"):
+        """
+        Update every node of a timeframe once with a closed bar.
+        :param bar: Closed Bar (or bar dictionary) of that timeframe.
+        :return: {key: value} of the bar's symbol, shared by every consumer.
+        """
+        bar = as_bar(bar)
+        values = self.values[bar.symbol]
+        nodes = self.by_timeframe.get(timeframe, ())
+        for node in nodes:
+            indicator = node.state(bar.symbol)
+            values[node.key] = indicator.update(bar, *[values[key] for key in node.inputs])
+        self.updates += len(nodes)
+        return values
+
+    def value(self, symbol, key):
+        """
+        Latest value of a node for a symbol (None before its first bar).
+        """
+        return self.values.get(symbol, {}).get(key)
+
+    def ready(self, symbol, keys):
+        """
+        True once every given node has a value for the symbol (every field of
+        a multi-value node such as Bollinger Bands).
+        """
+        values = self.values.get(symbol, {})
+        for key in keys:
+            value = values.get(key)
+            if value is None:
+                return False
+            for field in value if isinstance(value, tuple) else (value,):
+                if field is None or (isinstance(field, (float, np.floating)) and math.isnan(field)):
+                    return False
+        return True
+
+    def batch(self, bars, timeframe="1min"):
+        """
+        Compute every node of a timeframe over one symbol's bar history at once.
+        :param bars: DataFrame, BarSeries or list of bars of a single symbol, oldest first.
+        :return: DataFrame with the bars' timestamps and one column per node (or per
+                 field of a multi-value node, e.g. "bollinger_20_2.0_upper").
+        """
+        if isinstance(bars, BarSeries):
+            frame = bars.to_dataframe()
+        else:
+            frame = pd.DataFrame(bars)
+        columns = {name: frame[name].to_numpy(dtype="float64") for name in ("open", "high", "low", "close", "volume")}
+        results = {}
+        output = {"timestamp": frame["timestamp"].to_numpy()}
+        for node in self.by_timeframe.get(timeframe, ()):
+            values = results[node.key] = node.prototype.batch(columns, *[results[key] for key in node.inputs])
+            if node.cls.fields:
+                for position, field in enumerate(node.cls.fields):
+                    output[f"{node.label}_{field}"] = values[:, position]
+            else:
+                output[node.label] = values
+        return pd.DataFrame(output)
+
+    def snapshot(self):
+        """
+        Every node's per-symbol state and latest values, for a checkpoint.
+        """
+        return {
+            "states": {key: copy.deepcopy(node.states) for key, node in self.nodes.items()},
+            "values": copy.deepcopy(dict(self.values)),
+        }
+
+    def restore(self, state):
+        """
+        Continue from a snapshot(). Nodes missing from the snapshot start empty.
+        """
+        for key, node in self.nodes.items():
+            node.states = copy.deepcopy(state["states"].get(key, {}))
+        self.values = defaultdict(dict, copy.deepcopy(state["values"]))
@@ -1,22 +1,149 @@
 import pandas as pd
+from collections import defaultdict
 from trading_app.websocket_handler import WebSocketHandler
+from trading_app.indicator_graph import IndicatorGraph
+from trading_app.bar_cascade import BarCascade
+from trading_app.records import BarSeries, BAR_COLUMNS, as_bar
+from trading_app.latency import stamp
+from trading_app.retention import RetentionPolicy, usage, pack_records, unpack_records
+from trading_app.constants import MINUTE_BAR_RETENTION, MA_RETENTION
+from trading_app.utils.logger import get_logger
+
+log = get_logger("indicators")
+
+# Moving average window lengths in 1-minute bars
+MOVING_AVERAGE_WINDOWS = (200, 1000)
 
 
 class Indicators:
-    def __init__(self):
+    def __init__(self, websocket_handler=None, windows=MOVING_AVERAGE_WINDOWS,
+                 retention=MINUTE_BAR_RETENTION, ma_retention=MA_RETENTION, spill=None, min_periods=None):
         """
         Initialize the Indicators class.
+        Moving averages are nodes of an IndicatorGraph, which keeps its own
+        windows, so the bar and moving average history below is only kept for
+        inspection and can be bounded. Other indicators are added with require().
+        :param websocket_handler: Shared WebSocketHandler (one is created if omitted).
+        :param windows: Moving average window lengths in 1-minute bars.
+        :param retention: 1-minute bars kept per symbol (0 keeps every bar).
+        :param ma_retention: Moving average rows kept per symbol (0 keeps every row;
+                             at least 2 are kept for the crossover check).
+        :param spill: Optional callable receiving 1-minute bars as they are dropped from memory.
+        :param min_periods: Bars before a moving average is produced; None waits for
+                            the full window, so the strategy never trades on a
+                            partly filled average (see backfill.Backfill for warm starts).
+        """
+        self.websocket_handler = websocket_handler or WebSocketHandler()  # Connect to WebSocket data
+        self.one_minute_records = BarSeries()  # Closed 1-minute bars in arrival order
+        self.last_minute = {}  # {symbol: nanosecond timestamp of the latest recorded 1-minute bar}
+        self.cascade = BarCascade()  # 30s -> 1min -> 5min -> 15min -> 1h bars
+        self.last_bar_fed = {}  # {symbol: timestamp of the last 30-second bar fed to the cascade}
+        self._one_minute_bars = None  # Cached DataFrame export of one_minute_records
+        self.windows = tuple(windows)
+        self.graph = IndicatorGraph()
+        self.ma_keys = {window: self.graph.require("sma", window=window, min_periods=min_periods)
+                        for window in self.windows}
+        self.ma_records = []  # One row of moving averages per closed 1-minute bar, all symbols
+        self.ma_records_by_symbol = defaultdict(list)  # {symbol: [row, ...]}
+        self.bars_processed = 0  # 1-minute bars already fed to the moving average engine
+        self._moving_averages = None  # Cached DataFrame export of ma_records
+        self.last_close = {}  # {symbol: close of the latest 1-minute bar}
+        self.bar_retention = RetentionPolicy(retention, spill)
+        self.ma_retention = RetentionPolicy(max(ma_retention, 2) if ma_retention else 0)
+
+    @property
+    def one_minute_bars(self):
+        """
+        Closed 1-minute bars as a DataFrame.
+        """
+        if self._one_minute_bars is None:
+            self._one_minute_bars = self.one_minute_records.to_dataframe()
+        return self._one_minute_bars
+
+    def _record_one_minute_bar(self, bar):
+        """
+        Store a closed 1-minute bar unless its symbol already has a bar at or
+        after the same timestamp.
+        :return: True if the bar was recorded.
+        """
+        last = self.last_minute.get(bar.symbol)
+        if last is not None and bar.time_ns <= last:
+            return False
+        self.last_minute[bar.symbol] = bar.time_ns
+        self.one_minute_records.append(bar)
+        self._one_minute_bars = None
+        self._trim_one_minute_records()
+        return True
+
+    def _trim_one_minute_records(self):
+        """
+        Apply the retention policy to the 1-minute bars, never dropping bars not
+        yet fed to the moving averages.
+        """
+        if self.bar_retention.limit:
+            # Records of all symbols share one list: keep `retention` bars per symbol
+            unprocessed = len(self.one_minute_records) - self.bars_processed
+            limit = self.bar_retention.limit * len(self.last_minute) + unprocessed
+            self.bars_processed -= self.bar_retention.trim(self.one_minute_records, limit)
+
+    @property
+    def moving_averages(self):
+        """
+        Moving averages recorded for each 1-minute bar, as a DataFrame.
+        """
+        if self._moving_averages is None:
+            columns = ["timestamp", "symbol"] + [f"{window}_minute" for window in self.windows]
+            self._moving_averages = pd.DataFrame(self.ma_records, columns=columns)
+        return self._moving_averages
+
+    def latest_moving_averages(self, count=1, symbol=None):
+        """
+        Get the most recent moving average rows without building a DataFrame.
+        :param count: Number of rows to return.
+        :param symbol: Only return rows for this symbol (rows of every symbol when omitted).
+        :return: List of up to `count` row dictionaries, oldest first.
+        """
+        if symbol is None:
+            return self.ma_records[-count:]
+        return self.ma_records_by_symbol.get(symbol, [])[-count:]
+
+    def ready(self, symbol):
+        """
+        True once every moving average of a symbol has a value.
+        """
+        return self.graph.ready(symbol, self.ma_keys.values())
+
+    def require(self, name, timeframe="1min", **params):
         """
-        self.websocket_handler = WebSocketHandler()  # Connect to WebSocket data
-        self.one_minute_bars = pd.DataFrame(columns=["timestamp", "symbol", "open", "high", "low", "close", "volume"])
-        self.moving_averages = pd.DataFrame(columns=["timestamp", "symbol", "200_minute", "1000_minute"])
+        Add an indicator (and the indicators it is computed from) to the graph,
+        or share the node if another consumer already asked for it. Nodes are
+        updated once per bar close of their timeframe.
+        :param name: Registered indicator name (see indicator_graph.INDICATORS).
+        :param timeframe: One of the cascade's timeframes.
+        :return: Key to read the indicator with value().
+        """
+        if timeframe not in self.cascade.timeframes:
+            raise ValueError(f"Unknown timeframe {timeframe}; expected one of {self.cascade.timeframes}")
+        return self.graph.require(name, timeframe, **params)
+
+    def value(self, symbol, key):
+        """
+        Latest value of an indicator for a symbol (None before its first bar).
+        """
+        return self.graph.value(symbol, key)
+
+    def symbols(self):
+        """
+        Symbols with recorded moving averages.
+        """
+        return list(self.ma_records_by_symbol)
 
     async def process_data(self):
         """
         Process incoming data from WebSocket and calculate indicators.
         """
         await self.websocket_handler.connect()
-        print("WebSocket connected. Aggregating 30-second bars into 1-minute bars...")
+        log.info("WebSocket connected. Aggregating 30-second bars into 1-minute bars...")
 
         while True:
             # Get the live tick data
@@ -32,51 +159,136 @@ class Indicators:
                 # Print the most recent moving average values
                 if not self.moving_averages.empty:
                     latest_ma = self.moving_averages.iloc[-1]
-                    print(f"Latest Moving Averages: {latest_ma}")
+                    log.info("Latest Moving Averages", extra={"data": latest_ma.to_dict()})
 
     def aggregate_to_one_minute(self, bars_30s):
         """
         Aggregate 30-second bars into 1-minute bars.
-        :param bars_30s: DataFrame with 30-second bars.
-        :return: None
+        Only bars newer than the last one seen for their symbol are fed to the
+        cascade, so repeated calls with a growing frame do constant work per new bar.
+        The input frame is not modified.
+        :param bars_30s: DataFrame (or list of dictionaries) with 30-second bars.
+        :return: List of 1-minute bars closed by the new 30-second bars.
         """
+        bars_30s = pd.DataFrame(bars_30s)
         if bars_30s.empty:
-            print("No data to aggregate for 1-minute bars.")
-            return
+            log.debug("No data to aggregate for 1-minute bars.")
+            return []
 
-        # Convert timestamp to ensure proper datetime format
-        bars_30s["timestamp"] = pd.to_datetime(bars_30s["timestamp"])
+        timestamps = pd.to_datetime(bars_30s["timestamp"])
+        closed = []
+        for symbol, positions in bars_30s.groupby("symbol", sort=False).indices.items():
+            last = self.last_bar_fed.get(symbol)
+            symbol_times = timestamps.iloc[positions]
+            new_positions = positions if last is None else positions[(symbol_times > last).to_numpy()]
+            for bar in bars_30s.iloc[new_positions].to_dict("records"):
+                closed.extend(self.add_bar(bar))
+        log.debug("1-minute bars aggregated.")
+        return closed
 
-        # Group by 1-minute intervals and aggregate
-        bars_30s.set_index("timestamp", inplace=True)
-        resampled = bars_30s.resample("1min").agg({
-            "symbol": "first",
-            "open": "first",
-            "high": "max",
-            "low": "min",
-            "close": "last",
-            "volume": "sum"
-        }).dropna().reset_index()
-
-        self.one_minute_bars = pd.concat([self.one_minute_bars, resampled], ignore_index=True).drop_duplicates(subset=["timestamp"])
-        print("1-minute bars aggregated.")
+    def add_bar(self, bar):
+        """
+        Push a closed 30-second bar through the timeframe cascade.
+        :param bar: Bar or dictionary with timestamp, symbol, open, high, low, close, volume.
+        :return: List of 1-minute Bars closed by this bar.
+        """
+        bar = as_bar(bar)
+        self.last_bar_fed[bar.symbol] = bar.timestamp
+        closed = self.cascade.on_bar(bar)
+        for timeframe in self.graph.timeframes():
+            if timeframe != "1min":
+                # 1-minute indicators are updated with the moving averages
+                for closed_bar in closed.get(timeframe, ()):
+                    self.graph.update(closed_bar, timeframe)
+        return [minute_bar for minute_bar in closed.get("1min", []) if self._record_one_minute_bar(minute_bar)]
 
     def calculate_moving_averages(self):
         """
-        Calculate 200-minute and 1000-minute moving averages from 1-minute bars.
+        Update 200-minute and 1000-minute moving averages with the 1-minute bars
+        that have not been processed yet.
         :return: None
         """
-        if self.one_minute_bars.empty:
-            print("No 1-minute data available for moving averages.")
+        if not self.one_minute_records:
+            log.debug("No 1-minute data available for moving averages.")
             return
 
-        self.one_minute_bars["close"] = self.one_minute_bars["close"].astype(float)
+        for bar in self.one_minute_records[self.bars_processed:]:
+            self.update_moving_averages(bar)
+        self._trim_one_minute_records()
+        stamp("calculate_moving_averages")
+        log.debug("Moving averages calculated and recorded.")
+
+    def update_moving_averages(self, bar):
+        """
+        Update the moving averages, and every other 1-minute indicator of the
+        graph, in constant time with a closed 1-minute bar.
+        :param bar: Bar or bar dictionary.
+        :return: The recorded moving average row.
+        """
+        bar = as_bar(bar)
+        symbol = bar.symbol
+        values = self.graph.update(bar)
+        self.last_close[symbol] = float(bar.close)
+        row = {"timestamp": bar.timestamp, "symbol": symbol}
+        for window, key in self.ma_keys.items():
+            row[f"{window}_minute"] = values[key]
+        self.ma_records.append(row)
+        symbol_rows = self.ma_records_by_symbol[symbol]
+        symbol_rows.append(row)
+        if self.ma_retention.limit:
+            self.ma_retention.trim(self.ma_records, self.ma_retention.limit * len(self.ma_records_by_symbol))
+            self.ma_retention.trim(symbol_rows)
+        self.bars_processed += 1
+        self._moving_averages = None
+        stamp("update_moving_averages")
+        return row
 
-        # Calculate moving averages
-        self.one_minute_bars["200_minute"] = self.one_minute_bars["close"].rolling(window=200, min_periods=1).mean()
-        self.one_minute_bars["1000_minute"] = self.one_minute_bars["close"].rolling(window=1000, min_periods=1).mean()
+    def snapshot(self):
+        """
+        State needed to carry on after a restart: the open bars of the cascade,
+        the indicator graph's state and the retained bar and moving average history.
+        :return: Dictionary of plain values and arrays (see checkpoint.Checkpointer).
+        """
+        return {
+            "windows": self.windows,
+            "one_minute_records": self.one_minute_records.copy(),
+            "last_minute": dict(self.last_minute),
+            "last_bar_fed": dict(self.last_bar_fed),
+            "cascade": self.cascade.snapshot(),
+            "graph": self.graph.snapshot(),
+            "ma_records": pack_records(self.ma_records),
+            "ma_records_by_symbol": {symbol: pack_records(rows) for symbol, rows in self.ma_records_by_symbol.items()},
+            "bars_processed": self.bars_processed,
+            "last_close": dict(self.last_close),
+        }
 
-        # Record moving average positions for each minute
-        moving_avg_positions = self.one_minute_bars[["timestamp", "symbol", "200_minute", "1000_minute"]].dropna()
-        self.moving_averages = pd.concat([self.moving_averages, moving_avg_positions], ignore_index=True).drop_duplicates(subset=["timestamp"])
-        print("Moving averages calculated and recorded.")
+    def restore(self, state):
+        """
+        Replace the indicators' state with one taken by snapshot().
+        :raises ValueError: If the snapshot was taken with other moving average windows.
+        """
+        if tuple(state["windows"]) != self.windows:
+            raise ValueError(f"Snapshot windows {tuple(state['windows'])} do not match {self.windows}")
+        self.one_minute_records = state["one_minute_records"].copy()
+        self.last_minute = dict(state["last_minute"])
+        self.last_bar_fed = dict(state["last_bar_fed"])
+        self.cascade.restore(state["cascade"])
+        self.graph.restore(state["graph"])
+        self.ma_records = unpack_records(state["ma_records"])
+        self.ma_records_by_symbol = defaultdict(
+            list, {symbol: unpack_records(rows) for symbol, rows in state["ma_records_by_symbol"].items()}
+        )
+        self.bars_processed = state["bars_processed"]
+        self.last_close = dict(state["last_close"])
+        self._one_minute_bars = None
+        self._moving_averages = None
+
+    def memory_usage(self):
+        """
+        Gauges of the bar and moving average history held in memory.
+        """
+        return {
+            "one_minute_records": usage(self.one_minute_records),
+            "ma_records": usage(self.ma_records),
+            "ma_records_by_symbol": usage(*self.ma_records_by_symbol.values()),
+        }
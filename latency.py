@@ -0,0 +1,235 @@
+"""
+Tick-to-order latency instrumentation.
+
+Each live frame is stamped with time.monotonic_ns() when it arrives. The stamp
+travels with the ticks through the pipeline stages (see pipeline.Stage) and is
+held in a context variable while a stage runs, so code anywhere on the path can
+call stamp("stage") to record the time elapsed since the originating tick.
+Latencies go into log-linear (HDR-style) histograms: recording is a few integer
+operations and memory is fixed regardless of how many samples are taken.
+"""
+
+import json
+import time
+import asyncio
+import threading
+import contextvars
+import numpy as np
+from trading_app.utils.logger import get_logger
+
+log = get_logger("latency")
+
+_origin = contextvars.ContextVar("tick_origin_ns", default=None)
+
+
+def set_origin(origin_ns):
+    """
+    Tie the current context to the tick received at origin_ns.
+    :return: Token for reset_origin.
+    """
+    return _origin.set(origin_ns)
+
+
+def reset_origin(token):
+    _origin.reset(token)
+
+
+def current_origin():
+    """
+    Monotonic nanosecond stamp of the tick being processed, or None.
+    """
+    return _origin.get()
+
+
+class LatencyHistogram:
+    def __init__(self, sub_bucket_bits=7):
+        """
+        Log-linear histogram of non-negative integer values (nanoseconds).
+        Values below 2**sub_bucket_bits are counted exactly; larger values
+        fall into buckets with a relative width of at most 2**-(sub_bucket_bits-1).
+        :param sub_bucket_bits: Precision; 7 gives under 1.6% bucket width.
+        """
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_buckets = 1 << sub_bucket_bits
+        self.half = self.sub_buckets >> 1
+        self.counts = [0] * (self.sub_buckets + (64 - sub_bucket_bits) * self.half)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        if value < self.sub_buckets:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self.sub_buckets + (shift - 1) * self.half + (value >> shift) - self.half
+
+    def _upper_bound(self, index):
+        """
+        Largest value counted in a bucket.
+        """
+        if index < self.sub_buckets:
+            return index
+        shift, offset = divmod(index - self.sub_buckets, self.half)
+        shift += 1
+        return ((offset + self.half + 1) << shift) - 1
+
+    def record(self, value):
+        """
+        Count one value; negative values are counted as zero.
+        """
+        value = max(int(value), 0)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percentile):
+        """
+        Value at or below which `percentile` percent of the samples fall
+        (reported as the upper bound of its bucket, capped at the maximum).
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(np.ceil(percentile / 100 * self.count)))
+        cumulative = np.cumsum(self.counts)
+        index = int(np.searchsorted(cumulative, rank))
+        return min(self._upper_bound(index), self.max)
+
+    def merge(self, other):
+        """
+        Add the samples of another histogram with the same precision.
+        """
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        """
+        Count, mean, min, max and percentiles in microseconds.
+        """
+        if not self.count:
+            return {"count": 0}
+        summary = {
+            "count": self.count,
+            "mean_us": self.total / self.count / 1e3,
+            "min_us": self.min / 1e3,
+            "max_us": self.max / 1e3,
+        }
+        for percentile in percentiles:
+            summary[f"p{percentile:g}_us"] = self.percentile(percentile) / 1e3
+        return summary
+
+
+class LatencyRecorder:
+    def __init__(self, sub_bucket_bits=7):
+        """
+        Per-stage latency histograms.
+        :param sub_bucket_bits: Histogram precision (see LatencyHistogram).
+        """
+        self.sub_bucket_bits = sub_bucket_bits
+        self.histograms = {}  # {stage: LatencyHistogram}, in first-seen order
+        self.lock = threading.Lock()
+        self.export_task = None
+
+    def record(self, stage, latency_ns):
+        """
+        Record a latency for a stage.
+        """
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram(self.sub_bucket_bits)
+            histogram.record(latency_ns)
+
+    def stamp(self, stage):
+        """
+        Record the time since the originating tick for a stage.
+        Does nothing outside the processing of a stamped tick.
+        """
+        origin = _origin.get()
+        if origin is not None:
+            self.record(stage, time.monotonic_ns() - origin)
+
+    def snapshot(self):
+        """
+        Summary of every stage histogram, keyed by stage name.
+        """
+        with self.lock:
+            return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+    def dump(self, path=None):
+        """
+        Write the current snapshot as one JSON line to a file, or log it.
+        :param path: File to append to; logged when omitted.
+        """
+        if path is None:
+            log.info("[Latency]", extra={"data": {"stages": self.snapshot()}})
+            return
+        line = json.dumps({"time": time.time(), "stages": self.snapshot()})
+        with open(path, "a") as export_file:
+            export_file.write(line + "\n")
+
+    async def export_periodically(self, interval, path=None, reset=False):
+        """
+        Dump the histograms every `interval` seconds.
+        :param reset: Start new histograms after each dump (per-interval figures).
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.dump(path)
+            if reset:
+                self.reset()
+
+    def start_export(self, interval, path=None, reset=False):
+        """
+        Start periodic export on the running event loop.
+        """
+        if self.export_task is None:
+            self.export_task = asyncio.create_task(self.export_periodically(interval, path, reset))
+        return self.export_task
+
+    async def stop_export(self):
+        if self.export_task is not None:
+            self.export_task.cancel()
+            try:
+                await self.export_task
+            except asyncio.CancelledError:
+                pass
+            self.export_task = None
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_latency_recorder():
+    """
+    Get the process-wide LatencyRecorder, creating it on first use.
+    """
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = LatencyRecorder()
+        return _recorder
+
+
+def stamp(stage):
+    """
+    Record the time since the originating tick on the process-wide recorder.
+    """
+    origin = _origin.get()
+    if origin is not None:
+        recorder = _recorder if _recorder is not None else get_latency_recorder()
+        recorder.record(stage, time.monotonic_ns() - origin)
@@ -1,51 +1,135 @@
+import os
+import signal
 import asyncio
 from trading_app.websocket_handler import WebSocketHandler
+from trading_app.stream_shards import ShardedWebSocketHandler
 from trading_app.data_aggregation import DataAggregator
 from trading_app.indicators import Indicators
 from trading_app.trading_logic import TradingLogic
+from trading_app.order_entry import OrderEntry
+from trading_app.order_gateway import AsyncOrderGateway
+from trading_app.order_dispatcher import OrderDispatcher
+from trading_app.order_book import OrderBook
+from trading_app.pipeline import TradingPipeline
+from trading_app.credential_service import get_credential_service
+from trading_app.archive import TickArchive, BarArchive, ArchiveWriter
+from trading_app.latency import get_latency_recorder
+from trading_app.retention import report_memory_periodically
+from trading_app.checkpoint import Checkpointer
+from trading_app.utils.logger import configure_logging, shutdown_logging, get_logger
+from trading_app.constants import (
+    ARCHIVE_PATH, LATENCY_EXPORT_INTERVAL, LATENCY_EXPORT_PATH, STREAM_SHARDS, MEMORY_REPORT_INTERVAL, SYMBOLS,
+    CHECKPOINT_PATH, CHECKPOINT_INTERVAL, ORDER_POLL_INTERVAL,
+)
 
 
 async def main():
     """
     Main entry point for the trading application.
     """
-    print("Initializing trading application...")
+    # Log records are written by a background thread, never on the event loop
+    configure_logging()
+    log = get_logger("app")
+    log.info("Initializing trading application...")
+
+    # Authenticate once and keep the token and a spare streamId fresh in the background
+    credentials = get_credential_service()
+    credentials.start_refresh()
 
     # Initialize core components
-    websocket_handler = WebSocketHandler()
+    # Archive writes run on background threads, never on the event loop
+    tick_archive = TickArchive(os.path.join(ARCHIVE_PATH, "ticks")) if ARCHIVE_PATH else None
+    bar_archive = BarArchive(os.path.join(ARCHIVE_PATH, "bars_30s")) if ARCHIVE_PATH else None
+    minute_archive = BarArchive(os.path.join(ARCHIVE_PATH, "bars_1min")) if ARCHIVE_PATH else None
+    archive_writers = [ArchiveWriter(archive) for archive in (tick_archive, bar_archive, minute_archive) if archive]
+    tick_writer, bar_writer, minute_writer = archive_writers or (None, None, None)
+    if STREAM_SHARDS > 1:
+        # Symbols spread over several connections, merged back into one ordered feed
+        websocket_handler = ShardedWebSocketHandler(credential_service=credentials, archive=tick_writer)
+    else:
+        websocket_handler = WebSocketHandler(archive=tick_writer)
     data_aggregator = DataAggregator()
-    indicators = Indicators()
-    trading_logic = TradingLogic()
-
-    try:
-        # Connect to WebSocket
-        await websocket_handler.connect()
+    if bar_writer:
+        # Keep every 30-second bar on disk as well as the raw trades
+        data_aggregator.add_bar_listener(bar_writer.append_bar)
+    # Only recent bars stay in memory; 30-second bars are already archived as they
+    # close, and 1-minute bars are archived as they are dropped
+    indicators = Indicators(websocket_handler=websocket_handler,
+                            spill=minute_writer.append_bars if minute_writer else None)
+    order_entry = OrderEntry()
+    # Order requests are rate limited, with stale modifies coalesced before they go out
+    order_dispatcher = OrderDispatcher(AsyncOrderGateway(order_entry))
+    # Order and position state comes from the broker's order events on the stream,
+    # so the strategy knows what filled without a REST request per order
+    order_book = OrderBook()
+    websocket_handler.add_order_listener(order_book.apply)
+    trading_logic = TradingLogic(indicators=indicators, order_entry=order_entry, order_gateway=order_dispatcher,
+                                 order_book=order_book)
 
-        print("WebSocket connected. Streaming live data...")
-        while True:
-            # Retrieve live tick data
-            live_data = websocket_handler.live_data.copy()
+    # New ticks flow through aggregation, indicators and strategy as they arrive
+    pipeline = TradingPipeline(websocket_handler, data_aggregator, trading_logic)
 
-            # If new tick data exists, process it
-            if not live_data.empty:
-                # Aggregate tick data into 30-second bars
-                data_aggregator.aggregate(live_data)
+    # Restart from the last checkpoint, replaying the ticks archived since it was taken
+    checkpointer = None
+    if CHECKPOINT_PATH:
+        checkpointer = Checkpointer(CHECKPOINT_PATH, data_aggregator, indicators, trading_logic, tick_archive)
+        checkpointer.restore()
 
-                # Retrieve 30-second bars
-                bars_30s = data_aggregator.get_aggregated_bars()
+    # Warm start: archived bars from earlier runs seed the moving averages of symbols
+    # the checkpoint did not cover, and the historical trades sent on subscription top
+    # them up before live ticks are processed
+    if bar_archive:
+        bar_writer.flush()  # Bars of the replayed ticks are on disk before the archive is read
+        pipeline.backfill.seed_archive(bar_archive, SYMBOLS.values())
 
-                # Process indicators and make trading decisions
-                trading_logic.process_data_and_trade(bars_30s)
+    # Tick-to-order latency per stage: exported periodically and dumped on SIGUSR1
+    latency = get_latency_recorder()
+    if LATENCY_EXPORT_INTERVAL:
+        latency.start_export(LATENCY_EXPORT_INTERVAL, LATENCY_EXPORT_PATH)
+    memory_reports = None
+    if MEMORY_REPORT_INTERVAL:
+        memory_reports = asyncio.create_task(report_memory_periodically(
+            MEMORY_REPORT_INTERVAL, stream=websocket_handler, aggregator=data_aggregator, indicators=indicators,
+        ))
+    order_polls = None
+    if ORDER_POLL_INTERVAL:
+        # Bulk poll of orders and positions whenever the stream has gone quiet
+        order_polls = asyncio.create_task(order_book.poll_periodically(order_dispatcher, ORDER_POLL_INTERVAL))
+    checkpoints = None
+    if checkpointer is not None and CHECKPOINT_INTERVAL:
+        checkpoints = asyncio.create_task(checkpointer.save_periodically(CHECKPOINT_INTERVAL))
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, latency.dump)
+    except (AttributeError, NotImplementedError):
+        pass  # No SIGUSR1 on this platform
 
-            await asyncio.sleep(1)  # Avoid overloading the event loop
+    try:
+        log.info("Connecting to WebSocket and streaming live data...")
+        await pipeline.run()
 
-    except KeyboardInterrupt:
-        print("\nShutting down the trading application...")
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        log.info("Shutting down the trading application...")
 
     finally:
         # Ensure WebSocket connection is closed
         await websocket_handler.close_connection()
-        print("Application stopped.")
+        if order_polls is not None:
+            order_polls.cancel()
+        order_dispatcher.close()
+        if memory_reports is not None:
+            memory_reports.cancel()
+        if checkpoints is not None:
+            checkpoints.cancel()
+        if checkpointer is not None:
+            checkpointer.save()
+        credentials.stop_refresh()
+        for writer in archive_writers:
+            writer.close()
+        await latency.stop_export()
+        latency.dump(LATENCY_EXPORT_PATH)
+        log.info("Pipeline stats", extra={"data": pipeline.stats()})
+        log.info("Application stopped.")
+        shutdown_logging()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,487 @@
+"""
+Local stand-in for the Ironbeam API used for offline tests and load benchmarks.
+
+It serves the REST endpoints the app calls (/auth, /stream/create, /orders and
+order cancel/modify/status, bulk /orders and /positions) and the
+/stream/{streamId} WebSocket with the trade subscription protocol sent by
+WebSocketHandler.subscribe_trades. Synthetic or recorded ticks are played at a
+configurable rate, and connections subscribed to orders receive order, fill
+and position events.
+
+Run standalone, then point the app at it:
+    python -m trading_app.mock_exchange --rate 5000
+"""
+
+import json
+import time
+import asyncio
+import argparse
+import itertools
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import pandas as pd
+import websockets
+from websockets.asyncio.server import serve
+from trading_app.utils.logger import configure_logging, get_logger
+
+log = get_logger("exchange")
+
+
+class SyntheticTicks:
+    def __init__(self, symbol, start_price=21000.0, tick_size=0.25, start="2024-12-03T14:30:00",
+                 interval_ns=100_000_000, seed=0):
+        """
+        Random-walk trade generator for one symbol.
+        :param symbol: Symbol written into each trade.
+        :param start_price: First trade price.
+        :param tick_size: Price increment.
+        :param start: Timestamp of the first trade.
+        :param interval_ns: Simulated time between trades in nanoseconds.
+        :param seed: Random seed, so runs are reproducible.
+        """
+        self.symbol = symbol
+        self.price = start_price
+        self.tick_size = tick_size
+        self.timestamp = pd.Timestamp(start).value
+        self.interval_ns = interval_ns
+        self.rng = np.random.default_rng(seed)
+
+    def next_trades(self, count):
+        """
+        Generate the next `count` trades.
+        :return: List of trade dictionaries.
+        """
+        steps = self.rng.choice([-1, 0, 1], size=count) * self.tick_size
+        volumes = self.rng.integers(1, 10, size=count)
+        trades = []
+        for step, volume in zip(steps.tolist(), volumes.tolist()):
+            self.price += step
+            self.timestamp += self.interval_ns
+            trades.append({"symbol": self.symbol, "price": self.price, "volume": volume, "timestamp": self.timestamp})
+        return trades
+
+
+class RecordedTicks:
+    def __init__(self, trades):
+        """
+        Replays recorded trades in order, looping with timestamps shifted forward.
+        :param trades: List of trade dictionaries for one symbol.
+        """
+        if not trades:
+            raise ValueError("No recorded trades to replay")
+        self.trades = trades
+        self.position = 0
+        self.offset = 0
+        first = pd.Timestamp(trades[0]["timestamp"]).value
+        last = pd.Timestamp(trades[-1]["timestamp"]).value
+        self.span = max(last - first, 0) + 1
+
+    def next_trades(self, count):
+        trades = []
+        for _ in range(count):
+            trade = dict(self.trades[self.position])
+            trade["timestamp"] = pd.Timestamp(trade["timestamp"]).value + self.offset
+            trade.pop("is_historical", None)
+            trades.append(trade)
+            self.position += 1
+            if self.position == len(self.trades):
+                self.position = 0
+                self.offset += self.span
+        return trades
+
+
+def load_recorded_trades(path):
+    """
+    Load trades from a file of recorded frames (one JSON frame per line).
+    :return: Dictionary of {symbol: [trade, ...]}.
+    """
+    trades = {}
+    with open(path) as frames_file:
+        for line in frames_file:
+            if line.strip():
+                for trade in json.loads(line).get("trades", []):
+                    trades.setdefault(trade.get("symbol"), []).append(trade)
+    return trades
+
+
+class MockExchange:
+    def __init__(self, rate=1000.0, trades_per_frame=10, historical_ticks=0, max_ticks=None,
+                 recorded_trades=None, order_latency=0.0, host="127.0.0.1", rest_port=0, ws_port=0, seed=0):
+        """
+        :param rate: Live ticks per second on each connection (0 for as fast as possible).
+        :param trades_per_frame: Trades sent in each WebSocket frame.
+        :param historical_ticks: Trades flagged is_historical sent per symbol on subscribe
+                                 when the "historical" flag is requested.
+        :param max_ticks: Stop sending live ticks on a connection after this many.
+        :param recorded_trades: Optional {symbol: [trade, ...]} to replay instead of synthetic ticks.
+        :param order_latency: Seconds each order request takes.
+        :param host: Interface to listen on.
+        :param rest_port: REST port (0 picks a free port).
+        :param ws_port: WebSocket port (0 picks a free port).
+        :param seed: Seed for synthetic ticks.
+        """
+        self.rate = rate
+        self.trades_per_frame = trades_per_frame
+        self.historical_ticks = historical_ticks
+        self.max_ticks = max_ticks
+        self.recorded_trades = recorded_trades or {}
+        self.order_latency = order_latency
+        self.host = host
+        self.rest_port = rest_port
+        self.ws_port = ws_port
+        self.seed = seed
+
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.tokens = set()
+        self.stream_ids = set()
+        self.orders = {}  # {orderId: order}
+        self.positions = {}  # {symbol: signed quantity}
+        self.last_prices = {}  # {symbol: last traded price}
+        self.requests = []  # (method, path) of every REST request
+        self.subscriptions = []  # Subscription messages received over WebSockets
+        self.ticks_sent = 0
+        self.connections = set()
+        self.order_streams = set()  # Connections subscribed to order events
+
+        self.rest_server = None
+        self.loop = None
+        self.ws_server = None
+        self.threads = []
+
+    @property
+    def api_url(self):
+        return f"http://{self.host}:{self.rest_port}/v2"
+
+    @property
+    def stream_url(self):
+        return f"ws://{self.host}:{self.ws_port}/v2"
+
+    def tick_source(self, symbol):
+        """
+        Create the tick source for a newly subscribed symbol.
+        """
+        if symbol in self.recorded_trades:
+            return RecordedTicks(self.recorded_trades[symbol])
+        return SyntheticTicks(symbol, seed=self.seed + next(self.ids))
+
+    def start(self):
+        """
+        Start the REST and WebSocket servers on background threads.
+        :return: self
+        """
+        self.rest_server = ThreadingHTTPServer((self.host, self.rest_port), _rest_handler(self))
+        self.rest_server.daemon_threads = True
+        self.rest_port = self.rest_server.server_address[1]
+        rest_thread = threading.Thread(target=self.rest_server.serve_forever, name="mock-rest", daemon=True)
+
+        ready = threading.Event()
+        ws_thread = threading.Thread(target=self._run_loop, args=(ready,), name="mock-stream", daemon=True)
+        self.threads = [rest_thread, ws_thread]
+        for thread in self.threads:
+            thread.start()
+        ready.wait()
+        log.info("Mock exchange running: API %s, stream %s", self.api_url, self.stream_url)
+        return self
+
+    def stop(self):
+        """
+        Stop both servers and close open WebSocket connections.
+        """
+        if self.rest_server is not None:
+            self.rest_server.shutdown()
+            self.rest_server.server_close()
+            self.rest_server = None
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.ws_server.close)
+            for thread in self.threads:
+                thread.join(timeout=5)
+            self.loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run_loop(self, ready):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        async def run():
+            self.ws_server = await serve(self._stream, self.host, self.ws_port, process_request=self._authorize_stream)
+            self.ws_port = self.ws_server.sockets[0].getsockname()[1]
+            ready.set()
+            await self.ws_server.wait_closed()
+
+        try:
+            self.loop.run_until_complete(run())
+        finally:
+            self.loop.close()
+
+    def _new_id(self, prefix):
+        return f"{prefix}-{next(self.ids)}"
+
+    def authenticate(self, credentials):
+        token = self._new_id("token")
+        with self.lock:
+            self.tokens.add(token)
+        return token
+
+    def create_stream(self, token):
+        if token not in self.tokens:
+            return None
+        stream_id = self._new_id("stream")
+        with self.lock:
+            self.stream_ids.add(stream_id)
+        return stream_id
+
+    def place_order(self, payload):
+        """
+        Accept an order; market orders fill immediately at the last traded price.
+        """
+        order_id = self._new_id("order")
+        symbol = payload.get("symbol")
+        order = dict(payload, orderId=order_id, status="WORKING", filledQuantity=0, avgFillPrice=None)
+        fill = None
+        with self.lock:
+            if payload.get("orderType") == "MARKET":
+                quantity = payload.get("quantity")
+                order.update(status="FILLED", filledQuantity=quantity, avgFillPrice=self.last_prices.get(symbol))
+                fill = {"fillId": self._new_id("fill"), "orderId": order_id, "symbol": symbol,
+                        "side": payload.get("side"), "quantity": quantity, "price": order["avgFillPrice"]}
+                signed = quantity if payload.get("side") == "BUY" else -quantity
+                self.positions[symbol] = self.positions.get(symbol, 0) + signed
+            self.orders[order_id] = order
+        self.publish_order_event(order, fill)
+        return order
+
+    def position_list(self):
+        """
+        Open positions in the format of the /positions endpoint.
+        """
+        with self.lock:
+            return [{"symbol": symbol, "quantity": quantity} for symbol, quantity in self.positions.items() if quantity]
+
+    def publish_order_event(self, order, fill=None):
+        """
+        Send an order update (and its fill and the new position) to connections
+        subscribed to order events. Called from REST handler threads.
+        """
+        if self.loop is None or not self.order_streams:
+            return
+        message = {"orders": [order]}
+        if fill is not None:
+            message["fills"] = [fill]
+            message["positions"] = [{"symbol": fill["symbol"], "quantity": self.positions.get(fill["symbol"], 0)}]
+        frame = json.dumps(message)
+        for connection in list(self.order_streams):
+            asyncio.run_coroutine_threadsafe(connection.send(frame), self.loop)
+
+    def cancel_order(self, order_id):
+        with self.lock:
+            order = self.orders.get(order_id)
+            if order is not None and order["status"] == "WORKING":
+                order["status"] = "CANCELLED"
+        if order is not None:
+            self.publish_order_event(order)
+        return order
+
+    def modify_order(self, order_id, payload):
+        with self.lock:
+            order = self.orders.get(order_id)
+            if order is not None and order["status"] == "WORKING":
+                if payload.get("newPrice") is not None:
+                    order["price"] = payload["newPrice"]
+                if payload.get("newQuantity") is not None:
+                    order["quantity"] = payload["newQuantity"]
+        if order is not None:
+            self.publish_order_event(order)
+        return order
+
+    def _authorize_stream(self, connection, request):
+        url = urlsplit(request.path)
+        stream_id = url.path.rstrip("/").rsplit("/", 1)[-1]
+        token = parse_qs(url.query).get("token", [None])[0]
+        if stream_id not in self.stream_ids or token not in self.tokens:
+            return connection.respond(HTTPStatus.UNAUTHORIZED, "Invalid streamId or token\n")
+        return None
+
+    async def _stream(self, connection):
+        """
+        Serve one WebSocket connection: read subscriptions, play ticks.
+        """
+        sources = {}  # {symbol: tick source}
+        self.connections.add(connection)
+        player = asyncio.create_task(self._play(connection, sources))
+        try:
+            async for message in connection:
+                request = json.loads(message)
+                self.subscriptions.append(request)
+                symbols = request.get("symbols") or [request.get("symbol")]
+                if request.get("action") == "subscribe" and request.get("type") == "trades":
+                    for symbol in symbols:
+                        if symbol in sources:
+                            continue
+                        source = self.tick_source(symbol)
+                        if self.historical_ticks and "historical" in request.get("flags", []):
+                            history = source.next_trades(self.historical_ticks)
+                            for trade in history:
+                                trade["is_historical"] = True
+                            await connection.send(json.dumps({"trades": history}))
+                        sources[symbol] = source
+                elif request.get("action") == "subscribe" and request.get("type") == "orders":
+                    self.order_streams.add(connection)
+                elif request.get("action") == "unsubscribe":
+                    for symbol in symbols:
+                        sources.pop(symbol, None)
+        except websockets.ConnectionClosed:
+            pass
+        except Exception:
+            log.exception("Mock exchange stream handler failed")
+        finally:
+            player.cancel()
+            self.connections.discard(connection)
+            self.order_streams.discard(connection)
+
+    async def _play(self, connection, sources):
+        """
+        Send live trade frames for the subscribed symbols at the configured rate.
+        """
+        sent = 0
+        interval = self.trades_per_frame / self.rate if self.rate else 0
+        next_send = time.monotonic()
+        while self.max_ticks is None or sent < self.max_ticks:
+            if not sources:
+                await asyncio.sleep(0.01)
+                next_send = time.monotonic()
+                continue
+
+            count = self.trades_per_frame
+            if self.max_ticks is not None:
+                count = min(count, self.max_ticks - sent)
+            trades = []
+            for source in itertools.islice(itertools.cycle(list(sources.values())), count):
+                trades.extend(source.next_trades(1))
+            for trade in trades:
+                self.last_prices[trade["symbol"]] = trade["price"]
+
+            await connection.send(json.dumps({"trades": trades}))
+            sent += len(trades)
+            self.ticks_sent += len(trades)
+
+            if interval:
+                next_send += interval
+                await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+            else:
+                await asyncio.sleep(0)
+
+
+def _rest_handler(exchange):
+    """
+    Build the HTTP request handler class bound to an exchange.
+    """
+    prefix = "/v2"
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        def _token(self):
+            header = self.headers.get("Authorization", "")
+            return header[len("Bearer "):] if header.startswith("Bearer ") else None
+
+        def _route(self, method):
+            path = urlsplit(self.path).path
+            exchange.requests.append((method, path))
+            if not path.startswith(prefix):
+                return self._reply(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            parts = path[len(prefix):].strip("/").split("/")
+            body = self._body() if method in ("POST", "PUT") else {}
+
+            if method == "POST" and parts == ["auth"]:
+                return self._reply(HTTPStatus.OK, {"token": exchange.authenticate(body)})
+            if self._token() not in exchange.tokens:
+                return self._reply(HTTPStatus.UNAUTHORIZED, {"error": "invalid token"})
+            if method == "GET" and parts == ["stream", "create"]:
+                return self._reply(HTTPStatus.OK, {"streamId": exchange.create_stream(self._token())})
+
+            if method == "GET" and parts == ["positions"]:
+                return self._reply(HTTPStatus.OK, {"positions": exchange.position_list()})
+            if parts[0] == "orders":
+                if exchange.order_latency:
+                    time.sleep(exchange.order_latency)
+                if method == "GET" and len(parts) == 1:
+                    return self._reply(HTTPStatus.OK, {"orders": list(exchange.orders.values())})
+                if method == "POST" and len(parts) == 1:
+                    return self._reply(HTTPStatus.OK, exchange.place_order(body))
+                order = None
+                if method == "POST" and len(parts) == 3 and parts[2] == "cancel":
+                    order = exchange.cancel_order(parts[1])
+                elif method == "PUT" and len(parts) == 3 and parts[2] == "modify":
+                    order = exchange.modify_order(parts[1], body)
+                elif method == "GET" and len(parts) == 2:
+                    order = exchange.orders.get(parts[1])
+                if order is not None:
+                    return self._reply(HTTPStatus.OK, order)
+            return self._reply(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+        def do_PUT(self):
+            self._route("PUT")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=1000.0, help="Live ticks per second per connection (0 = unthrottled)")
+    parser.add_argument("--trades-per-frame", type=int, default=10)
+    parser.add_argument("--historical", type=int, default=0, help="Historical ticks sent per symbol on subscribe")
+    parser.add_argument("--recorded", help="File of recorded frames to replay, one JSON frame per line")
+    parser.add_argument("--order-latency", type=float, default=0.0, help="Seconds added to each order request")
+    parser.add_argument("--rest-port", type=int, default=8080)
+    parser.add_argument("--ws-port", type=int, default=8081)
+    args = parser.parse_args()
+
+    configure_logging()
+    exchange = MockExchange(
+        rate=args.rate,
+        trades_per_frame=args.trades_per_frame,
+        historical_ticks=args.historical,
+        recorded_trades=load_recorded_trades(args.recorded) if args.recorded else None,
+        order_latency=args.order_latency,
+        rest_port=args.rest_port,
+        ws_port=args.ws_port,
+    ).start()
+    print(f"export DEMO_API_URL={exchange.api_url} STREAM_URL={exchange.stream_url} USE_LIVE_ENV=False")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        exchange.stop()
+
+
+if __name__ == "__main__":
+    main()
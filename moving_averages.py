@@ -0,0 +1,129 @@
+import math
+import numpy as np
+from collections import defaultdict
+
+
+class RollingMean:
+    def __init__(self, window, min_periods=1):
+        """
+        Constant-time rolling mean over the last `window` values.
+        Matches pandas `Series.rolling(window, min_periods).mean()`: NaN values
+        occupy a slot in the window but are not counted as observations.
+        :param window: Number of values in the window.
+        :param min_periods: Observations required before a value is produced
+                            (None requires a full window).
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = np.zeros(window, dtype="float64")  # Ring of the values in the window
+        self.cursor = 0
+        self.filled = 0  # Slots used in the ring
+        self.nobs = 0  # Non-NaN values in the window
+        self.total = 0.0  # Running sum of the non-NaN values
+        self.since_resync = 0
+        self.value = math.nan
+
+    def update(self, value):
+        """
+        Push a new value into the window.
+        :param value: The newest observation.
+        :return: The updated rolling mean (NaN until min_periods is reached).
+        """
+        value = float(value)
+        if self.filled == self.window:
+            old = self.values[self.cursor]
+            if not math.isnan(old):
+                self.total -= old
+                self.nobs -= 1
+        else:
+            self.filled += 1
+
+        self.values[self.cursor] = value
+        self.cursor = (self.cursor + 1) % self.window
+        if not math.isnan(value):
+            self.total += value
+            self.nobs += 1
+
+        # Re-sum the window once per full turn so rounding error cannot accumulate
+        self.since_resync += 1
+        if self.since_resync >= self.window:
+            self.total = float(np.nansum(self.values[:self.filled]))
+            self.since_resync = 0
+
+        self.value = self.total / self.nobs if self.nobs >= max(self.min_periods, 1) else math.nan
+        return self.value
+
+    @property
+    def is_ready(self):
+        """
+        True once the window holds enough observations to produce a value.
+        """
+        return not math.isnan(self.value)
+
+    def snapshot(self):
+        """
+        The window's values and running totals, for a checkpoint.
+        """
+        return dict(vars(self), values=self.values.copy())
+
+    def restore(self, state):
+        """
+        Continue from a snapshot() of a mean with the same window.
+        """
+        if state["window"] != self.window:
+            raise ValueError(f"Snapshot window {state['window']} does not match {self.window}")
+        vars(self).update(state)
+        self.values = np.array(state["values"], dtype="float64")
+
+
+class MovingAverageEngine:
+    def __init__(self, windows, min_periods=1):
+        """
+        Streaming simple moving averages kept per symbol and window length.
+        :param windows: Iterable of window lengths (in bars).
+        :param min_periods: Observations required before a value is produced
+                            (None requires each window to be full).
+        """
+        self.windows = tuple(windows)
+        self.min_periods = min_periods
+        self.averages = defaultdict(self._new_averages)  # {symbol: {window: RollingMean}}
+
+    def _new_averages(self):
+        return {window: RollingMean(window, self.min_periods) for window in self.windows}
+
+    def update(self, symbol, close):
+        """
+        Update every window for a symbol with a newly closed bar.
+        :param symbol: The symbol the bar belongs to.
+        :param close: The bar's close price.
+        :return: Dictionary of {window: moving average}.
+        """
+        return {window: average.update(close) for window, average in self.averages[symbol].items()}
+
+    def latest(self, symbol):
+        """
+        Get the latest moving averages for a symbol.
+        :return: Dictionary of {window: moving average}.
+        """
+        return {window: average.value for window, average in self.averages[symbol].items()}
+
+    def snapshot(self):
+        """
+        Every symbol's rolling means, for a checkpoint.
+        :return: {symbol: {window: RollingMean state}}.
+        """
+        return {
+            symbol: {window: average.snapshot() for window, average in averages.items()}
+            for symbol, averages in self.averages.items()
+        }
+
+    def restore(self, state):
+        """
+        Replace every symbol's rolling means with those of a snapshot().
+        """
+        self.averages.clear()
+        for symbol, averages in state.items():
+            for window, average in self.averages[symbol].items():
+                average.restore(averages[window])
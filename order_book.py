@@ -0,0 +1,300 @@
+"""
+In-memory order and position book.
+
+OrderEntry.get_order_status is a blocking REST request per order, so the
+strategy cannot ask it whether an order has filled without stalling. The book
+keeps the state of every order and the net position of every symbol, fed by
+the order, fill and position events the broker sends over the stream
+connection, or by a bulk poll of /orders and /positions when the stream has
+been quiet. Lookups by order id and by symbol are dictionary reads.
+
+Order events carry the order's cumulative filled quantity, so applying the
+same event twice (once from the stream, once from a poll) moves the position
+only once. Fill events are applied once per fillId, and an order's filled
+quantity is the larger of what its fills add up to and the latest cumulative
+quantity of its order events, so a fill reported both ways counts once
+whichever arrives first.
+"""
+
+import time
+import asyncio
+from trading_app.constants import ORDER_POLL_INTERVAL, ORDER_RETENTION
+from trading_app.utils.logger import get_logger
+
+log = get_logger("orders")
+
+# Order states after which an order no longer changes
+CLOSED_STATUSES = frozenset(("FILLED", "CANCELLED", "CANCELED", "REJECTED", "EXPIRED"))
+
+
+def _items(response, key):
+    """
+    The list under `key` of a bulk response, which may also be the bare list.
+    """
+    if isinstance(response, dict):
+        return response.get(key) or []
+    return response or []
+
+
+def _signed_quantity(position):
+    """
+    Quantity of a position event: signed, or unsigned with a "side" of LONG or SHORT.
+    """
+    quantity = position.get("quantity") or 0
+    if position.get("side") in ("SHORT", "SELL"):
+        quantity = -abs(quantity)
+    return quantity
+
+
+class OrderBook:
+    def __init__(self, retention=ORDER_RETENTION, clock=time.monotonic):
+        """
+        :param retention: Closed orders kept for lookups; older ones are forgotten.
+        :param clock: Clock timing the last event, to tell when the stream has gone quiet.
+        """
+        self.orders = {}  # {order_id: order dictionary as sent by the broker}
+        self.open_orders = {}  # {symbol: {order_id: order}} of orders still working
+        self.positions = {}  # {symbol: signed quantity}; flat symbols are absent
+        self.sides = {}  # {symbol: 'LONG' or 'SHORT'}; flat symbols are absent
+        self.average_prices = {}  # {symbol: average entry price of the position}
+        self.fill_ids = {}  # {order_id: set of applied fillIds}
+        self.fill_totals = {}  # {order_id: quantity of the fill events applied}
+        self.closed = {}  # Closed order ids, oldest first
+        self.retention = retention
+        self.clock = clock
+        self.last_event = None  # Clock time of the last event received
+        self.events = 0
+        self.polls = 0
+
+    def get(self, order_id):
+        """
+        The order with this id, or None if it is unknown.
+        """
+        return self.orders.get(order_id)
+
+    def working_orders(self, symbol):
+        """
+        Orders of a symbol that are still working, by order id.
+        """
+        return self.open_orders.get(symbol, {})
+
+    def position(self, symbol):
+        """
+        Net position of a symbol: positive when long, negative when short, 0 when flat.
+        """
+        return self.positions.get(symbol, 0)
+
+    def side(self, symbol):
+        """
+        'LONG', 'SHORT' or None when flat.
+        """
+        return self.sides.get(symbol)
+
+    def apply(self, message):
+        """
+        Apply a stream message holding "orders", "fills" and/or "positions" lists.
+        """
+        for order in message.get("orders") or ():
+            self.on_order(order)
+        for fill in message.get("fills") or ():
+            self.on_fill(fill)
+        for position in message.get("positions") or ():
+            self.on_position(position)
+
+    def add_submitted(self, ack, request):
+        """
+        Record an order acknowledged by the REST API, unless the stream already
+        reported it: the acknowledgement may arrive after later events.
+        :param ack: Response of the order request (with the orderId).
+        :param request: Symbol, side, quantity and order type that were sent.
+        """
+        order_id = ack.get("orderId") if isinstance(ack, dict) else None
+        if order_id is None:
+            return
+        if order_id in self.orders:
+            order = self.orders[order_id]
+            for name, value in request.items():
+                order.setdefault(name, value)
+            return
+        self.on_order({**request, **ack}, streamed=False)
+
+    def on_order(self, update, streamed=True):
+        """
+        Apply an order event: status, prices and the cumulative filled quantity.
+        :param streamed: False for orders from a poll or an acknowledgement, which
+                         do not count as stream activity.
+        """
+        order_id = update.get("orderId")
+        if order_id is None:
+            return
+        if streamed:
+            self._received()
+        order = self.orders.get(order_id)
+        if order is None:
+            order = self.orders[order_id] = {"filledQuantity": 0}
+        previous_filled, previous_price = order["filledQuantity"], order.get("avgFillPrice")
+        for name, value in update.items():
+            if value is not None and name != "filledQuantity":
+                order[name] = value
+        filled = update.get("filledQuantity")
+        if filled is not None and filled > previous_filled:
+            # Price of the newly filled part, from the change in the average fill price
+            average = order.get("avgFillPrice")
+            price = average
+            if average is not None and previous_price is not None and previous_filled:
+                price = (average * filled - previous_price * previous_filled) / (filled - previous_filled)
+            self._fill(order, filled, price)
+        self._index(order)
+
+    def on_fill(self, fill):
+        """
+        Apply a fill event (applied once per fillId).
+        """
+        order_id = fill.get("orderId")
+        if order_id is None:
+            return
+        self._received()
+        seen = self.fill_ids.setdefault(order_id, set())
+        fill_id = fill.get("fillId")
+        if fill_id is not None:
+            if fill_id in seen:
+                return
+            seen.add(fill_id)
+        order = self.orders.get(order_id)
+        if order is None:
+            order = self.orders[order_id] = {"orderId": order_id, "filledQuantity": 0, "status": "WORKING"}
+        for name in ("symbol", "side"):
+            if fill.get(name) is not None:
+                order.setdefault(name, fill[name])
+        total = self.fill_totals[order_id] = self.fill_totals.get(order_id, 0) + fill.get("quantity", 0)
+        # The order event reporting this fill may already have been applied
+        filled = max(order["filledQuantity"], total)
+        if order.get("quantity") is not None:
+            filled = min(filled, order["quantity"])
+        price, previous_filled = fill.get("price"), order["filledQuantity"]
+        if price is not None and filled > previous_filled:
+            # Keep the order's average fill price, as its order events report it
+            previous_price = order.get("avgFillPrice")
+            order["avgFillPrice"] = price if previous_price is None or not previous_filled else (
+                (previous_price * previous_filled + price * (filled - previous_filled)) / filled)
+        self._fill(order, filled, price)
+        if order.get("quantity") is not None and order["filledQuantity"] >= order["quantity"]:
+            order["status"] = "FILLED"
+        self._index(order)
+
+    def on_position(self, position):
+        """
+        Apply a position event, which replaces what the fills added up to.
+        """
+        symbol = position.get("symbol")
+        if symbol is None:
+            return
+        self._received()
+        self._set_position(symbol, _signed_quantity(position), position.get("avgPrice"))
+
+    def sync(self, orders, positions):
+        """
+        Bring the book up to date with a bulk poll. Symbols missing from the
+        positions are flat.
+        """
+        for order in orders:
+            self.on_order(order, streamed=False)
+        held = {position.get("symbol"): (_signed_quantity(position), position.get("avgPrice"))
+                for position in positions}
+        for symbol in list(self.positions):
+            if symbol not in held:
+                self._set_position(symbol, 0, None)
+        for symbol, (quantity, price) in held.items():
+            self._set_position(symbol, quantity, price)
+        self.polls += 1
+
+    async def refresh(self, gateway):
+        """
+        Poll every order and position in two bulk requests.
+        :param gateway: AsyncOrderGateway or OrderDispatcher to send them through.
+        """
+        orders = await gateway.get_orders()
+        positions = await gateway.get_positions()
+        self.sync(_items(orders, "orders"), _items(positions, "positions"))
+
+    async def poll_periodically(self, gateway, interval=ORDER_POLL_INTERVAL):
+        """
+        Poll in bulk whenever the stream has sent no order event for `interval` seconds.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            if self.last_event is not None and self.clock() - self.last_event < interval:
+                continue
+            try:
+                await self.refresh(gateway)
+            except Exception as e:
+                log.warning("Order book poll failed: %s", e)
+
+    def stats(self):
+        """
+        Orders known and working, events received and polls made.
+        """
+        return {
+            "orders": len(self.orders),
+            "working": sum(len(orders) for orders in self.open_orders.values()),
+            "positions": dict(self.positions),
+            "events": self.events,
+            "polls": self.polls,
+        }
+
+    def _received(self):
+        self.events += 1
+        self.last_event = self.clock()
+
+    def _fill(self, order, filled, price):
+        """
+        Raise an order's filled quantity and move its symbol's position by the difference.
+        """
+        quantity = filled - order["filledQuantity"]
+        if quantity <= 0 or order.get("symbol") is None:
+            return
+        order["filledQuantity"] = filled
+        signed = quantity if order.get("side") == "BUY" else -quantity
+        current = self.positions.get(order["symbol"], 0)
+        target = current + signed
+        average = self.average_prices.get(order["symbol"])
+        if price is not None and (current == 0 or (current > 0) != (target > 0)):
+            average = price  # New position, or one that flipped side
+        elif price is not None and abs(target) > abs(current):
+            average = ((average or price) * abs(current) + price * quantity) / abs(target)
+        self._set_position(order["symbol"], target, average)
+
+    def _set_position(self, symbol, quantity, price):
+        if quantity == 0:
+            self.positions.pop(symbol, None)
+            self.sides.pop(symbol, None)
+            self.average_prices.pop(symbol, None)
+            return
+        self.positions[symbol] = quantity
+        self.sides[symbol] = "LONG" if quantity > 0 else "SHORT"
+        if price is not None:
+            self.average_prices[symbol] = price
+
+    def _index(self, order):
+        """
+        Keep the per-symbol index of working orders and forget old closed orders.
+        """
+        order_id, symbol = order.get("orderId"), order.get("symbol")
+        if order.get("status") not in CLOSED_STATUSES:
+            if symbol is not None:
+                self.open_orders.setdefault(symbol, {})[order_id] = order
+            return
+        working = self.open_orders.get(symbol)
+        if working is not None:
+            working.pop(order_id, None)
+            if not working:
+                del self.open_orders[symbol]
+        if order_id in self.closed:
+            return
+        self.closed[order_id] = None
+        while self.retention and len(self.closed) > self.retention:
+            oldest = next(iter(self.closed))
+            del self.closed[oldest]
+            self.orders.pop(oldest, None)
+            self.fill_ids.pop(oldest, None)
+            self.fill_totals.pop(oldest, None)
@@ -0,0 +1,329 @@
+"""
+Rate-limited order dispatcher with coalescing of modifies and cancels.
+
+Order actions are queued by priority and sent through an AsyncOrderGateway no
+faster than a token bucket allows. While an action for an order is still
+queued, later actions for the same order are folded into it:
+
+- a modify merges into a queued modify, so only the latest price and
+  quantity go out,
+- a cancel replaces queued modifies, and a modify behind a queued cancel is
+  dropped,
+- actions for an order with a request in flight wait for it to finish, so the
+  broker sees them in order.
+
+Every caller is answered with the result of the request its action went out
+in. Protective stops and flattening orders go out before anything else, then
+cancels, then other orders.
+"""
+
+import time
+import heapq
+import asyncio
+import itertools
+from trading_app.order_gateway import AsyncOrderGateway
+from trading_app.constants import ORDER_RATE_LIMIT, ORDER_RATE_BURST
+from trading_app.utils.logger import get_logger
+
+log = get_logger("orders")
+
+# Dispatch priorities, most urgent first
+PRIORITY_PROTECTIVE = 0  # Protective stops and flattening orders
+PRIORITY_CANCEL = 1
+PRIORITY_NORMAL = 2
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        """
+        At most `rate` requests per second on average, bursts up to `burst`.
+        :param rate: Tokens added per second.
+        :param burst: Bucket size (the rate, at least 1, when omitted).
+        :param clock: Callable returning the time in seconds.
+        """
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, rate))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """
+        Seconds until a token is available (0 if one is available now).
+        """
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        """
+        Use one token if available.
+        :return: True if a token was taken.
+        """
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class OrderAction:
+    def __init__(self, method, kwargs, priority, sequence, order_id=None):
+        """
+        One queued request and the callers waiting for its result.
+        :param method: Name of the AsyncOrderGateway method to call.
+        :param kwargs: Keyword arguments for the method.
+        :param priority: Dispatch priority (lower goes first).
+        :param sequence: Submission order, breaking ties within a priority.
+        :param order_id: Existing order the action applies to (None for new orders).
+        """
+        self.method = method
+        self.kwargs = kwargs
+        self.priority = priority
+        self.sequence = sequence
+        self.order_id = order_id
+        self.futures = []
+        self.state = "queued"  # "queued", "deferred" (behind an in-flight request) or "sent"
+
+
+class OrderDispatcher:
+    def __init__(self, gateway=None, rate=ORDER_RATE_LIMIT, burst=ORDER_RATE_BURST, clock=time.monotonic):
+        """
+        Queue in front of an AsyncOrderGateway with the same async interface, so
+        it can be passed to TradingLogic as its order_gateway.
+        :param gateway: AsyncOrderGateway to send through (created if omitted).
+        :param rate: Requests per second allowed by the broker.
+        :param burst: Requests that may be sent back to back.
+        :param clock: Clock of the token bucket.
+        """
+        self.gateway = gateway or AsyncOrderGateway()
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.heap = []  # (priority, sequence, action); entries of merged or sent actions are skipped
+        self.sequence = itertools.count()
+        self.queued = {}  # {order_id: action not yet sent}
+        self.deferred = {}  # {order_id: action waiting for the order's in-flight request}
+        self.in_flight = set()  # Order ids with a request in flight
+        self.tasks = set()
+        self.ready = asyncio.Event()
+        self.worker = None
+        self.sent = 0
+        self.coalesced = 0  # Actions folded into another queued action
+        self.throttled = 0  # Times the dispatcher waited for the rate limit
+
+    def _push(self, action):
+        action.state = "queued"
+        heapq.heappush(self.heap, (action.priority, action.sequence, action))
+        self.ready.set()
+
+    def submit(self, method, kwargs, priority=PRIORITY_NORMAL, order_id=None):
+        """
+        Queue a request, folding it into a queued action for the same order if there is one.
+        :param method: Name of the AsyncOrderGateway method to call.
+        :param kwargs: Keyword arguments for the method.
+        :param priority: Dispatch priority (lower goes first).
+        :param order_id: Order a modify or cancel applies to; actions for the same order are coalesced.
+        :return: Future resolved with the result of the request the action went out in.
+        """
+        if self.worker is None:
+            self.worker = asyncio.get_running_loop().create_task(self.run(), name="order-dispatcher")
+        future = asyncio.get_running_loop().create_future()
+        queued = self.queued.get(order_id) if order_id is not None else None
+        if queued is None:
+            action = OrderAction(method, kwargs, priority, next(self.sequence), order_id)
+            action.futures.append(future)
+            if order_id is not None:
+                self.queued[order_id] = action
+            self._push(action)
+            return future
+
+        self.coalesced += 1
+        queued.futures.append(future)
+        if method == "cancel_order":
+            # A cancel makes queued modifies pointless
+            queued.method, queued.kwargs = method, kwargs
+        elif method == "modify_order" and queued.method == "modify_order":
+            # Only the latest price and quantity go out
+            queued.kwargs.update({name: value for name, value in kwargs.items() if value is not None})
+        # A modify behind a queued cancel is dropped with it
+        if priority < queued.priority:
+            queued.priority = priority
+            if queued.state == "queued":
+                self._push(queued)
+        return future
+
+    def _pop(self):
+        """
+        Take the most urgent action that can be sent now, or None.
+        """
+        while self.heap:
+            priority, _, action = heapq.heappop(self.heap)
+            if action.state != "queued" or priority != action.priority:
+                continue  # Stale entry of a re-prioritized or already handled action
+            if action.order_id is not None and action.order_id in self.in_flight:
+                action.state = "deferred"
+                self.deferred[action.order_id] = action
+                continue
+            if action.order_id is not None:
+                del self.queued[action.order_id]
+            action.state = "sent"
+            return action
+        return None
+
+    async def run(self):
+        """
+        Send queued actions in priority order as the rate limit allows.
+        """
+        while True:
+            await self.ready.wait()
+            delay = self.bucket.delay()
+            if delay > 0:
+                # Wait for a token before choosing, so an urgent order queued meanwhile goes first
+                self.throttled += 1
+                await asyncio.sleep(delay)
+                continue
+            action = self._pop()
+            if action is None:
+                self.ready.clear()
+                continue
+            self.bucket.take()
+            if action.order_id is not None:
+                self.in_flight.add(action.order_id)
+            self.sent += 1
+            task = asyncio.create_task(self._send(action))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _send(self, action):
+        """
+        Send one action and answer every caller folded into it.
+        """
+        try:
+            result = await getattr(self.gateway, action.method)(**action.kwargs)
+        except Exception as e:
+            log.error("Order request %s failed: %s", action.method, e)
+            for future in action.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in action.futures:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            if action.order_id is not None:
+                self.in_flight.discard(action.order_id)
+                waiting = self.deferred.pop(action.order_id, None)
+                if waiting is not None:
+                    self._push(waiting)
+
+    async def place_market_order(self, symbol, quantity, side, priority=PRIORITY_NORMAL):
+        """
+        Place a market order. See OrderEntry.place_market_order.
+        """
+        return await self.submit("place_market_order", {"symbol": symbol, "quantity": quantity, "side": side}, priority)
+
+    async def place_limit_order(self, symbol, quantity, price, side, priority=PRIORITY_NORMAL):
+        """
+        Place a limit order. See OrderEntry.place_limit_order.
+        """
+        return await self.submit(
+            "place_limit_order", {"symbol": symbol, "quantity": quantity, "price": price, "side": side}, priority,
+        )
+
+    async def place_stop_order(self, symbol, quantity, stop_price, side, priority=PRIORITY_PROTECTIVE):
+        """
+        Place a stop order, by default as a protective stop that goes out first.
+        See OrderEntry.place_stop_order.
+        """
+        return await self.submit(
+            "place_stop_order", {"symbol": symbol, "quantity": quantity, "stop_price": stop_price, "side": side},
+            priority,
+        )
+
+    async def place_bracket_order(self, symbol, quantity, entry_price, stop_loss, take_profit, side,
+                                  order_type="LIMIT", priority=PRIORITY_NORMAL):
+        """
+        Place a bracket order. See OrderEntry.place_bracket_order.
+        """
+        return await self.submit("place_bracket_order", {
+            "symbol": symbol, "quantity": quantity, "entry_price": entry_price, "stop_loss": stop_loss,
+            "take_profit": take_profit, "side": side, "order_type": order_type,
+        }, priority)
+
+    async def flatten(self, symbol, quantity, side):
+        """
+        Close a position with a market order ahead of every other queued request.
+        :param side: "SELL" to flatten a long position, "BUY" to flatten a short one.
+        """
+        return await self.place_market_order(symbol, quantity, side, priority=PRIORITY_PROTECTIVE)
+
+    async def cancel_order(self, order_id, priority=PRIORITY_CANCEL):
+        """
+        Cancel an existing order, replacing any modify of it still queued.
+        See OrderEntry.cancel_order.
+        """
+        return await self.submit("cancel_order", {"order_id": order_id}, priority, order_id)
+
+    async def modify_order(self, order_id, new_price=None, new_quantity=None, priority=PRIORITY_NORMAL):
+        """
+        Modify an existing order, merged with any modify of it still queued.
+        Pass priority=PRIORITY_PROTECTIVE when moving a protective stop.
+        See OrderEntry.modify_order.
+        """
+        return await self.submit(
+            "modify_order", {"order_id": order_id, "new_price": new_price, "new_quantity": new_quantity}, priority,
+            order_id,
+        )
+
+    async def get_order_status(self, order_id):
+        """
+        Get the status of an existing order. See OrderEntry.get_order_status.
+        """
+        return await self.submit("get_order_status", {"order_id": order_id})
+
+    async def get_orders(self):
+        """
+        Get every order of the account. See OrderEntry.get_orders.
+        """
+        return await self.submit("get_orders", {})
+
+    async def get_positions(self):
+        """
+        Get every open position of the account. See OrderEntry.get_positions.
+        """
+        return await self.submit("get_positions", {})
+
+    def stats(self):
+        """
+        Requests sent, actions coalesced, rate-limit waits and actions still queued.
+        """
+        queued = {id(action) for _, _, action in self.heap if action.state == "queued"}
+        return {
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "throttled": self.throttled,
+            "queued": len(queued) + len(self.deferred),
+            "in_flight": len(self.tasks),
+        }
+
+    def close(self):
+        """
+        Stop dispatching, drop unsent actions and close the gateway.
+        """
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+        unsent = {id(action): action for _, _, action in self.heap if action.state == "queued"}
+        unsent.update((id(action), action) for action in self.deferred.values())
+        if unsent:
+            log.warning("Dropping %d unsent order requests", len(unsent))
+        for action in unsent.values():
+            for future in action.futures:
+                future.cancel()
+        self.heap.clear()
+        self.queued.clear()
+        self.deferred.clear()
+        self.gateway.close()
@@ -1,18 +1,55 @@
 import requests
 import logging
-from trading_app.constants import API_URL, ACCOUNT_ID
-from trading_app.auth import Authenticator
+from requests.adapters import HTTPAdapter
+from trading_app.constants import API_URL, ACCOUNT_ID, ORDER_POOL_SIZE, ORDER_TIMEOUT
+from trading_app.credential_service import get_credential_service
+
+
+def create_session(pool_size=ORDER_POOL_SIZE):
+    """
+    Create a requests Session with a pool of keep-alive connections.
+
+    :param pool_size: Number of connections kept open per host.
+    :return: requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
 class OrderEntry:
-    def __init__(self):
+    def __init__(self, authenticator=None, session=None, timeout=ORDER_TIMEOUT, api_url=API_URL):
         """
         Initializes the OrderEntry class with authentication and order endpoint details.
+
+        :param authenticator: Object with get_token() providing the bearer token
+                              (the shared credential service if omitted).
+        :param session: requests.Session to send orders on (a pooled one is created if omitted).
+        :param timeout: (connect, read) timeout in seconds for every request.
+        :param api_url: Base API URL.
+        """
+        self.authenticator = authenticator or get_credential_service()
+        self.base_url = f"{api_url}/orders"
+        self.positions_url = f"{api_url}/positions"
+        self.session = session or create_session()
+        self.timeout = timeout
+
+    @property
+    def headers(self):
+        """
+        Request headers carrying the current (cached) token.
+        """
+        return {"Authorization": f"Bearer {self.authenticator.get_token()}", "Content-Type": "application/json"}
+
+    def _send(self, method, url, payload=None):
+        """
+        Send a request on the shared session and return the decoded JSON response.
         """
-        self.authenticator = Authenticator()
-        self.token = self.authenticator.get_token()
-        self.headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
-        self.base_url = f"{API_URL}/orders"
+        response = self.session.request(method, url, json=payload, headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
 
     def place_market_order(self, symbol, quantity, side):
         """
@@ -32,10 +69,7 @@ class OrderEntry:
                 "timeInForce": "GTC"
             }
 
-            response = requests.post(self.base_url, json=payload, headers=self.headers)
-            response.raise_for_status()
-
-            order_data = response.json()
+            order_data = self._send("POST", self.base_url, payload)
             logging.info(f"Market order placed: {order_data}")
             return order_data
 
@@ -63,10 +97,7 @@ class OrderEntry:
                 "timeInForce": "GTC"
             }
 
-            response = requests.post(self.base_url, json=payload, headers=self.headers)
-            response.raise_for_status()
-
-            order_data = response.json()
+            order_data = self._send("POST", self.base_url, payload)
             logging.info(f"Limit order placed: {order_data}")
             return order_data
 
@@ -94,10 +125,7 @@ class OrderEntry:
                 "timeInForce": "GTC"
             }
 
-            response = requests.post(self.base_url, json=payload, headers=self.headers)
-            response.raise_for_status()
-
-            order_data = response.json()
+            order_data = self._send("POST", self.base_url, payload)
             logging.info(f"Stop order placed: {order_data}")
             return order_data
 
@@ -138,10 +166,7 @@ class OrderEntry:
                 }
             }
 
-            response = requests.post(self.base_url, json=payload, headers=self.headers)
-            response.raise_for_status()
-
-            order_data = response.json()
+            order_data = self._send("POST", self.base_url, payload)
             logging.info(f"Bracket order placed: {order_data}")
             return order_data
 
@@ -157,10 +182,7 @@ class OrderEntry:
         """
         try:
             cancel_url = f"{self.base_url}/{order_id}/cancel"
-            response = requests.post(cancel_url, headers=self.headers)
-            response.raise_for_status()
-
-            cancel_data = response.json()
+            cancel_data = self._send("POST", cancel_url)
             logging.info(f"Order canceled: {cancel_data}")
             return cancel_data
 
@@ -182,10 +204,7 @@ class OrderEntry:
                 "newQuantity": new_quantity
             }
             modify_url = f"{self.base_url}/{order_id}/modify"
-            response = requests.put(modify_url, json=payload, headers=self.headers)
-            response.raise_for_status()
-
-            modify_data = response.json()
+            modify_data = self._send("PUT", modify_url, payload)
             logging.info(f"Order modified: {modify_data}")
             return modify_data
 
@@ -201,13 +220,42 @@ class OrderEntry:
         """
         try:
             status_url = f"{self.base_url}/{order_id}"
-            response = requests.get(status_url, headers=self.headers)
-            response.raise_for_status()
-
-            status_data = response.json()
+            status_data = self._send("GET", status_url)
             logging.info(f"Order status retrieved: {status_data}")
             return status_data
 
         except requests.exceptions.RequestException as e:
             logging.error(f"Error retrieving order status: {e}")
             raise
+
+    def get_orders(self):
+        """
+        Get every order of the account in one request.
+        """
+        try:
+            orders_data = self._send("GET", f"{self.base_url}?accountId={ACCOUNT_ID}")
+            logging.debug(f"Orders retrieved: {orders_data}")
+            return orders_data
+
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error retrieving orders: {e}")
+            raise
+
+    def get_positions(self):
+        """
+        Get every open position of the account in one request.
+        """
+        try:
+            positions_data = self._send("GET", f"{self.positions_url}?accountId={ACCOUNT_ID}")
+            logging.debug(f"Positions retrieved: {positions_data}")
+            return positions_data
+
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error retrieving positions: {e}")
+            raise
+
+    def close(self):
+        """
+        Close the pooled connections.
+        """
+        self.session.close()
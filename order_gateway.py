@@ -0,0 +1,102 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from trading_app.constants import ORDER_POOL_SIZE
+from trading_app.order_entry import OrderEntry
+
+
+class AsyncOrderGateway:
+    def __init__(self, order_entry=None, max_in_flight=ORDER_POOL_SIZE):
+        """
+        Async front end for OrderEntry.
+        Requests run on a small worker pool sharing OrderEntry's keep-alive session,
+        so several order actions can be in flight without blocking the event loop.
+
+        :param order_entry: OrderEntry to send through (created if omitted).
+        :param max_in_flight: Maximum number of concurrent requests; should not
+                              exceed the session's connection pool size.
+        """
+        self.order_entry = order_entry or OrderEntry()
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="order-gateway")
+        self.in_flight = 0
+
+    async def _call(self, method, *args, **kwargs):
+        """
+        Run one OrderEntry method on the worker pool.
+        """
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(self.executor, functools.partial(method, *args, **kwargs))
+        finally:
+            self.in_flight -= 1
+
+    async def place_market_order(self, symbol, quantity, side):
+        """
+        Place a market order. See OrderEntry.place_market_order.
+        """
+        return await self._call(self.order_entry.place_market_order, symbol, quantity, side)
+
+    async def place_limit_order(self, symbol, quantity, price, side):
+        """
+        Place a limit order. See OrderEntry.place_limit_order.
+        """
+        return await self._call(self.order_entry.place_limit_order, symbol, quantity, price, side)
+
+    async def place_stop_order(self, symbol, quantity, stop_price, side):
+        """
+        Place a stop order. See OrderEntry.place_stop_order.
+        """
+        return await self._call(self.order_entry.place_stop_order, symbol, quantity, stop_price, side)
+
+    async def place_bracket_order(self, symbol, quantity, entry_price, stop_loss, take_profit, side, order_type="LIMIT"):
+        """
+        Place a bracket order. See OrderEntry.place_bracket_order.
+        """
+        return await self._call(
+            self.order_entry.place_bracket_order,
+            symbol=symbol,
+            quantity=quantity,
+            entry_price=entry_price,
+            stop_loss=stop_loss,
+            take_profit=take_profit,
+            side=side,
+            order_type=order_type,
+        )
+
+    async def cancel_order(self, order_id):
+        """
+        Cancel an existing order. See OrderEntry.cancel_order.
+        """
+        return await self._call(self.order_entry.cancel_order, order_id)
+
+    async def modify_order(self, order_id, new_price=None, new_quantity=None):
+        """
+        Modify an existing order. See OrderEntry.modify_order.
+        """
+        return await self._call(self.order_entry.modify_order, order_id, new_price=new_price, new_quantity=new_quantity)
+
+    async def get_order_status(self, order_id):
+        """
+        Get the status of an existing order. See OrderEntry.get_order_status.
+        """
+        return await self._call(self.order_entry.get_order_status, order_id)
+
+    async def get_orders(self):
+        """
+        Get every order of the account. See OrderEntry.get_orders.
+        """
+        return await self._call(self.order_entry.get_orders)
+
+    async def get_positions(self):
+        """
+        Get every open position of the account. See OrderEntry.get_positions.
+        """
+        return await self._call(self.order_entry.get_positions)
+
+    def close(self):
+        """
+        Wait for in-flight requests, then release the worker pool and connections.
+        """
+        self.executor.shutdown(wait=True)
+        self.order_entry.close()
@@ -0,0 +1,279 @@
+import asyncio
+import time
+from trading_app.constants import PIPELINE_QUEUE_SIZE
+from trading_app.decoders import TradeBatch
+from trading_app.backfill import Backfill
+from trading_app.latency import set_origin, reset_origin, stamp
+from trading_app.utils.logger import get_logger
+
+log = get_logger("pipeline")
+
+
+class Stage:
+    def __init__(self, name, handler, maxsize=PIPELINE_QUEUE_SIZE, label=None):
+        """
+        A pipeline stage: a bounded queue drained by one worker task.
+        Queue items are (origin, item) where origin is the time.monotonic() stamp
+        of the tick the item derives from; outputs keep their input's origin.
+        :param name: Name used in stats output.
+        :param handler: Callable taking one item and returning a list of outputs
+                        (or None). Coroutine functions are awaited.
+        :param maxsize: Maximum number of items waiting in the queue.
+        :param label: Key for this stage in pipeline stats (defaults to name).
+        """
+        self.name = name
+        self.label = label or name
+        self.handler = handler
+        self.queue = asyncio.Queue(maxsize)
+        self.downstream = []  # Stages (or routers) receiving this stage's outputs
+        self.processed = 0
+        self.last_lag = 0.0  # Seconds from the originating tick to end of processing for the last item
+        self.max_lag = 0.0
+        self.task = None
+
+    @property
+    def depth(self):
+        """
+        Number of items waiting to be processed.
+        """
+        return self.queue.qsize()
+
+    def connect(self, stage):
+        """
+        Send this stage's outputs to another stage, or to anything with an
+        async put(item, origin) method such as a SymbolRouter.
+        :return: The downstream stage, so calls can be chained.
+        """
+        self.downstream.append(stage)
+        return stage
+
+    async def put(self, item, origin=None):
+        """
+        Enqueue an item, waiting while the queue is full.
+        :param origin: time.monotonic() stamp of the originating tick (now if omitted).
+        """
+        await self.queue.put((time.monotonic() if origin is None else origin, item))
+
+    async def process(self, origin, item):
+        """
+        Run the handler on one item and forward its outputs downstream.
+        While the handler runs, latency stamps are measured from the item's origin.
+        """
+        token = set_origin(int(origin * 1e9))
+        try:
+            outputs = self.handler(item)
+            if asyncio.iscoroutine(outputs):
+                outputs = await outputs
+            stamp(self.name)
+        finally:
+            reset_origin(token)
+        self.processed += 1
+        self.last_lag = time.monotonic() - origin
+        self.max_lag = max(self.max_lag, self.last_lag)
+
+        for output in outputs or ():
+            for stage in self.downstream:
+                await stage.put(output, origin)
+
+    async def run(self):
+        """
+        Drain the queue forever.
+        """
+        while True:
+            origin, item = await self.queue.get()
+            try:
+                await self.process(origin, item)
+            except Exception as e:
+                log.exception("Error in pipeline stage %s: %s", self.name, e)
+            finally:
+                self.queue.task_done()
+
+    def start(self):
+        """
+        Start the worker task on the running event loop.
+        """
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(), name=f"stage-{self.name}")
+        return self.task
+
+    async def stop(self):
+        """
+        Cancel the worker task.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def stats(self):
+        """
+        Queue depth, processed count and tick-to-stage lag for this stage.
+        """
+        return {
+            "depth": self.depth,
+            "processed": self.processed,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+        }
+
+
+class SymbolRouter:
+    def __init__(self, build):
+        """
+        Send each item to a chain of stages owned by its symbol.
+        Chains are built and started on the first item of a symbol, so every
+        symbol has its own queues and workers, and a backlog on one symbol does
+        not hold up another.
+        :param build: Callable taking a symbol and returning its connected stages;
+                      the first stage receives the items.
+        """
+        self.build = build
+        self.chains = {}  # {symbol: [stage, ...]}
+
+    @property
+    def stages(self):
+        return [stage for chain in self.chains.values() for stage in chain]
+
+    async def put(self, item, origin=None):
+        symbol = item["symbol"]
+        chain = self.chains.get(symbol)
+        if chain is None:
+            chain = self.chains[symbol] = self.build(symbol)
+            for stage in chain:
+                stage.start()
+        await chain[0].put(item, origin)
+
+
+class TradingPipeline:
+    def __init__(self, websocket_handler, data_aggregator, trading_logic, maxsize=PIPELINE_QUEUE_SIZE):
+        """
+        Push pipeline: ticks -> 30-second bars -> 1-minute bars and indicators -> strategy.
+        Each stage only sees the deltas produced by the stage before it. Bars are
+        routed to per-symbol indicator and strategy stages.
+        :param websocket_handler: WebSocketHandler publishing live ticks.
+        :param data_aggregator: DataAggregator building 30-second bars.
+        :param trading_logic: TradingLogic whose indicators and strategy are driven.
+        :param maxsize: Queue bound for every stage.
+        """
+        self.websocket_handler = websocket_handler
+        self.data_aggregator = data_aggregator
+        self.trading_logic = trading_logic
+        self.indicators = trading_logic.indicators
+        self.backfill = Backfill(data_aggregator, self.indicators)
+        self.live_symbols = set()  # Symbols that have received live ticks
+
+        self.maxsize = maxsize
+        self.aggregator_stage = Stage("aggregator", self.aggregate_ticks, maxsize)
+        self.router = self.aggregator_stage.connect(SymbolRouter(self.symbol_stages))
+
+        # The tick queue is the aggregator stage's own queue. Historical trades go
+        # through the same queue, so a symbol's history is seeded before its live ticks
+        websocket_handler.add_tick_queue(self.aggregator_stage.queue)
+        websocket_handler.add_history_queue(self.aggregator_stage.queue)
+
+    @property
+    def stages(self):
+        """
+        The aggregator stage followed by every per-symbol stage.
+        """
+        return [self.aggregator_stage] + self.router.stages
+
+    def symbol_stages(self, symbol):
+        """
+        Build the indicator -> strategy chain for one symbol.
+        """
+        indicator_stage = Stage("indicators", self.update_indicators, self.maxsize, label=f"indicators[{symbol}]")
+        strategy_stage = Stage("strategy", self.run_strategy, self.maxsize, label=f"strategy[{symbol}]")
+        indicator_stage.connect(strategy_stage)
+        return [indicator_stage, strategy_stage]
+
+    def aggregate_ticks(self, ticks):
+        """
+        Add a batch of ticks to the aggregator.
+        :param ticks: List of tick dictionaries or a TradeBatch.
+        :return: The 30-second bars closed by the batch.
+        """
+        bars = []
+        if isinstance(ticks, TradeBatch):
+            if len(ticks) and ticks.is_historical[0]:
+                return self.backfill_ticks(ticks)
+            for symbol, timestamps, prices, volumes in ticks.by_symbol():
+                self.live_symbols.add(symbol)
+                bars.extend(self.data_aggregator.add_ticks(symbol, timestamps, prices, volumes))
+            return bars
+
+        for tick in ticks:
+            self.live_symbols.add(tick["symbol"])
+            bar = self.data_aggregator.add_tick(dict(tick))
+            if bar is not None:
+                bars.append(bar)
+        return bars
+
+    def backfill_ticks(self, batch):
+        """
+        Warm up the indicators of symbols with no live ticks yet from historical
+        trades, without running the strategy on them. For a symbol already
+        streaming (history sent again after a reconnect) only trades newer than
+        its last tick are used, as live ticks filling the gap.
+        :param batch: TradeBatch of historical trades.
+        :return: The 30-second bars closed by gap-filling trades.
+        """
+        bars = []
+        for symbol, timestamps, prices, volumes in batch.by_symbol():
+            if symbol not in self.live_symbols:
+                self.backfill.seed_symbol(symbol, timestamps, prices, volumes)
+                continue
+            newer = timestamps > self.data_aggregator.last_tick.get(symbol, -1)
+            if newer.any():
+                bars.extend(self.data_aggregator.add_ticks(symbol, timestamps[newer], prices[newer], volumes[newer]))
+        return bars
+
+    def update_indicators(self, bar):
+        """
+        Fold a 30-second bar into 1-minute bars and update indicators on each close.
+        :return: The moving average rows recorded for the closed 1-minute bars.
+        """
+        return [self.indicators.update_moving_averages(minute_bar) for minute_bar in self.indicators.add_bar(bar)]
+
+    def run_strategy(self, moving_average_row):
+        """
+        Run the strategy for a symbol as soon as its 1-minute bar has closed.
+        """
+        self.trading_logic.execute_strategy(moving_average_row["symbol"])
+
+    def stats(self):
+        """
+        Stats for every stage, keyed by stage label.
+        """
+        return {stage.label: stage.stats() for stage in self.stages}
+
+    async def join(self):
+        """
+        Wait until every item already queued has gone through the pipeline.
+        """
+        # Symbol chains are created while the aggregator drains, and each chain is
+        # drained in flow order, so nothing is left queued behind a joined stage
+        await self.aggregator_stage.queue.join()
+        for stage in self.router.stages:
+            await stage.queue.join()
+
+    async def run(self):
+        """
+        Start the stages and stream from the WebSocket until it stops.
+        """
+        for stage in self.stages:
+            stage.start()
+        try:
+            await self.websocket_handler.connect()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """
+        Stop every stage worker.
+        """
+        for stage in self.stages:
+            await stage.stop()
@@ -0,0 +1,271 @@
+"""
+Compact bar records.
+
+Bars used to be seven-key dictionaries holding a pd.Timestamp, several hundred
+bytes each. A Bar is a slotted object with an integer nanosecond time, and a
+BarSeries stores many bars as one numpy array per column (about 50 bytes per
+bar). Both keep the dictionary interface the rest of the code and its callers
+rely on: bar["open"], bar["timestamp"] (a pd.Timestamp), dict(bar), and
+pd.DataFrame(bars) all work as before.
+"""
+
+import numpy as np
+import pandas as pd
+from collections.abc import Mapping
+from trading_app.tick_store import to_nanoseconds
+
+BAR_COLUMNS = ["timestamp", "symbol", "open", "high", "low", "close", "volume"]
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+_FIELDS = frozenset(BAR_COLUMNS[1:])
+
+
+class Bar(Mapping):
+    __slots__ = ("time_ns", "symbol", "open", "high", "low", "close", "volume")
+
+    def __init__(self, time_ns, symbol, bar_open, high, low, close, volume):
+        """
+        One OHLCV bar, read-only as a mapping keyed like the old bar dictionaries.
+        :param time_ns: Start of the bar's interval in nanoseconds since the epoch.
+        """
+        self.time_ns = time_ns
+        self.symbol = symbol
+        self.open = bar_open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_mapping(cls, bar):
+        """
+        Build a Bar from a dictionary (or DataFrame row) with the BAR_COLUMNS keys.
+        """
+        return cls(to_nanoseconds(bar["timestamp"]), bar["symbol"], bar["open"], bar["high"], bar["low"],
+                   bar["close"], bar["volume"])
+
+    @property
+    def timestamp(self):
+        return pd.Timestamp(self.time_ns)
+
+    def __getitem__(self, key):
+        if key == "timestamp":
+            return pd.Timestamp(self.time_ns)
+        if key in _FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(BAR_COLUMNS)
+
+    def __len__(self):
+        return len(BAR_COLUMNS)
+
+    def __eq__(self, other):
+        if isinstance(other, Bar):
+            return self.astuple() == other.astuple()
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None  # Open bars are updated in place
+
+    def __repr__(self):
+        return (f"Bar({self.timestamp}, {self.symbol!r}, open={self.open}, high={self.high}, low={self.low}, "
+                f"close={self.close}, volume={self.volume})")
+
+    def __reduce__(self):
+        return Bar, self.astuple()
+
+    def astuple(self):
+        return (self.time_ns, self.symbol, self.open, self.high, self.low, self.close, self.volume)
+
+    def copy(self):
+        return Bar(*self.astuple())
+
+    def to_dict(self):
+        return dict(zip(BAR_COLUMNS, (self.timestamp, *self.astuple()[1:])))
+
+    def merge(self, high, low, close, volume):
+        """
+        Fold a later part of the same interval into this bar.
+        """
+        if high > self.high:
+            self.high = high
+        if low < self.low:
+            self.low = low
+        self.close = close
+        self.volume += volume
+
+
+def as_bar(bar):
+    """
+    The bar itself if it is a Bar, otherwise a Bar built from a dictionary.
+    """
+    return bar if isinstance(bar, Bar) else Bar.from_mapping(bar)
+
+
+class BarSeries:
+    def __init__(self, bars=(), initial_size=64):
+        """
+        Growable list of bars stored as one numpy array per column.
+        Supports the list operations the code uses on bar lists: len, indexing
+        and slicing (which return Bar objects), iteration, append, extend,
+        deleting a slice, comparison with a list and concatenation.
+        Symbols are stored once and referenced by a small integer code.
+        :param bars: Initial bars.
+        :param initial_size: Initial capacity in bars.
+        """
+        self.size = 0
+        self.symbols = []  # Symbol of each code
+        self.codes = {}  # {symbol: code}
+        self.arrays = {"time_ns": np.empty(initial_size, dtype="int64"),
+                       "symbol": np.empty(initial_size, dtype="int32")}
+        for name in PRICE_COLUMNS:
+            self.arrays[name] = np.empty(initial_size, dtype="float64")
+        self.extend(bars)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        """
+        Bytes held by the column arrays.
+        """
+        return sum(values.nbytes for values in self.arrays.values())
+
+    def _reserve(self, count):
+        needed = self.size + count
+        capacity = len(self.arrays["time_ns"])
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity)
+        for name, values in self.arrays.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            self.arrays[name] = grown
+
+    def _code(self, symbol):
+        code = self.codes.get(symbol)
+        if code is None:
+            code = self.codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return code
+
+    def append(self, bar):
+        """
+        Add a Bar (or bar dictionary) at the end.
+        """
+        bar = as_bar(bar)
+        self._reserve(1)
+        index = self.size
+        arrays = self.arrays
+        arrays["time_ns"][index] = bar.time_ns
+        arrays["symbol"][index] = self._code(bar.symbol)
+        arrays["open"][index] = bar.open
+        arrays["high"][index] = bar.high
+        arrays["low"][index] = bar.low
+        arrays["close"][index] = bar.close
+        arrays["volume"][index] = bar.volume
+        self.size += 1
+
+    def extend(self, bars):
+        """
+        Add Bars, bar dictionaries or the bars of another BarSeries at the end.
+        """
+        if isinstance(bars, BarSeries):
+            for symbol in bars.symbols:
+                self._code(symbol)
+            codes = np.array([self.codes[symbol] for symbol in bars.symbols], dtype="int32")
+            columns = {name: values[:bars.size] for name, values in bars.arrays.items()}
+            columns["symbol"] = codes[columns["symbol"]] if len(codes) else columns["symbol"]
+            self._extend_columns(columns)
+            return
+        for bar in bars:
+            self.append(bar)
+
+    def extend_arrays(self, symbol, time_ns, opens, highs, lows, closes, volumes):
+        """
+        Add bars of one symbol given as column arrays, without building Bar objects.
+        """
+        self._extend_columns({
+            "time_ns": time_ns, "symbol": np.full(len(time_ns), self._code(symbol), dtype="int32"),
+            "open": opens, "high": highs, "low": lows, "close": closes, "volume": volumes,
+        })
+
+    def _extend_columns(self, columns):
+        count = len(columns["time_ns"])
+        self._reserve(count)
+        for name, values in self.arrays.items():
+            values[self.size:self.size + count] = columns[name]
+        self.size += count
+
+    def _bars(self, start, stop, step=1):
+        """
+        Build Bar objects for a range of positions.
+        """
+        window = slice(start, stop, step)
+        columns = [self.arrays[name][:self.size][window].tolist() for name in ("time_ns", "symbol") + PRICE_COLUMNS]
+        symbols = self.symbols
+        columns[1] = [symbols[code] for code in columns[1]]
+        return [Bar(*row) for row in zip(*columns)]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._bars(*index.indices(self.size))
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("BarSeries index out of range")
+        return self._bars(index, index + 1)[0]
+
+    def __delitem__(self, index):
+        positions = np.arange(self.size)[index]
+        keep = np.ones(self.size, dtype=bool)
+        keep[positions] = False
+        remaining = int(keep.sum())
+        for values in self.arrays.values():
+            values[:remaining] = values[:self.size][keep]
+        self.size = remaining
+
+    def __iter__(self):
+        return iter(self._bars(0, self.size))
+
+    def __eq__(self, other):
+        if not isinstance(other, (BarSeries, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(bar == other_bar for bar, other_bar in zip(self, other))
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return f"BarSeries({self.size} bars)"
+
+    def __getstate__(self):
+        return {"symbols": list(self.symbols),
+                "arrays": {name: values[:self.size].copy() for name, values in self.arrays.items()}}
+
+    def __setstate__(self, state):
+        self.symbols = list(state["symbols"])
+        self.codes = {symbol: code for code, symbol in enumerate(self.symbols)}
+        self.arrays = {name: np.array(values) for name, values in state["arrays"].items()}
+        self.size = len(self.arrays["time_ns"])
+
+    def copy(self):
+        series = BarSeries.__new__(BarSeries)
+        series.__setstate__(self.__getstate__())
+        return series
+
+    def to_dataframe(self):
+        """
+        The bars as a DataFrame with BAR_COLUMNS and datetime timestamps.
+        """
+        arrays = {name: values[:self.size] for name, values in self.arrays.items()}
+        frame = pd.DataFrame({name: arrays[name].copy() for name in PRICE_COLUMNS})
+        frame.insert(0, "symbol", np.asarray(self.symbols, dtype=object)[arrays["symbol"]])
+        frame.insert(0, "timestamp", pd.to_datetime(arrays["time_ns"]))
+        return frame
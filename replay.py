@@ -0,0 +1,264 @@
+"""
+Replay recorded ticks through the trading code faster than real time.
+
+Ticks are aggregated with the vectorized DataAggregator.add_ticks path and each
+closed 30-second bar goes through the same Indicators and TradingLogic steps as
+the live TradingPipeline. A simulated clock follows the data, and the orders
+TradingLogic would have sent are recorded instead of reaching the exchange.
+
+    python -m trading_app.replay recorded_frames.jsonl
+"""
+
+import json
+import time
+import argparse
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from trading_app.constants import REPLAY_CHUNK_SIZE
+from trading_app.data_aggregation import DataAggregator, BAR_INTERVAL_NS
+from trading_app.indicators import Indicators
+from trading_app.records import as_bar
+from trading_app.trading_logic import TradingLogic
+from trading_app.tick_store import TickStore, to_nanoseconds_array
+from trading_app.decoders import fast_loads
+
+
+class SimulatedClock:
+    def __init__(self, start=0):
+        """
+        Clock driven by the replayed data instead of wall time.
+        :param start: Initial time in nanoseconds since the epoch.
+        """
+        self.now_ns = int(start)
+
+    def now(self):
+        """
+        Current simulated time as a pandas Timestamp.
+        """
+        return pd.Timestamp(self.now_ns)
+
+    def advance(self, timestamp_ns):
+        """
+        Move the clock forward to timestamp_ns; the clock never goes backwards.
+        """
+        if timestamp_ns > self.now_ns:
+            self.now_ns = int(timestamp_ns)
+
+
+class RecordingOrderEntry:
+    def __init__(self, clock=None):
+        """
+        Stand-in for OrderEntry that records orders instead of sending them.
+        :param clock: SimulatedClock used to time-stamp each order.
+        """
+        self.clock = clock or SimulatedClock()
+        self.orders = []  # Every request, in the order it was made
+        self.ids = itertools.count(1)
+
+    def _record(self, action, **params):
+        order = {"time": self.clock.now(), "action": action, "orderId": f"replay-{next(self.ids)}", **params}
+        self.orders.append(order)
+        return {"orderId": order["orderId"], "status": "ACCEPTED"}
+
+    def place_market_order(self, symbol, quantity, side):
+        return self._record("market", symbol=symbol, quantity=quantity, side=side)
+
+    def place_limit_order(self, symbol, quantity, price, side):
+        return self._record("limit", symbol=symbol, quantity=quantity, price=price, side=side)
+
+    def place_stop_order(self, symbol, quantity, stop_price, side):
+        return self._record("stop", symbol=symbol, quantity=quantity, stop_price=stop_price, side=side)
+
+    def place_bracket_order(self, symbol, quantity, entry_price, stop_loss, take_profit, side, order_type="LIMIT"):
+        return self._record("bracket", symbol=symbol, quantity=quantity, entry_price=entry_price,
+                            stop_loss=stop_loss, take_profit=take_profit, side=side, order_type=order_type)
+
+    def cancel_order(self, order_id):
+        return self._record("cancel", order_id=order_id)
+
+    def modify_order(self, order_id, new_price=None, new_quantity=None):
+        return self._record("modify", order_id=order_id, new_price=new_price, new_quantity=new_quantity)
+
+    def get_order_status(self, order_id):
+        return {"orderId": order_id, "status": "ACCEPTED"}
+
+    def get_orders(self):
+        return {"orders": []}
+
+    def get_positions(self):
+        return {"positions": []}
+
+    def close(self):
+        pass
+
+    def to_dataframe(self):
+        """
+        Recorded orders as a DataFrame.
+        """
+        return pd.DataFrame(self.orders)
+
+
+class ReplayEngine:
+    def __init__(self, trading_logic=None, data_aggregator=None, clock=None, chunk_size=REPLAY_CHUNK_SIZE):
+        """
+        :param trading_logic: TradingLogic to drive; by default one is built with
+                              a RecordingOrderEntry on the engine's clock.
+        :param data_aggregator: DataAggregator building 30-second bars.
+        :param clock: SimulatedClock (shared with the recording order entry).
+        :param chunk_size: Ticks aggregated per vectorized step.
+        """
+        self.clock = clock or SimulatedClock()
+        if trading_logic is None:
+            # A replay keeps its whole bar and moving average history for analysis
+            indicators = Indicators(retention=0, ma_retention=0)
+            trading_logic = TradingLogic(indicators=indicators, order_entry=RecordingOrderEntry(self.clock))
+        self.trading_logic = trading_logic
+        self.indicators = trading_logic.indicators
+        self.order_entry = trading_logic.order_entry
+        self.data_aggregator = data_aggregator or DataAggregator()
+        self.chunk_size = chunk_size
+        self.ticks_replayed = 0
+        self.bars_closed = 0
+        self.minute_bars_closed = 0
+        self.elapsed = 0.0  # Wall-clock seconds spent replaying
+
+    @property
+    def orders(self):
+        """
+        Orders recorded so far (empty if the order entry does not record).
+        """
+        return getattr(self.order_entry, "orders", [])
+
+    def replay(self, ticks):
+        """
+        Replay ticks in time order through aggregation, indicators and strategy.
+        :param ticks: DataFrame with timestamp, symbol, price and volume columns, or a TickStore.
+        :return: Summary dictionary (see stats).
+        """
+        if isinstance(ticks, TickStore):
+            ticks = ticks.to_dataframe()
+        if len(ticks) == 0:
+            return self.stats()
+
+        started = time.perf_counter()
+        timestamps = to_nanoseconds_array(ticks["timestamp"])
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        codes, symbols = pd.factorize(np.asarray(ticks["symbol"], dtype=object)[order])
+        prices = np.asarray(ticks["price"], dtype="float64")[order]
+        volumes = np.asarray(ticks["volume"], dtype="float64")[order]
+
+        for start in range(0, len(timestamps), self.chunk_size):
+            chunk = slice(start, start + self.chunk_size)
+            chunk_codes = codes[chunk]
+            bars = []
+            for code in np.unique(chunk_codes):
+                mask = chunk_codes == code
+                bars.extend(self.data_aggregator.add_ticks(
+                    symbols[code], timestamps[chunk][mask], prices[chunk][mask], volumes[chunk][mask]
+                ))
+            # Bars of different symbols are interleaved by close time
+            bars.sort(key=lambda bar: bar.time_ns)
+            for bar in bars:
+                self.on_bar(bar)
+
+        self.ticks_replayed += len(timestamps)
+        self.clock.advance(timestamps[-1])
+        self.elapsed += time.perf_counter() - started
+        return self.stats()
+
+    def on_bar(self, bar):
+        """
+        Process one closed 30-second bar the way TradingPipeline does.
+        The simulated clock is set to the end of the bar's interval.
+        """
+        bar = as_bar(bar)
+        self.clock.advance(bar.time_ns + BAR_INTERVAL_NS)
+        self.bars_closed += 1
+        for minute_bar in self.indicators.add_bar(bar):
+            self.indicators.update_moving_averages(minute_bar)
+            self.minute_bars_closed += 1
+            self.trading_logic.execute_strategy(minute_bar["symbol"])
+
+    def stats(self):
+        """
+        Replay counts, speed and simulated time.
+        """
+        return {
+            "ticks": self.ticks_replayed,
+            "bars_30s": self.bars_closed,
+            "bars_1min": self.minute_bars_closed,
+            "orders": len(self.orders),
+            "elapsed": self.elapsed,
+            "ticks_per_second": self.ticks_replayed / self.elapsed if self.elapsed else 0.0,
+            "simulated_time": self.clock.now(),
+        }
+
+
+def _replay_symbol(task):
+    """
+    Worker for replay_parallel: replay one symbol's ticks in a fresh engine.
+    """
+    ticks, chunk_size = task
+    engine = ReplayEngine(chunk_size=chunk_size)
+    return engine.replay(ticks), engine.orders
+
+
+def replay_parallel(ticks, workers=None, chunk_size=REPLAY_CHUNK_SIZE):
+    """
+    Replay every symbol in its own process.
+    Aggregation, indicator and strategy state is kept per symbol, so the result
+    is the same as one engine replaying all symbols together.
+    :param ticks: DataFrame with timestamp, symbol, price and volume columns.
+    :param workers: Worker processes (all cores when omitted).
+    :return: (orders DataFrame sorted by time, {symbol: stats})
+    """
+    groups = [(symbol, group) for symbol, group in ticks.groupby("symbol", sort=False)]
+    tasks = [(group, chunk_size) for _, group in groups]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_replay_symbol, tasks))
+
+    orders = [order for _, symbol_orders in results for order in symbol_orders]
+    orders = pd.DataFrame(orders)
+    if not orders.empty:
+        orders = orders.sort_values("time", kind="stable").reset_index(drop=True)
+    return orders, {symbol: stats for (symbol, _), (stats, _) in zip(groups, results)}
+
+
+def load_ticks(path):
+    """
+    Load recorded ticks from a CSV/Parquet file or from recorded WebSocket frames
+    (one JSON frame per line).
+    :return: DataFrame with timestamp, symbol, price and volume columns.
+    """
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+
+    trades = []
+    with open(path, "rb") as frames_file:
+        for line in frames_file:
+            if line.strip():
+                trades.extend(fast_loads(line).get("trades", []))
+    return pd.DataFrame(trades, columns=["timestamp", "symbol", "price", "volume"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Recorded ticks (.csv, .parquet or JSON frames per line)")
+    parser.add_argument("--chunk-size", type=int, default=REPLAY_CHUNK_SIZE)
+    parser.add_argument("--orders", help="Write the recorded orders to this CSV file")
+    args = parser.parse_args()
+
+    engine = ReplayEngine(chunk_size=args.chunk_size)
+    stats = engine.replay(load_ticks(args.path))
+    print(json.dumps(stats, indent=2, default=str))
+    if args.orders:
+        engine.order_entry.to_dataframe().to_csv(args.orders, index=False)
+
+
+if __name__ == "__main__":
+    main()
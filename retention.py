@@ -0,0 +1,145 @@
+"""
+Bounded in-memory history and memory gauges.
+
+Bars, 1-minute bars and moving average rows are kept in Python lists that
+would otherwise grow for as long as the process runs. A RetentionPolicy keeps
+the newest `limit` items of such a list and hands the older ones to an
+optional spill callable (for example an archive writer) before dropping them.
+Structures report their size through memory_usage() so the process can be
+watched for flat memory over a trading week.
+"""
+
+import sys
+import asyncio
+import numpy as np
+import pandas as pd
+from trading_app.tick_store import to_nanoseconds_array
+from trading_app.utils.logger import get_logger
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+log = get_logger("memory")
+
+
+class RetentionPolicy:
+    def __init__(self, limit, spill=None, slack=0.25):
+        """
+        Keep at most about `limit` items of a growing list, dropping the oldest.
+        Lists are trimmed once they are `slack` over the limit, so removing from
+        the front of a list costs O(limit) once every limit * slack appends.
+        :param limit: Items to keep; 0 or None keeps everything.
+        :param spill: Optional callable receiving each list of dropped items.
+        :param slack: Fraction of the limit a list may grow past before trimming.
+        """
+        self.limit = limit or 0
+        self.spill = spill
+        self.slack = slack
+        self.dropped = 0
+
+    def trim(self, records, limit=None):
+        """
+        Drop the oldest items of `records` in place if it has grown past the limit.
+        :param limit: Limit to use instead of the policy's own (e.g. scaled by symbol count).
+        :return: Number of items removed from the front of the list.
+        """
+        limit = self.limit if limit is None else limit
+        if not limit or len(records) <= limit + max(1, int(limit * self.slack)):
+            return 0
+        excess = len(records) - limit
+        if self.spill is not None:
+            self.spill(records[:excess])
+        del records[:excess]
+        self.dropped += excess
+        return excess
+
+
+def records_nbytes(records):
+    """
+    Approximate memory held by a list of flat dictionaries, estimated from its last item.
+    Columnar containers such as BarSeries report their own size.
+    """
+    if hasattr(records, "nbytes"):
+        return records.nbytes
+    size = sys.getsizeof(records)
+    if records:
+        sample = records[-1]
+        size += len(records) * (sys.getsizeof(sample) + sum(sys.getsizeof(value) for value in sample.values()))
+    return size
+
+
+def usage(*record_lists):
+    """
+    Gauge for one or more lists of records: {"items": count, "bytes": approximate size}.
+    """
+    return {
+        "items": sum(len(records) for records in record_lists),
+        "bytes": sum(records_nbytes(records) for records in record_lists),
+    }
+
+
+def pack_records(records, columns=None):
+    """
+    Store a list of flat dictionaries as one array per key, e.g. for a checkpoint.
+    Timestamps are kept as int64 nanoseconds.
+    :param records: Dictionaries sharing the same keys.
+    :param columns: Keys to keep (those of the first record when omitted).
+    :return: {column: numpy array}.
+    """
+    if columns is None:
+        columns = list(records[0]) if records else []
+    packed = {}
+    for column in columns:
+        values = [record[column] for record in records]
+        packed[column] = to_nanoseconds_array(values) if column == "timestamp" else np.asarray(values)
+    return packed
+
+
+def unpack_records(packed):
+    """
+    Rebuild the list of dictionaries stored by pack_records.
+    """
+    columns = {
+        column: list(pd.to_datetime(values)) if column == "timestamp" else values.tolist()
+        for column, values in packed.items()
+    }
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+def process_memory():
+    """
+    Resident set size of this process now and at its peak, in bytes.
+    """
+    rss = peak = None
+    if resource is not None:
+        try:
+            with open("/proc/self/statm") as statm:
+                rss = int(statm.read().split()[1]) * resource.getpagesize()
+        except (OSError, ValueError, IndexError):
+            pass
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != "darwin":
+            peak *= 1024  # ru_maxrss is in kilobytes on Linux
+    return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+
+def memory_report(**components):
+    """
+    Memory gauges of every component with a memory_usage() method, plus the process.
+    :param components: name=component pairs, e.g. aggregator=data_aggregator.
+    :return: {name: {structure: {"items", "bytes"}}, "process": {...}}
+    """
+    report = {name: component.memory_usage() for name, component in components.items()}
+    report["process"] = process_memory()
+    return report
+
+
+async def report_memory_periodically(interval, **components):
+    """
+    Log the memory gauges every `interval` seconds until cancelled.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        log.info("[Memory]", extra={"data": memory_report(**components)})
@@ -0,0 +1,66 @@
+"""
+Moving average crossover signals, shared by the live strategy and backtests.
+
+A symbol's regime is the side the fast average was last seen on: above the
+slow average (1) or below it (-1). Bars where the averages are equal, or not
+yet defined, leave the regime unchanged, so a cross that passes through an
+exact tie is still caught when the fast average leaves it on the other side.
+A signal fires on the bar where the regime flips: BUY when the fast average
+goes above, SELL when it goes below.
+
+CrossoverSignals keeps the regime of each symbol and updates it in constant
+time per bar close; crossover_signals() finds every flip over a whole history
+in one vectorized pass, with the same result.
+"""
+
+import numpy as np
+
+BUY = "BUY"
+SELL = "SELL"
+
+
+def crossover_signals(fast, slow):
+    """
+    Every crossover over a history of fast and slow moving averages.
+    :param fast: Array of fast moving average values, one per bar (NaN while undefined).
+    :param slow: Array of slow moving average values.
+    :return: List of (bar index, "BUY" or "SELL") tuples, oldest first.
+    """
+    difference = np.asarray(fast, dtype="float64") - np.asarray(slow, dtype="float64")
+    sides = np.sign(np.nan_to_num(difference, nan=0.0))
+    decided = np.flatnonzero(sides)  # Bars that set the regime
+    regimes = sides[decided]
+    flips = np.flatnonzero(regimes[1:] != regimes[:-1]) + 1
+    return [(index, BUY if side > 0 else SELL)
+            for index, side in zip(decided[flips].tolist(), regimes[flips].tolist())]
+
+
+class CrossoverSignals:
+    def __init__(self):
+        """
+        Crossover state machine with one regime register per symbol.
+        """
+        self.regimes = {}  # {symbol: 1 if the fast average was last above the slow one, -1 if below}
+
+    def update(self, symbol, fast, slow):
+        """
+        Feed one bar's moving averages of a symbol.
+        :return: "BUY" or "SELL" if the averages crossed on this bar, otherwise None.
+        """
+        if fast > slow:
+            side = 1
+        elif fast < slow:
+            side = -1
+        else:
+            return None  # A tie, or an average not defined yet (NaN)
+        previous = self.regimes.get(symbol)
+        self.regimes[symbol] = side
+        if previous is None or previous == side:
+            return None
+        return BUY if side > 0 else SELL
+
+    def snapshot(self):
+        return dict(self.regimes)
+
+    def restore(self, state):
+        self.regimes = dict(state)
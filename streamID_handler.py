@@ -6,46 +6,41 @@ Created on Sun Dec  1 14:14:25 2024
 @author: duncan
 """
 
-import requests
-from trading_app.constants import API_URL, DEMO_CREDENTIALS, LIVE_CREDENTIALS
-from trading_app.auth import Authenticator
+from trading_app.credential_service import get_credential_service
+from trading_app.utils.logger import get_logger
+
+log = get_logger("credentials")
 
 
 class StreamIDHandler:
-    def __init__(self):
+    def __init__(self, credential_service=None):
         """
-        Initialize the handler, authenticate, and create a streamId.
+        Initialize the handler on top of the shared credential service.
+        No request is made until a streamId is needed.
+        :param credential_service: CredentialService to use (the process-wide one if omitted).
         """
-        # Pass demo and live credentials to the Authenticator
-        self.authenticator = Authenticator(
-            demo_credentials=DEMO_CREDENTIALS,
-            live_credentials=LIVE_CREDENTIALS
-        )
-        self.token = self.authenticator.get_token()  # Retrieve the authentication token
+        self.authenticator = credential_service or get_credential_service()
         self.stream_id = None
-        self.create_stream_id()  # Generate the initial streamId
+
+    @property
+    def token(self):
+        """
+        The current authentication token.
+        """
+        return self.authenticator.get_token()
 
     def create_stream_id(self):
         """
         Create a new streamId using the Ironbeam API.
         """
-        try:
-            url = f"{API_URL}/stream/create"
-            headers = {"Authorization": f"Bearer {self.token}"}
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()  # Raise an error for HTTP issues
-            self.stream_id = response.json().get("streamId")
-            print(f"Created new streamId: {self.stream_id}")
-        except requests.exceptions.RequestException as e:
-            print(f"Error creating streamId: {e}")
-            raise
+        self.stream_id = self.authenticator.create_stream_id()
 
     def refresh_stream_id(self):
         """
-        Refresh the streamId by creating a new one.
+        Refresh the streamId, taking a prefetched spare when one is ready.
         """
-        print("Refreshing streamId...")
-        self.create_stream_id()
+        log.info("Refreshing streamId...")
+        self.stream_id = self.authenticator.get_stream_id()
 
     def get_stream_id(self):
         """
@@ -53,5 +48,5 @@ class StreamIDHandler:
         :return: The current streamId.
         """
         if not self.stream_id:
-            self.create_stream_id()
+            self.stream_id = self.authenticator.get_stream_id()
         return self.stream_id
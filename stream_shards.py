@@ -0,0 +1,290 @@
+"""
+Sharded market data streams.
+
+With many symbols one WebSocket connection becomes the bottleneck: a single
+reader decodes every frame. ShardedWebSocketHandler spreads the symbols over
+several connections, each with its own streamId and reader task, and merges
+their live ticks back into one feed ordered by trade time, so the pipeline
+behind it sees the same interface as a single WebSocketHandler.
+"""
+
+import time
+import asyncio
+import contextlib
+import numpy as np
+import pandas as pd
+from trading_app.websocket_handler import WebSocketHandler
+from trading_app.streamID_handler import StreamIDHandler
+from trading_app.decoders import TradeFrameDecoder, TradeBatch
+from trading_app.constants import (
+    STREAM_URL, SYMBOLS, STREAM_SHARDS, SUBSCRIPTION_BATCH_SIZE, STREAM_MERGE_DELAY, PIPELINE_QUEUE_SIZE,
+)
+
+
+class TickMerger:
+    def __init__(self, shard_count, max_delay=STREAM_MERGE_DELAY, maxsize=PIPELINE_QUEUE_SIZE):
+        """
+        Merge the live ticks of several shards into one feed ordered by timestamp.
+        Each shard's ticks are already in order, so ticks up to the lowest latest
+        timestamp among the shards still sending can be released. A shard that has
+        been quiet for max_delay stops holding the others back, and ticks waiting
+        longer than max_delay are released regardless.
+        :param shard_count: Number of input shards.
+        :param max_delay: Longest time in seconds ticks are held for ordering.
+        :param maxsize: Capacity of each shard's input queue.
+        """
+        self.inputs = [asyncio.Queue(maxsize=maxsize) for _ in range(shard_count)]
+        self.max_delay = max_delay
+        self.tick_queues = []  # Queues receiving (enqueued_at, TradeBatch) for each release
+        self.watermarks = [None] * shard_count  # Latest tick timestamp per shard
+        self.last_seen = [None] * shard_count  # Monotonic arrival time of each shard's last batch
+        self.pending = []  # [(arrived, enqueued_at, TradeBatch)]
+        self.lock = asyncio.Lock()
+        self.last_released = None
+        self.released = 0
+        self.late = 0  # Ticks released behind an already released timestamp
+
+    def add_tick_queue(self, queue):
+        """
+        Register a queue that receives every merged batch of live ticks.
+        :param queue: asyncio.Queue; items are (enqueued_at, TradeBatch) tuples.
+        """
+        self.tick_queues.append(queue)
+
+    def add(self, shard, enqueued_at, ticks, now=None):
+        """
+        Hold a batch of live ticks from one shard until it can be released in order.
+        :param shard: Index of the shard the ticks came from.
+        :param enqueued_at: Arrival time stamped by the shard, in seconds.
+        :param ticks: TradeBatch or list of tick dictionaries.
+        """
+        batch = ticks if isinstance(ticks, TradeBatch) else TradeBatch.from_trades(ticks)
+        if len(batch) == 0:
+            return
+        now = time.monotonic() if now is None else now
+        latest = int(batch.timestamps[-1])
+        if self.watermarks[shard] is None or latest > self.watermarks[shard]:
+            self.watermarks[shard] = latest
+        self.last_seen[shard] = now
+        self.pending.append((now, enqueued_at, batch))
+
+    def take(self, now=None, flush=False):
+        """
+        Remove the ticks that can be released from the pending batches.
+        :param flush: Release everything pending.
+        :return: (enqueued_at, TradeBatch sorted by timestamp), or None.
+        """
+        if not self.pending:
+            return None
+        now = time.monotonic() if now is None else now
+        stale_before = now - self.max_delay
+        active = [
+            watermark for watermark, seen in zip(self.watermarks, self.last_seen)
+            if seen is not None and seen >= stale_before
+        ]
+        # A shard that has connected but not sent anything yet holds everything
+        watermark = min(active) if active and None not in active else None
+
+        released, kept, origin = [], [], None
+        for arrived, enqueued_at, batch in self.pending:
+            if flush or arrived < stale_before:
+                mask = None
+            elif watermark is None:
+                kept.append((arrived, enqueued_at, batch))
+                continue
+            else:
+                mask = batch.timestamps <= watermark
+                if not mask.any():
+                    kept.append((arrived, enqueued_at, batch))
+                    continue
+                if mask.all():
+                    mask = None
+                else:
+                    kept.append((arrived, enqueued_at, batch.select(~mask)))
+            released.append(batch if mask is None else batch.select(mask))
+            origin = enqueued_at if origin is None else min(origin, enqueued_at)
+        self.pending = kept
+        if not released:
+            return None
+
+        merged = TradeBatch.concatenate(released) if len(released) > 1 else released[0]
+        merged = merged.select(np.argsort(merged.timestamps, kind="stable"))
+        if self.last_released is not None:
+            self.late += int(np.count_nonzero(merged.timestamps < self.last_released))
+        self.last_released = int(merged.timestamps[-1]) if self.last_released is None \
+            else max(self.last_released, int(merged.timestamps[-1]))
+        self.released += len(merged)
+        return origin, merged
+
+    async def release(self, flush=False):
+        """
+        Publish whatever can be released to every registered queue.
+        """
+        async with self.lock:
+            item = self.take(flush=flush)
+            if item is None:
+                return
+            for queue in self.tick_queues:
+                await queue.put(item)
+
+    async def _read(self, shard):
+        queue = self.inputs[shard]
+        while True:
+            enqueued_at, ticks = await queue.get()
+            try:
+                self.add(shard, enqueued_at, ticks)
+                await self.release()
+            finally:
+                queue.task_done()
+
+    async def drain(self):
+        """
+        Take everything still queued by the shards and release it all.
+        """
+        for shard, queue in enumerate(self.inputs):
+            while not queue.empty():
+                enqueued_at, ticks = queue.get_nowait()
+                self.add(shard, enqueued_at, ticks)
+                queue.task_done()
+        await self.release(flush=True)
+
+    async def run(self):
+        """
+        Read every shard and release ticks as they become ordered, until cancelled.
+        """
+        # Until max_delay has passed, wait for the first ticks of every shard
+        started = time.monotonic()
+        self.last_seen = [started if seen is None else seen for seen in self.last_seen]
+        readers = [asyncio.create_task(self._read(shard)) for shard in range(len(self.inputs))]
+        try:
+            while True:
+                await asyncio.sleep(self.max_delay / 2)
+                await self.release()
+        finally:
+            for reader in readers:
+                reader.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
+
+    def stats(self):
+        """
+        Ticks released, ticks released out of order and ticks still held.
+        """
+        return {
+            "released": self.released,
+            "late": self.late,
+            "pending": sum(len(batch) for _, _, batch in self.pending),
+        }
+
+
+class ShardedWebSocketHandler:
+    def __init__(self, symbols=None, shards=STREAM_SHARDS, credential_service=None, stream_url=STREAM_URL,
+                 archive=None, subscription_batch=SUBSCRIPTION_BATCH_SIZE, max_delay=STREAM_MERGE_DELAY,
+                 decoder_factory=TradeFrameDecoder):
+        """
+        Spread the symbols over several WebSocket connections.
+        Symbols are dealt round-robin, so each shard gets a similar number.
+        :param symbols: {name: contract} to stream (defaults to SYMBOLS).
+        :param shards: Number of connections (capped at the number of symbols).
+        :param credential_service: CredentialService the shards' streamIds come from.
+        :param stream_url: WebSocket base URL.
+        :param archive: Optional TickArchive (or ArchiveWriter) shared by the shards.
+        :param subscription_batch: Symbols per subscribe message on each shard.
+        :param max_delay: Longest time in seconds the merge holds ticks for ordering.
+        :param decoder_factory: Called once per shard to create its frame decoder.
+        """
+        items = list((SYMBOLS if symbols is None else symbols).items())
+        count = max(1, min(shards, len(items)))
+        self.merger = TickMerger(count, max_delay)
+        self.handlers = []
+        for index in range(count):
+            handler = WebSocketHandler(
+                StreamIDHandler(credential_service), decoder=decoder_factory(), stream_url=stream_url,
+                archive=archive, symbols=dict(items[index::count]), subscription_batch=subscription_batch,
+            )
+            handler.add_tick_queue(self.merger.inputs[index])
+            self.handlers.append(handler)
+
+    @property
+    def historical_data(self):
+        """
+        Historical trades of every shard as one DataFrame ordered by time.
+        """
+        return self._combine(handler.historical_data for handler in self.handlers)
+
+    @property
+    def live_data(self):
+        """
+        Live trades of every shard as one DataFrame ordered by time.
+        """
+        return self._combine(handler.live_data for handler in self.handlers)
+
+    @staticmethod
+    def _combine(frames):
+        frame = pd.concat(list(frames), ignore_index=True)
+        return frame.sort_values("timestamp", kind="stable", ignore_index=True)
+
+    def add_tick_queue(self, queue):
+        """
+        Register a queue that receives the merged live ticks of all shards.
+        :param queue: asyncio.Queue; items are (enqueued_at, TradeBatch) tuples.
+        """
+        self.merger.add_tick_queue(queue)
+
+    def add_history_queue(self, queue):
+        """
+        Register a queue that receives every shard's historical trades, unmerged.
+        """
+        for handler in self.handlers:
+            handler.add_history_queue(queue)
+
+    def add_order_listener(self, listener):
+        """
+        Register a callable receiving order, fill and position messages. Order
+        events are account-wide, so only the first shard subscribes to them.
+        """
+        self.handlers[0].add_order_listener(listener)
+
+    async def connect(self):
+        """
+        Connect every shard and run the merge until all of them have stopped.
+        """
+        merger = asyncio.create_task(self.merger.run())
+        try:
+            await asyncio.gather(*(handler.connect() for handler in self.handlers))
+        finally:
+            merger.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await merger
+            await self.merger.drain()
+
+    async def close_connection(self):
+        """
+        Close every shard's connection.
+        """
+        await asyncio.gather(*(handler.close_connection() for handler in self.handlers))
+
+    def memory_usage(self):
+        """
+        Tick buffer gauges summed over the shards, with the ticks held by the merge.
+        """
+        totals = {}
+        for handler in self.handlers:
+            for name, gauge in handler.memory_usage().items():
+                total = totals.setdefault(name, {"items": 0, "bytes": 0})
+                total["items"] += gauge["items"]
+                total["bytes"] += gauge["bytes"]
+        totals["merge_pending"] = {"items": self.merger.stats()["pending"]}
+        return totals
+
+    def stats(self):
+        """
+        Symbols, streamId and live tick count of each shard, with the merge counters.
+        """
+        return {
+            "shards": [
+                {"stream_id": handler.stream_id, "symbols": list(handler.symbols.values()),
+                 "live_ticks": len(handler.live_ticks)}
+                for handler in self.handlers
+            ],
+            "merge": self.merger.stats(),
+        }
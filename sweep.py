@@ -0,0 +1,228 @@
+"""
+Parallel parameter sweep for the moving average crossover strategy.
+
+Every combination of fast window, slow window, stop and target is simulated
+over recorded 1-minute bars in a process pool. Prefix sums of the closes are
+computed once and placed in shared memory, so each worker gets any rolling
+mean with two subtractions per bar instead of recomputing it.
+
+    python -m trading_app.sweep bars.csv --fast 50,100,200 --slow 500,1000 --stop 5,10 --target 10,20,40
+"""
+
+import os
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from trading_app.signals import crossover_signals
+
+# Rows of the shared array: close prefix sums (n + 1 values), closes, highs, lows
+SHARED_ROWS = ("prefix", "close", "high", "low")
+
+RESULT_COLUMNS = [
+    "fast", "slow", "stop", "target", "trades", "wins", "win_rate",
+    "total_points", "average_points", "profit_factor", "max_drawdown",
+]
+
+_shared = {}  # Arrays attached by each worker process
+
+
+def to_one_minute_bars(bars):
+    """
+    Resample bars (e.g. archived 30-second bars) for one symbol to 1-minute OHLC.
+    """
+    frame = pd.DataFrame(bars)
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"])
+    minute = frame.set_index("timestamp").resample("1min", label="left", closed="left").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last"}
+    )
+    return minute.dropna().reset_index()
+
+
+def rolling_means(prefix, window, min_periods=None):
+    """
+    Rolling mean of the closes from their prefix sums, as MovingAverageEngine computes it.
+    :param prefix: Prefix sums with prefix[0] == 0.
+    :param window: Window length in bars.
+    :param min_periods: Bars needed before a value is produced (NaN before that);
+                        None requires a full window, as Indicators does.
+    :return: float64 array with one mean per bar.
+    """
+    min_periods = window if min_periods is None else min_periods
+    count = len(prefix) - 1
+    ends = np.arange(1, count + 1)
+    starts = np.maximum(ends - window, 0)
+    sizes = ends - starts
+    means = (prefix[ends] - prefix[starts]) / sizes
+    means[sizes < min_periods] = np.nan
+    return means
+
+
+def simulate_trades(signals, close, high, low, stop, target):
+    """
+    Simulate bracket trades entered at the close of each signal bar.
+    A position exits at its stop or target (the stop is assumed first when a bar
+    reaches both) or at the close of the next signal bar.
+    :return: float64 array of points won or lost per trade.
+    """
+    results = []
+    for number, (entry, side) in enumerate(signals):
+        exit_bar = signals[number + 1][0] if number + 1 < len(signals) else len(close) - 1
+        price = close[entry]
+        direction = 1 if side == "BUY" else -1
+        stop_price = price - direction * stop
+        target_price = price + direction * target
+
+        highs = high[entry + 1:exit_bar + 1]
+        lows = low[entry + 1:exit_bar + 1]
+        stop_hits = lows <= stop_price if direction == 1 else highs >= stop_price
+        target_hits = highs >= target_price if direction == 1 else lows <= target_price
+        first_stop = np.argmax(stop_hits) if stop_hits.any() else len(highs)
+        first_target = np.argmax(target_hits) if target_hits.any() else len(highs)
+
+        if first_stop == len(highs) and first_target == len(highs):
+            if exit_bar == entry:
+                continue
+            results.append(direction * (close[exit_bar] - price))
+        elif first_stop <= first_target:
+            results.append(-stop)
+        else:
+            results.append(target)
+    return np.asarray(results, dtype="float64")
+
+
+def summarize(fast, slow, stop, target, points):
+    """
+    One results row for a parameter set.
+    """
+    wins = int((points > 0).sum())
+    gains = points[points > 0].sum()
+    losses = -points[points < 0].sum()
+    equity = np.cumsum(points)
+    drawdown = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:] - equity if len(points) else np.zeros(0)
+    return {
+        "fast": fast,
+        "slow": slow,
+        "stop": stop,
+        "target": target,
+        "trades": len(points),
+        "wins": wins,
+        "win_rate": wins / len(points) if len(points) else np.nan,
+        "total_points": float(points.sum()),
+        "average_points": float(points.mean()) if len(points) else np.nan,
+        "profit_factor": float(gains / losses) if losses else np.inf if gains else np.nan,
+        "max_drawdown": float(drawdown.max()) if len(drawdown) else 0.0,
+    }
+
+
+def evaluate(fast, slow, stops, targets, prefix, close, high, low, min_periods=None):
+    """
+    Results rows for one pair of windows and every stop/target combination.
+    The rolling means and signals are shared by all the stop/target pairs.
+    """
+    signals = crossover_signals(rolling_means(prefix, fast, min_periods), rolling_means(prefix, slow, min_periods))
+    return [
+        summarize(fast, slow, stop, target, simulate_trades(signals, close, high, low, stop, target))
+        for stop, target in itertools.product(stops, targets)
+    ]
+
+
+def _attach(name, count):
+    """
+    Pool initializer: map the shared bar arrays into this worker.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    arrays = np.ndarray((len(SHARED_ROWS), count + 1), dtype="float64", buffer=memory.buf)
+    _shared["memory"] = memory
+    _shared.update({row: arrays[index] for index, row in enumerate(SHARED_ROWS)})
+    _shared.update(close=_shared["close"][:count], high=_shared["high"][:count], low=_shared["low"][:count])
+
+
+def _evaluate_shared(task):
+    fast, slow, stops, targets, min_periods = task
+    return evaluate(fast, slow, stops, targets, _shared["prefix"], _shared["close"],
+                    _shared["high"], _shared["low"], min_periods)
+
+
+def run_sweep(bars, fast_windows, slow_windows, stops, targets, workers=None, min_periods=None, sort_by="total_points"):
+    """
+    Run the parameter grid over 1-minute bars.
+    :param bars: DataFrame (or records) with high, low and close columns, in time order.
+    :param fast_windows: Fast moving average lengths in bars.
+    :param slow_windows: Slow moving average lengths; pairs with fast >= slow are skipped.
+    :param stops: Stop distances in points.
+    :param targets: Target distances in points.
+    :param workers: Worker processes (all cores when omitted; 1 runs in-process).
+    :param min_periods: Bars needed before a moving average is produced (None: a full window).
+    :param sort_by: Results column to rank by (descending).
+    :return: Ranked DataFrame with one row per parameter set.
+    """
+    bars = pd.DataFrame(bars)
+    count = len(bars)
+    pairs = [(fast, slow) for fast in fast_windows for slow in slow_windows if fast < slow]
+    tasks = [(fast, slow, list(stops), list(targets), min_periods) for fast, slow in pairs]
+    workers = workers or os.cpu_count() or 1
+
+    memory = shared_memory.SharedMemory(create=True, size=len(SHARED_ROWS) * (count + 1) * 8)
+    try:
+        arrays = np.ndarray((len(SHARED_ROWS), count + 1), dtype="float64", buffer=memory.buf)
+        close = bars["close"].to_numpy(dtype="float64")
+        arrays[0, 0] = 0.0
+        np.cumsum(close, out=arrays[0, 1:])
+        arrays[1, :count] = close
+        arrays[2, :count] = bars["high"].to_numpy(dtype="float64")
+        arrays[3, :count] = bars["low"].to_numpy(dtype="float64")
+
+        if workers == 1:
+            _attach(memory.name, count)
+            rows = [row for task in tasks for row in _evaluate_shared(task)]
+            attached = _shared.pop("memory")
+            _shared.clear()
+            attached.close()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(memory.name, count)) as pool:
+                chunksize = max(1, len(tasks) // (workers * 4))
+                rows = [row for rows in pool.map(_evaluate_shared, tasks, chunksize=chunksize) for row in rows]
+        del arrays
+    finally:
+        memory.close()
+        memory.unlink()
+
+    results = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    return results.sort_values(sort_by, ascending=False, kind="stable").reset_index(drop=True)
+
+
+def parse_values(text, kind=float):
+    return [kind(value) for value in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV or Parquet bars with timestamp, high, low and close columns")
+    parser.add_argument("--fast", default="50,100,200", help="Fast window lengths in minutes")
+    parser.add_argument("--slow", default="500,1000,2000", help="Slow window lengths in minutes")
+    parser.add_argument("--stop", default="5,10,20", help="Stop distances in points")
+    parser.add_argument("--target", default="10,20,40", help="Target distances in points")
+    parser.add_argument("--resample", action="store_true", help="Resample the input bars to 1 minute first")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--sort", default="total_points", help="Column to rank by")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    parser.add_argument("--output", help="Write the full results table to this CSV file")
+    args = parser.parse_args()
+
+    bars = pd.read_parquet(args.path) if args.path.endswith(".parquet") else pd.read_csv(args.path)
+    if args.resample:
+        bars = to_one_minute_bars(bars)
+    results = run_sweep(
+        bars, parse_values(args.fast, int), parse_values(args.slow, int),
+        parse_values(args.stop), parse_values(args.target), workers=args.workers, sort_by=args.sort,
+    )
+    print(results.head(args.top).to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
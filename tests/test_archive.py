@@ -0,0 +1,142 @@
+import json
+import numpy as np
+import pandas as pd
+from trading_app.archive import TickArchive, BarArchive, ArchiveWriter
+from trading_app.data_aggregation import DataAggregator
+from trading_app.decoders import TradeFrameDecoder
+from trading_app.websocket_handler import WebSocketHandler
+
+
+def test_ticks_are_partitioned_by_date_and_read_by_range(tmp_path):
+    """
+    Test appends across midnight, time-ranged memory-mapped reads and that
+    older re-delivered ticks are not stored twice.
+    """
+    archive = TickArchive(str(tmp_path))
+    timestamps = pd.date_range("2024-12-02 23:59:00", periods=120, freq="1s").as_unit("ns").asi8
+    prices = 21000 + np.arange(120) * 0.25
+    archive.append_ticks("NQ.Z24", timestamps[:100], prices[:100], np.ones(100))
+    assert archive.append_ticks("NQ.Z24", timestamps[50:], prices[50:], np.ones(70), history=True) == 20
+
+    assert archive.dates("NQ.Z24") == ["2024-12-02", "2024-12-03"]
+    day = archive.read("NQ.Z24", "2024-12-03", "2024-12-04")
+    assert isinstance(day["price"], np.memmap)
+    assert len(day["timestamp"]) == 60
+
+    window = archive.read("NQ.Z24", timestamps[30], timestamps[90])
+    assert window["timestamp"].tolist() == timestamps[30:90].tolist()
+    assert window["price"].tolist() == prices[30:90].tolist()
+
+    # A new process sees the same data and keeps appending after it
+    reopened = TickArchive(str(tmp_path))
+    assert reopened.last_timestamp("NQ.Z24") == timestamps[-1]
+    frame = reopened.read_frame("NQ.Z24")
+    assert len(frame) == 120 and frame["symbol"].eq("NQ.Z24").all()
+
+
+def test_torn_append_is_cut_off_before_appending_again(tmp_path):
+    """
+    Test that a row left in only some column files by an interrupted append is
+    dropped when the partition is next appended to, so the columns stay aligned.
+    """
+    archive = TickArchive(str(tmp_path))
+    timestamps = pd.date_range("2024-12-03 09:30", periods=4, freq="1s").as_unit("ns").asi8
+    archive.append_ticks("NQ.Z24", timestamps[:2], [21000.0, 21001.0], [1.0, 2.0])
+    with open(tmp_path / "NQ.Z24" / "2024-12-03" / "timestamp.bin", "ab") as column_file:
+        column_file.write(np.array([timestamps[2]], dtype="<i8").tobytes())
+
+    reopened = TickArchive(str(tmp_path))
+    reopened.append_ticks("NQ.Z24", timestamps[2:], [21002.0, 21003.0], [3.0, 4.0])
+    rows = reopened.read("NQ.Z24")
+    assert rows["timestamp"].tolist() == timestamps.tolist()
+    assert rows["price"].tolist() == [21000.0, 21001.0, 21002.0, 21003.0]
+    assert rows["volume"].tolist() == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_late_rows_are_merged_in_time_order(tmp_path):
+    """
+    Test that rows older than the newest archived row are merged into their
+    partitions in time order, and that only re-delivered history is skipped.
+    """
+    archive = TickArchive(str(tmp_path))
+    timestamps = pd.date_range("2024-12-02 23:59:50", periods=20, freq="1s").as_unit("ns").asi8
+    prices = 21000 + np.arange(20) * 0.25
+    live = np.r_[0:5, 12:20]
+    archive.append_ticks("NQ.Z24", timestamps[live], prices[live], np.ones(len(live)))
+
+    # A late live tick on the first day, then history spanning midnight with a re-delivered tick
+    assert archive.append_ticks("NQ.Z24", timestamps[[7]], prices[[7]], [1.0]) == 1
+    history = np.r_[5:7, 8:12, 3]
+    assert archive.append_ticks("NQ.Z24", timestamps[history], prices[history], np.ones(7), history=True) == 6
+    assert archive.merged == 7 and archive.duplicates == 1
+
+    reopened = TickArchive(str(tmp_path))
+    rows = reopened.read("NQ.Z24")
+    assert rows["timestamp"].tolist() == timestamps.tolist()
+    assert rows["price"].tolist() == prices.tolist()
+    assert reopened.last_timestamp("NQ.Z24") == timestamps[-1]
+
+    # A different trade at an archived timestamp is kept
+    assert reopened.append_ticks("NQ.Z24", timestamps[[2]], [20000.0], [5.0]) == 1
+    assert reopened.read("NQ.Z24", timestamps[2], timestamps[3])["price"].tolist() == [prices[2], 20000.0]
+
+
+def test_live_trades_with_the_same_timestamp_price_and_size_are_all_kept(tmp_path):
+    """
+    Test that distinct live trades equal in every column are stored even when
+    they arrive in different frames, while re-delivered history is stored once.
+    """
+    archive = TickArchive(str(tmp_path))
+    t = pd.Timestamp("2024-12-03 09:30").value
+    archive.append_ticks("NQ.Z24", [t, t], [21000.25, 21000.25], [1.0, 1.0])
+    assert archive.append_ticks("NQ.Z24", [t, t + 1_000_000], [21000.25, 21000.25], [1.0, 1.0]) == 2
+    assert len(archive.read("NQ.Z24")["timestamp"]) == 4 and archive.duplicates == 0
+
+    assert archive.append_ticks("NQ.Z24", [t, t], [21000.25, 21000.25], [1.0, 1.0], history=True) == 0
+    assert len(archive.read("NQ.Z24")["timestamp"]) == 4 and archive.duplicates == 2
+
+
+def test_writer_appends_on_a_background_thread(tmp_path):
+    """
+    Test that an ArchiveWriter applies queued appends in order off the calling
+    thread, and writes out everything queued when closed.
+    """
+    archive = BarArchive(str(tmp_path))
+    writer = ArchiveWriter(archive)
+    aggregator = DataAggregator()
+    aggregator.add_bar_listener(writer.append_bar)
+    timestamps = pd.date_range("2024-12-03 09:30", periods=90, freq="1s").as_unit("ns").asi8
+    aggregator.add_ticks("NQ.Z24", timestamps, 21000.0 + np.arange(90), np.ones(90))
+    writer.append_bars([{"timestamp": pd.Timestamp("2024-12-03 09:29:30"), "symbol": "NQ.Z24", "open": 1.0,
+                         "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1.0}])
+    writer.close()
+
+    archived = archive.read_frame("NQ.Z24")
+    assert archived["timestamp"].tolist() == list(pd.date_range("2024-12-03 09:29:30", periods=3, freq="30s"))
+    assert writer.written == 3 and writer.errors == 0 and writer.pending() == 0
+
+
+def test_live_feed_and_bars_are_archived(tmp_path):
+    """
+    Test that the WebSocket handler archives trades and that 30-second bars can
+    be archived through a DataAggregator bar listener.
+    """
+    ticks = TickArchive(str(tmp_path / "ticks"))
+    bars = BarArchive(str(tmp_path / "bars"))
+    handler = WebSocketHandler(decoder=TradeFrameDecoder(min_batch=1), archive=ticks)
+    aggregator = DataAggregator()
+    aggregator.add_bar_listener(bars.append_bar)
+
+    trades = [
+        {"symbol": "NQ.Z24", "price": 21000.0 + i, "volume": 1, "timestamp": f"2024-12-03T09:30:{i * 10:02d}",
+         "is_historical": i < 2}
+        for i in range(6)
+    ]
+    batch = handler.decoder.decode(json.dumps({"trades": trades}))
+    handler.handle_trade_batch(batch)
+    aggregator.add_ticks("NQ.Z24", batch.timestamps, batch.prices, batch.volumes)
+
+    assert len(ticks.read("NQ.Z24")["timestamp"]) == 6
+    archived = bars.read_frame("NQ.Z24")
+    assert archived["close"].tolist() == [21002.0]
+    assert archived["timestamp"].tolist() == [pd.Timestamp("2024-12-03 09:30:00")]
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+from trading_app.archive import BarArchive
+from trading_app.backfill import Backfill
+from trading_app.data_aggregation import DataAggregator
+from trading_app.decoders import JsonDecoder
+from trading_app.indicators import Indicators
+from trading_app.pipeline import TradingPipeline
+from trading_app.replay import ReplayEngine, RecordingOrderEntry
+from trading_app.trading_logic import TradingLogic
+from trading_app.websocket_handler import WebSocketHandler
+
+
+def make_ticks(minutes, start="2024-12-02", symbol="NQ.Z24"):
+    """
+    Ticks every 10 seconds on a slow sine wave.
+    """
+    timestamps = pd.date_range(start, periods=minutes * 6, freq="10s")
+    prices = np.round((21000 + 50 * np.sin(np.arange(len(timestamps)) / 3000)) * 4) / 4
+    return pd.DataFrame({"timestamp": timestamps, "symbol": symbol, "price": prices, "volume": 1.0})
+
+
+def test_backfilled_averages_match_a_full_replay_from_the_first_live_bar():
+    """
+    Test that seeding from history makes the full-window averages valid at
+    once, with the values a full replay of the same ticks produces.
+    """
+    ticks = make_ticks(1100)
+    history, live = ticks.iloc[:1090 * 6], ticks.iloc[1090 * 6:]
+
+    full = ReplayEngine()
+    full.replay(ticks)
+
+    warm = ReplayEngine()
+    produced = Backfill(warm.data_aggregator, warm.indicators).seed_ticks(history)
+    assert produced["NQ.Z24"] >= 1000
+    assert warm.indicators.ready("NQ.Z24")
+    assert warm.orders == []  # No strategy on history
+    warm.replay(live)
+
+    cold = ReplayEngine()
+    cold.replay(live)
+    assert not cold.indicators.ready("NQ.Z24")
+
+    expected = full.indicators.latest_moving_averages(9, "NQ.Z24")
+    actual = warm.indicators.latest_moving_averages(9, "NQ.Z24")
+    assert [row["timestamp"] for row in actual] == [row["timestamp"] for row in expected]
+    for row, expected_row in zip(actual, expected):
+        assert row["1000_minute"] == pytest.approx(expected_row["1000_minute"], rel=1e-12)
+        assert row["200_minute"] == pytest.approx(expected_row["200_minute"], rel=1e-12)
+
+
+def test_history_across_a_session_halt_still_fills_the_windows():
+    """
+    Test that history is cut by minutes with trades, not elapsed time, so a
+    daily halt inside it does not leave the longest average unfilled.
+    """
+    # 1140 minutes of trades with the 17:00-18:00 New York halt (22:00-23:00 UTC) in between
+    ticks = pd.concat([make_ticks(500, start="2024-12-02 13:40"), make_ticks(640, start="2024-12-02 23:00")],
+                      ignore_index=True)
+
+    warm = ReplayEngine()
+    produced = Backfill(warm.data_aggregator, warm.indicators).seed_ticks(ticks)
+    assert produced["NQ.Z24"] >= 1000
+    assert warm.indicators.ready("NQ.Z24")
+
+
+@pytest.mark.asyncio
+async def test_pipeline_seeds_from_historical_trades_before_live_ticks():
+    """
+    Test that historical trades sent on subscription warm the indicators
+    through the pipeline without running the strategy on them.
+    """
+    handler = WebSocketHandler(decoder=JsonDecoder())
+    trading_logic = TradingLogic(indicators=Indicators(handler, windows=(2, 5)), order_entry=RecordingOrderEntry())
+    pipeline = TradingPipeline(handler, DataAggregator(), trading_logic)
+    pipeline.aggregator_stage.start()
+
+    base = pd.Timestamp("2024-12-03 14:30").value
+    history = [
+        {"symbol": "NQ.Z24", "price": 21000.0 + second, "volume": 1, "timestamp": base + second * 10**9,
+         "is_historical": True}
+        for second in range(0, 600, 10)
+    ]
+    await handler.route_message({"trades": history})
+    for second in range(600, 700, 10):
+        trade = {"symbol": "NQ.Z24", "price": 21000.0, "volume": 1, "timestamp": base + second * 10**9}
+        await handler.route_message({"trades": [trade]})
+    # History sent again (as after a reconnect) is older than the live ticks and ignored
+    await handler.route_message({"trades": history})
+    await pipeline.join()
+    await pipeline.stop()
+
+    # Only the last max(window) + 1 minutes of history are used: minutes 3-8 close
+    assert pipeline.backfill.minute_bars["NQ.Z24"] == 6
+    assert trading_logic.indicators.ready("NQ.Z24")
+    # Only the live minutes reached the strategy
+    assert pipeline.stats()["strategy[NQ.Z24]"]["processed"] == 2
+    assert len(trading_logic.indicators.one_minute_records) == 8
+
+
+def test_seed_archive_then_ignore_older_stream_history(tmp_path):
+    """
+    Test seeding from archived 30-second bars, after which history the stream
+    sends for the same period adds nothing.
+    """
+    ticks = make_ticks(1100)
+    source = ReplayEngine()
+    archive = BarArchive(str(tmp_path / "bars_30s"))
+    source.data_aggregator.add_bar_listener(archive.append_bar)
+    source.replay(ticks)
+
+    warm = ReplayEngine()
+    backfill = Backfill(warm.data_aggregator, warm.indicators)
+    produced = backfill.seed_archive(archive, ["NQ.Z24"])
+    assert produced["NQ.Z24"] >= 1000
+    assert warm.indicators.ready("NQ.Z24")
+    assert warm.indicators.latest_moving_averages(1, "NQ.Z24")[0]["1000_minute"] == pytest.approx(
+        source.indicators.latest_moving_averages(1, "NQ.Z24")[0]["1000_minute"], rel=1e-12)
+
+    assert backfill.seed_ticks(ticks.iloc[:-6 * 3]) == {"NQ.Z24": 0}
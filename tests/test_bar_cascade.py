@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from trading_app.bar_cascade import BarCascade
+from trading_app.data_aggregation import DataAggregator
+
+
+def make_30s_bars(count, seed=11):
+    """
+    Build consecutive 30-second bars with a gap in the middle.
+    """
+    rng = np.random.default_rng(seed)
+    times = pd.date_range("2024-12-03 09:30", periods=count, freq="30s")
+    times = times[(times < "2024-12-03 10:07") | (times >= "2024-12-03 10:41:30")]
+    closes = 15800 + np.cumsum(rng.normal(0, 2, len(times)))
+    return pd.DataFrame({
+        "timestamp": times,
+        "symbol": "NQ",
+        "open": closes - 0.5,
+        "high": closes + rng.uniform(0, 3, len(times)),
+        "low": closes - rng.uniform(0, 3, len(times)),
+        "close": closes,
+        "volume": rng.integers(1, 100, len(times)),
+    })
+
+
+def test_cascade_matches_resample():
+    """
+    Test that every cascade level matches a full pandas resample of the 30-second bars.
+    """
+    bars = make_30s_bars(600)
+    cascade = BarCascade()
+    received = {timeframe: [] for timeframe in cascade.timeframes[1:]}
+    for timeframe, bucket in received.items():
+        cascade.subscribe(timeframe, bucket.append)
+
+    for bar in bars.to_dict("records"):
+        cascade.on_bar(bar)
+    cascade.flush()
+
+    for timeframe, closed in received.items():
+        expected = bars.set_index("timestamp").resample(timeframe).agg({
+            "open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum",
+        }).dropna().reset_index()
+        actual = pd.DataFrame(closed)
+        assert actual["timestamp"].tolist() == expected["timestamp"].tolist(), timeframe
+        for column in ("open", "high", "low", "close", "volume"):
+            np.testing.assert_allclose(actual[column], expected[column], err_msg=f"{timeframe} {column}")
+
+
+def test_minute_bar_closes_on_second_half():
+    """
+    Test that a 1-minute bar is emitted as soon as its second 30-second bar closes.
+    """
+    cascade = BarCascade()
+    minutes = []
+    cascade.subscribe("1min", minutes.append)
+    bar = {"symbol": "NQ", "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 3}
+
+    cascade.on_bar(dict(bar, timestamp=pd.Timestamp("2024-12-03 09:30:00")))
+    assert minutes == []
+    cascade.on_bar(dict(bar, timestamp=pd.Timestamp("2024-12-03 09:30:30"), high=4.0))
+    assert len(minutes) == 1
+    assert minutes[0]["high"] == 4.0 and minutes[0]["volume"] == 6
+
+
+def test_cascade_attached_to_aggregator():
+    """
+    Test that the cascade receives bars finalized by the DataAggregator.
+    """
+    aggregator = DataAggregator()
+    cascade = BarCascade()
+    cascade.attach(aggregator)
+    minutes = []
+    cascade.subscribe("1min", minutes.append)
+
+    ticks = pd.date_range("2024-12-03 09:30", periods=20, freq="10s")
+    aggregator.add_ticks("NQ", ticks, np.arange(20.0), np.ones(20, dtype=int))
+
+    assert [bar["timestamp"] for bar in minutes] == list(pd.date_range("2024-12-03 09:30", periods=3, freq="1min"))
+    print("Bar cascade test passed!")
@@ -0,0 +1,107 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from trading_app.archive import TickArchive
+from trading_app.checkpoint import Checkpointer
+from trading_app.indicators import Indicators
+from trading_app.replay import ReplayEngine
+
+
+def make_trend_ticks(minutes=1500, turn=1200, symbol="NQ.Z24"):
+    """
+    Ticks every 10 seconds: a falling market that turns up after `turn` minutes.
+    """
+    timestamps = pd.date_range("2024-12-02", periods=minutes * 6, freq="10s")
+    elapsed = np.arange(len(timestamps)) / 6
+    prices = np.where(elapsed < turn, 21000 - elapsed, 21000 - turn + 3 * (elapsed - turn))
+    return pd.DataFrame({"timestamp": timestamps, "symbol": symbol, "price": prices, "volume": 1.0})
+
+
+def test_restore_replays_archived_ticks_since_the_checkpoint(tmp_path):
+    """
+    Test that restoring a checkpoint and replaying the ticks archived after it
+    gives the state of a run that never stopped, without sending orders again.
+    """
+    ticks = make_trend_ticks()
+    archive = TickArchive(str(tmp_path / "ticks"))
+    archive.append_records(ticks)
+    before, after = ticks.iloc[:1450 * 6 + 2], ticks.iloc[1450 * 6 + 2:]
+
+    uninterrupted = ReplayEngine()
+    uninterrupted.replay(ticks)
+
+    crashed = ReplayEngine()
+    crashed.replay(before)
+    assert crashed.trading_logic.positions == {"NQ.Z24": "LONG"}
+    path = str(tmp_path / "state" / "checkpoint.bin")
+    Checkpointer(path, crashed.data_aggregator, crashed.indicators, crashed.trading_logic).save()
+    assert not os.path.exists(path + ".tmp")
+
+    restarted = ReplayEngine()
+    checkpointer = Checkpointer(path, restarted.data_aggregator, restarted.indicators, restarted.trading_logic,
+                                tick_archive=archive)
+    assert checkpointer.restore() == {"NQ.Z24": len(after)}
+    assert restarted.orders == []
+    assert restarted.trading_logic.positions == {"NQ.Z24": "LONG"}
+    assert restarted.trading_logic.last_signals == {"NQ.Z24": "BUY"}
+
+    symbol = "NQ.Z24"
+    assert restarted.data_aggregator.aggregated_bars[symbol] == uninterrupted.data_aggregator.aggregated_bars[symbol]
+    assert restarted.data_aggregator.open_bars[symbol] == uninterrupted.data_aggregator.open_bars[symbol]
+    assert restarted.indicators.cascade.snapshot() == uninterrupted.indicators.cascade.snapshot()
+    assert restarted.indicators.one_minute_records == uninterrupted.indicators.one_minute_records
+    expected = uninterrupted.indicators.latest_moving_averages(60, symbol)
+    actual = restarted.indicators.latest_moving_averages(60, symbol)
+    assert [row["timestamp"] for row in actual] == [row["timestamp"] for row in expected]
+    for row, expected_row in zip(actual, expected):
+        assert row["1000_minute"] == pytest.approx(expected_row["1000_minute"], rel=1e-12)
+        assert row["200_minute"] == pytest.approx(expected_row["200_minute"], rel=1e-12)
+
+
+def test_crossover_traded_after_the_checkpoint_is_not_traded_again(tmp_path):
+    """
+    Test that a crossover traded between the last checkpoint and a crash is
+    not traded again once the restarted strategy sees live bars.
+    """
+    ticks = make_trend_ticks()
+    checkpoint_at, crash_at = 1425 * 6, 1428 * 6 + 2  # The BUY goes out at 23:46
+    archive = TickArchive(str(tmp_path / "ticks"))
+    archive.append_records(ticks.iloc[:crash_at])
+    path = str(tmp_path / "checkpoint.bin")
+
+    crashed = ReplayEngine()
+    crashed.replay(ticks.iloc[:checkpoint_at])
+    assert crashed.orders == []
+    Checkpointer(path, crashed.data_aggregator, crashed.indicators, crashed.trading_logic).save()
+    crashed.replay(ticks.iloc[checkpoint_at:crash_at])
+    assert [order["side"] for order in crashed.orders] == ["BUY"]
+
+    restarted = ReplayEngine()
+    Checkpointer(path, restarted.data_aggregator, restarted.indicators, restarted.trading_logic,
+                 tick_archive=archive).restore()
+    restarted.replay(ticks.iloc[crash_at:])
+    assert restarted.orders == []
+    assert restarted.trading_logic.last_signals == {"NQ.Z24": "BUY"}
+
+
+def test_unusable_checkpoints_are_ignored(tmp_path):
+    """
+    Test that a damaged checkpoint or one taken with other moving average
+    windows is ignored and leaves the components untouched.
+    """
+    engine = ReplayEngine()
+    engine.replay(make_trend_ticks(minutes=30))
+    path = str(tmp_path / "checkpoint.bin")
+    Checkpointer(path, engine.data_aggregator, engine.indicators).save()
+
+    other_windows = Indicators(windows=(5, 10), retention=0, ma_retention=0)
+    assert Checkpointer(path, ReplayEngine().data_aggregator, other_windows).restore() is None
+    assert other_windows.one_minute_records == []
+
+    with open(path, "r+b") as checkpoint_file:
+        checkpoint_file.truncate(os.path.getsize(path) // 2)
+    fresh = ReplayEngine()
+    assert Checkpointer(path, fresh.data_aggregator, fresh.indicators).restore() is None
+    assert Checkpointer(str(tmp_path / "missing.bin"), fresh.data_aggregator, fresh.indicators).restore() is None
+    assert fresh.data_aggregator.last_tick == {}
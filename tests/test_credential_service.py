@@ -0,0 +1,135 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from trading_app.auth import Authenticator
+from trading_app.constants import DEMO_CREDENTIALS, LIVE_CREDENTIALS
+from trading_app.credential_service import CredentialService
+from trading_app.streamID_handler import StreamIDHandler
+from trading_app.order_entry import OrderEntry
+
+
+class CountingAuthHandler(BaseHTTPRequestHandler):
+    """
+    Serves /auth and /stream/create and counts the calls to each.
+    """
+    calls = {"auth": 0, "stream": 0}
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.calls["auth"] += 1
+        self._reply({"token": f"token-{self.calls['auth']}"})
+
+    def do_GET(self):
+        self.calls["stream"] += 1
+        self._reply({"streamId": f"stream-{self.calls['stream']}"})
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    CountingAuthHandler.calls.update(auth=0, stream=0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingAuthHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+
+def make_service(api_url, **kwargs):
+    authenticator = Authenticator(demo_credentials=DEMO_CREDENTIALS, live_credentials=LIVE_CREDENTIALS)
+    authenticator.api_url = api_url
+    return CredentialService(authenticator=authenticator, api_url=api_url, **kwargs)
+
+
+def test_components_share_one_authentication(tmp_path):
+    """
+    Test that stream handlers and order entry authenticate once, and that a
+    warm restart reuses the cached token and spare streamId.
+    """
+    server, api_url = start_server()
+    cache_path = str(tmp_path / "session.json")
+    try:
+        service = make_service(api_url, cache_path=cache_path)
+        first = StreamIDHandler(service)
+        second = StreamIDHandler(service)
+        order_entry = OrderEntry(authenticator=service, api_url=api_url)
+
+        assert first.get_stream_id() != second.get_stream_id()
+        assert order_entry.headers["Authorization"] == "Bearer token-1"
+        assert CountingAuthHandler.calls == {"auth": 1, "stream": 2}
+
+        # A spare streamId is ready, so a refresh does not wait on /stream/create
+        service.top_up_stream_ids()
+        calls_before = dict(CountingAuthHandler.calls)
+        first.refresh_stream_id()
+        assert first.stream_id == "stream-3"
+        assert CountingAuthHandler.calls == calls_before
+
+        # A new process picks up the cached token without calling /auth
+        service.top_up_stream_ids()
+        restarted = make_service(api_url, cache_path=cache_path)
+        assert restarted.get_token() == "token-1"
+        assert restarted.get_stream_id() == "stream-4"
+        assert CountingAuthHandler.calls["auth"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_background_refresh_renews_expiring_token():
+    """
+    Test that the refresh thread re-authenticates before the token expires.
+    """
+    server, api_url = start_server()
+    try:
+        service = make_service(api_url, token_ttl=0.5, refresh_margin=0.4)
+        service.get_token()
+        service.start_refresh(interval=0.05)
+        threading.Event().wait(0.5)
+        service.stop_refresh()
+
+        assert CountingAuthHandler.calls["auth"] >= 2
+        assert service.stream_ids  # A spare streamId was prepared as well
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_token_is_served_while_a_refresh_is_in_flight():
+    """
+    Test that get_token() returns the cached token at once while a background
+    re-authentication is waiting on /auth, and the new token afterwards.
+    """
+    class SlowAuthenticator:
+        def __init__(self):
+            self.calls = 0
+            self.release = threading.Event()
+
+        def authenticate(self):
+            self.calls += 1
+            if self.calls > 1:
+                self.release.wait(5)
+            return f"token-{self.calls}"
+
+    authenticator = SlowAuthenticator()
+    service = CredentialService(authenticator=authenticator, cache_path=None)
+    assert service.get_token() == "token-1"
+    refresh = threading.Thread(target=service.authenticate)
+    refresh.start()
+    while authenticator.calls < 2:
+        time.sleep(0.001)
+
+    started = time.monotonic()
+    assert service.get_token() == "token-1"
+    assert time.monotonic() - started < 0.5
+    authenticator.release.set()
+    refresh.join()
+    assert service.get_token() == "token-2" and authenticator.calls == 2
@@ -1,3 +1,5 @@
+import numpy as np
+import pandas as pd
 from trading_app.data_aggregation import DataAggregator
 
 def test_data_aggregation_with_simulated_data():
@@ -35,3 +37,32 @@ def test_data_aggregation_with_simulated_data():
     assert bars[1]["close"] == 15804.0
     assert bars[1]["volume"] == 32
     print("Simulated data aggregation test passed!")
+
+
+def test_batch_aggregation_matches_per_tick_path():
+    """
+    Test that add_ticks builds the same bars as add_tick, including partial bars.
+    """
+    rng = np.random.default_rng(3)
+    start = pd.Timestamp("2024-12-03T09:30:00").value
+    # Mostly increasing times with some ticks arriving slightly out of order
+    timestamps = start + np.cumsum(rng.integers(0, 4_000_000_000, 2000)) - rng.integers(0, 2_000_000_000, 2000)
+    prices = 15800 + np.round(np.cumsum(rng.normal(0, 1, 2000)) * 4) / 4
+    volumes = rng.integers(1, 20, 2000)
+
+    per_tick = DataAggregator()
+    batch = DataAggregator()
+    for i, (t, p, v) in enumerate(zip(timestamps.tolist(), prices.tolist(), volumes.tolist())):
+        per_tick.add_tick({"timestamp": pd.Timestamp(t), "symbol": "NQ", "price": p, "volume": v})
+        if i == 999:
+            per_tick.get_aggregated_bars("NQ")  # Finalize the partial bar mid-stream
+
+    batch.add_ticks("NQ", timestamps[:700], prices[:700], volumes[:700])
+    batch.add_ticks("NQ", timestamps[700:1000], prices[700:1000], volumes[700:1000])
+    batch.get_aggregated_bars("NQ")
+    batch.add_ticks("NQ", timestamps[1000:], prices[1000:], volumes[1000:])
+
+    expected = per_tick.get_aggregated_bars("NQ")
+    actual = batch.get_aggregated_bars("NQ")
+    assert len(actual) == len(expected)
+    assert actual == expected
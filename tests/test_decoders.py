@@ -0,0 +1,47 @@
+import json
+import pytest
+import asyncio
+from trading_app.decoders import JsonDecoder, TradeFrameDecoder, TradeBatch
+from trading_app.websocket_handler import WebSocketHandler
+
+TRADES = [
+    {"symbol": "NQ.Z24", "price": 21000.25, "volume": 2, "timestamp": "2024-12-03T09:30:00.100"},
+    {"symbol": "ES.Z24", "price": 6050.5, "volume": 1, "timestamp": "2024-12-03T09:30:00.200"},
+    {"symbol": "NQ.Z24", "price": 21000.5, "volume": 4, "timestamp": "2024-12-03T09:30:00.300", "is_historical": True},
+    {"symbol": "NQ.Z24", "price": 21000.75, "volume": 3, "timestamp": "2024-12-03T09:30:00.400"},
+]
+
+
+def test_trade_frames_decode_to_columns():
+    """
+    Test that trade frames become a TradeBatch and other frames stay JSON.
+    """
+    decoder = TradeFrameDecoder(min_batch=1)
+    batch = decoder.decode(json.dumps({"trades": TRADES}))
+    assert isinstance(batch, TradeBatch)
+    assert batch.symbols.tolist() == ["NQ.Z24", "ES.Z24", "NQ.Z24", "NQ.Z24"]
+    assert batch.prices.tolist() == [21000.25, 6050.5, 21000.5, 21000.75]
+    assert batch.is_historical.tolist() == [False, False, True, False]
+
+    assert decoder.decode('{"p": {"status": "ok"}}') == {"p": {"status": "ok"}}
+    assert isinstance(TradeFrameDecoder(min_batch=10).decode(json.dumps({"trades": TRADES})), dict)
+
+
+@pytest.mark.asyncio
+async def test_fast_and_stdlib_paths_store_the_same_ticks():
+    """
+    Test that the typed path fills the tick store exactly like the dictionary path.
+    """
+    frame = json.dumps({"trades": TRADES})
+    stdlib = WebSocketHandler(decoder=JsonDecoder())
+    fast = WebSocketHandler(decoder=TradeFrameDecoder(min_batch=1))
+    published = asyncio.Queue()
+    fast.add_tick_queue(published)
+
+    await stdlib.route_message(stdlib.decoder.decode(frame))
+    await fast.route_message(fast.decoder.decode(frame))
+
+    assert stdlib.live_data.equals(fast.live_data)
+    assert stdlib.historical_data.equals(fast.historical_data)
+    _, live = published.get_nowait()
+    assert len(live) == 3
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+from trading_app.indicator_graph import IndicatorGraph, INDICATORS
+from trading_app.indicators import Indicators
+from trading_app.records import Bar
+
+
+def make_bars(count=600, symbol="NQ.Z24", seed=3):
+    """
+    Random-walk 1-minute bars of one symbol.
+    """
+    rng = np.random.default_rng(seed)
+    closes = 21000 + np.cumsum(rng.normal(0, 3, count))
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    highs = np.maximum(opens, closes) + rng.uniform(0, 2, count)
+    lows = np.minimum(opens, closes) - rng.uniform(0, 2, count)
+    volumes = rng.integers(0, 50, count).astype(float)
+    start = pd.Timestamp("2024-12-02 14:30").value
+    return [Bar(start + minute * 60_000_000_000, symbol, *values)
+            for minute, values in enumerate(zip(opens.tolist(), highs.tolist(), lows.tolist(), closes.tolist(),
+                                                volumes.tolist()))]
+
+
+def test_incremental_values_match_the_batch_form():
+    """
+    Test that every built-in indicator gives the same values bar by bar as
+    computed over the whole history at once.
+    """
+    graph = IndicatorGraph()
+    keys = [graph.require("sma", window=20), graph.require("ema", window=30), graph.require("atr", window=14),
+            graph.require("vwap", window=15), graph.require("stddev", window=20), graph.require("bollinger")]
+    assert {key[1] for key in keys} == set(INDICATORS)
+    bars = make_bars()
+
+    streamed = {key: [] for key in keys}
+    for bar in bars:
+        values = graph.update(bar)
+        for key in keys:
+            streamed[key].append(values[key])
+    batch = graph.batch(bars)
+
+    for key in keys[:-1]:
+        np.testing.assert_allclose(streamed[key], batch[graph.label(key)], rtol=1e-9, equal_nan=True)
+    bands = np.array(streamed[keys[-1]])
+    for position, field in enumerate(("middle", "upper", "lower")):
+        np.testing.assert_allclose(bands[:, position], batch[f"bollinger_20_2.0_{field}"], rtol=1e-9, equal_nan=True)
+
+
+def test_nodes_are_shared_and_computed_once_per_bar():
+    """
+    Test that equal requests share one node, that Bollinger Bands reuse the SMA
+    and standard deviation nodes, and that each node is updated once per bar.
+    """
+    graph = IndicatorGraph()
+    sma = graph.require("sma", window=20)
+    assert graph.require("sma", window=20, min_periods=None) == sma
+    graph.require("bollinger", window=20)
+    graph.require("stddev", window=20, ddof=0)
+    assert len(graph.nodes) == 3
+
+    for bar in make_bars(50) + make_bars(50, symbol="ESZ24", seed=4):
+        graph.update(bar)
+    assert graph.updates == 3 * 100
+    assert graph.value("ESZ24", sma) != graph.value("NQ.Z24", sma)
+    with pytest.raises(ValueError):
+        graph.require("macd")
+
+
+def test_multi_value_nodes_are_ready_once_every_field_is_defined():
+    """
+    Test that a Bollinger node is not ready while its window is filling, when
+    its value is a tuple of NaNs, and is ready once the window is full.
+    """
+    graph = IndicatorGraph()
+    bands = graph.require("bollinger", window=20)
+    bars = make_bars(20)
+    for bar in bars[:19]:
+        graph.update(bar)
+    assert isinstance(graph.value("NQ.Z24", bands), tuple)
+    assert not graph.ready("NQ.Z24", [bands])
+
+    graph.update(bars[19])
+    assert graph.ready("NQ.Z24", [bands])
+
+
+def test_indicators_update_graph_nodes_on_every_timeframe():
+    """
+    Test that Indicators updates its moving averages and required indicators
+    of other timeframes from the cascade, and keeps them in a snapshot.
+    """
+    indicators = Indicators(windows=(3, 5), retention=0, ma_retention=0)
+    atr_5min = indicators.require("atr", timeframe="5min", window=2)
+    sma_3 = indicators.require("sma", window=3)
+    assert sma_3 == indicators.ma_keys[3]
+
+    start = pd.Timestamp("2024-12-02 14:30").value
+    for step in range(60):
+        close = 21000.0 + step
+        bar = Bar(start + step * 30_000_000_000, "NQ.Z24", close, close + 1, close - 1, close, 1.0)
+        for minute_bar in indicators.add_bar(bar):
+            indicators.update_moving_averages(minute_bar)
+
+    assert indicators.ready("NQ.Z24")
+    assert indicators.latest_moving_averages(1, "NQ.Z24")[0]["3_minute"] == indicators.value("NQ.Z24", sma_3)
+    assert indicators.value("NQ.Z24", atr_5min) == pytest.approx(11.0)  # Range of ten 30-second bars
+
+    restored = Indicators(windows=(3, 5), retention=0, ma_retention=0)
+    restored.require("atr", timeframe="5min", window=2)
+    restored.restore(indicators.snapshot())
+    assert restored.value("NQ.Z24", atr_5min) == indicators.value("NQ.Z24", atr_5min)
@@ -0,0 +1,76 @@
+import time
+import numpy as np
+import pytest
+from trading_app.latency import LatencyHistogram, get_latency_recorder, set_origin, reset_origin, stamp
+from trading_app.data_aggregation import DataAggregator
+from trading_app.indicators import Indicators
+from trading_app.pipeline import TradingPipeline
+from trading_app.replay import RecordingOrderEntry
+from trading_app.trading_logic import TradingLogic
+from trading_app.websocket_handler import WebSocketHandler
+from trading_app.decoders import JsonDecoder
+
+
+def test_histogram_percentiles_within_bucket_precision():
+    """
+    Test that percentiles match exact ones to within the bucket width.
+    """
+    values = np.random.default_rng(3).lognormal(mean=11, sigma=1.5, size=20_000).astype("int64")
+    histogram = LatencyHistogram()
+    for value in values.tolist():
+        histogram.record(value)
+
+    assert histogram.count == len(values)
+    assert histogram.max == values.max()
+    for percentile in (50, 90, 99, 99.9):
+        exact = np.percentile(values, percentile, method="inverted_cdf")
+        assert abs(histogram.percentile(percentile) - exact) <= exact / 64
+
+    merged = LatencyHistogram()
+    merged.merge(histogram)
+    merged.merge(histogram)
+    assert merged.count == 2 * len(values)
+    assert merged.percentile(50) == histogram.percentile(50)
+
+
+def test_stamp_outside_a_tick_records_nothing():
+    """
+    Test that stamps made outside the processing of a tick are ignored.
+    """
+    recorder = get_latency_recorder()
+    recorder.reset()
+    stamp("idle")
+    assert "idle" not in recorder.snapshot()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_stages_are_stamped_from_the_originating_tick():
+    """
+    Test that a tick's arrival stamp follows it through every pipeline stage.
+    """
+    recorder = get_latency_recorder()
+    recorder.reset()
+    handler = WebSocketHandler(decoder=JsonDecoder())
+    trading_logic = TradingLogic(indicators=Indicators(handler), order_entry=RecordingOrderEntry())
+    pipeline = TradingPipeline(handler, DataAggregator(), trading_logic)
+    for stage in pipeline.stages:
+        stage.start()
+
+    # Ticks spanning three minutes close two 1-minute bars
+    base = 1_733_218_200_000_000_000
+    for second in range(0, 181, 10):
+        token = set_origin(time.monotonic_ns())
+        try:
+            trade = {"symbol": "NQ.Z24", "price": 21000.0 + second, "volume": 1, "timestamp": base + second * 10**9}
+            await handler.route_message({"trades": [trade]})
+        finally:
+            reset_origin(token)
+    await pipeline.join()
+    await pipeline.stop()
+
+    snapshot = recorder.snapshot()
+    for stage in ("add_tick", "bar_close", "aggregator", "update_moving_averages", "indicators",
+                  "execute_strategy", "strategy"):
+        assert snapshot[stage]["count"] > 0
+    assert snapshot["add_tick"]["count"] == 19
+    assert snapshot["strategy"]["p50_us"] >= snapshot["add_tick"]["min_us"]
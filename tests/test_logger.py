@@ -0,0 +1,81 @@
+import io
+import time
+import json
+import queue
+import logging
+from trading_app.utils.logger import (
+    configure_logging, shutdown_logging, get_logger, RateLimitFilter, NonBlockingQueueHandler,
+)
+
+
+def test_records_are_written_as_json_with_category_levels_and_sampling():
+    """
+    Test that the background writer emits one JSON object per record, honours
+    per-category levels and keeps one sampled record in N.
+    """
+    output = io.StringIO()
+    configure_logging(level="INFO", levels={"trades": "DEBUG", "bars": "WARNING"},
+                      sampling={"trades": 10}, rate_limits={}, log_format="json", stream=output)
+    try:
+        trades = get_logger("trades")
+        for number in range(100):
+            trades.debug("[Live Trade]", extra={"data": {"symbol": "NQ.Z24", "price": 21000.0 + number}})
+        get_logger("bars").info("Aggregated 30-second bar")  # Below the bars level
+        get_logger("stream").info("Subscribed to %s", "NQ.Z24")
+    finally:
+        shutdown_logging()
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    trade_lines = [line for line in lines if line["category"] == "trades"]
+    assert [line["price"] for line in trade_lines] == [21000.0 + number for number in range(0, 100, 10)]
+    assert trade_lines[0]["level"] == "DEBUG" and trade_lines[0]["symbol"] == "NQ.Z24"
+    assert [line["message"] for line in lines if line["category"] != "trades"] == ["Subscribed to NQ.Z24"]
+    assert logging.getLogger("trading_app").propagate
+
+
+def test_rate_limit_reports_suppressed_records():
+    """
+    Test the token bucket: records over the rate are dropped and counted on the
+    next record let through; warnings always pass.
+    """
+    now = [0.0]
+    limit = RateLimitFilter(2, clock=lambda: now[0])
+    record = lambda level=logging.INFO: logging.LogRecord("trading_app.trades", level, "", 0, "trade", None, None)
+
+    assert [limit.filter(record()) for _ in range(5)] == [True, True, False, False, False]
+    assert limit.filter(record(logging.WARNING))
+    now[0] = 1.0
+    passed = record()
+    assert limit.filter(passed) and passed.suppressed == 3
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """
+    Test that a full log queue drops records rather than blocking the caller.
+    """
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    for _ in range(3):
+        handler.emit(logging.LogRecord("trading_app.trades", logging.INFO, "", 0, "trade", None, None))
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 2
+
+
+def test_shutdown_waits_for_room_in_a_full_queue():
+    """
+    Test that stopping the writer while the queue is full writes out the queued
+    records instead of raising queue.Full.
+    """
+    class SlowStream(io.StringIO):
+        def write(self, text):
+            time.sleep(0.005)
+            return super().write(text)
+
+    output = SlowStream()
+    handler = configure_logging(level="INFO", levels={}, sampling={}, rate_limits={}, queue_size=5, stream=output)
+    for number in range(50):
+        get_logger("trades").info("trade %d", number)
+    assert handler.queue.full()
+    shutdown_logging()
+
+    written = output.getvalue().splitlines()
+    assert len(written) == 50 - handler.dropped
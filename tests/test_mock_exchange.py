@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from trading_app.auth import Authenticator
+from trading_app.constants import DEMO_CREDENTIALS, LIVE_CREDENTIALS, SYMBOLS
+from trading_app.credential_service import CredentialService
+from trading_app.streamID_handler import StreamIDHandler
+from trading_app.websocket_handler import WebSocketHandler
+from trading_app.order_entry import OrderEntry
+from trading_app.mock_exchange import MockExchange
+
+
+def make_service(exchange):
+    authenticator = Authenticator(DEMO_CREDENTIALS, LIVE_CREDENTIALS, api_url=exchange.api_url)
+    return CredentialService(authenticator=authenticator, api_url=exchange.api_url)
+
+
+@pytest.mark.asyncio
+async def test_websocket_handler_streams_from_mock_exchange():
+    """
+    Test that the real WebSocketHandler authenticates, subscribes and stores
+    historical and live ticks served by the mock exchange.
+    """
+    with MockExchange(rate=2000, historical_ticks=5, max_ticks=200) as exchange:
+        handler = WebSocketHandler(StreamIDHandler(make_service(exchange)), stream_url=exchange.stream_url)
+        task = asyncio.create_task(handler.connect())
+        for _ in range(100):
+            if len(handler.live_ticks) >= 200:
+                break
+            await asyncio.sleep(0.05)
+        await handler.close_connection()
+        await task
+
+        assert len(handler.live_ticks) == 200
+        assert len(handler.historical_ticks) == 5 * len(SYMBOLS)
+        assert set(handler.live_ticks.symbols()) == set(SYMBOLS.values())
+        assert {message["symbol"] for message in exchange.subscriptions} == set(SYMBOLS.values())
+
+
+def test_order_entry_round_trip_against_mock_exchange():
+    """
+    Test placing, modifying, cancelling and querying orders through OrderEntry.
+    """
+    with MockExchange() as exchange:
+        order_entry = OrderEntry(authenticator=make_service(exchange), api_url=exchange.api_url)
+        try:
+            bracket = order_entry.place_bracket_order("NQ.Z24", 1, 21000.0, 20990.0, 21020.0, "BUY")
+            assert bracket["status"] == "WORKING"
+
+            order_entry.modify_order(bracket["orderId"], new_price=21001.0)
+            assert order_entry.get_order_status(bracket["orderId"])["price"] == 21001.0
+
+            assert order_entry.cancel_order(bracket["orderId"])["status"] == "CANCELLED"
+            assert order_entry.place_market_order("NQ.Z24", 1, "SELL")["status"] == "FILLED"
+            assert len(exchange.orders) == 2
+        finally:
+            order_entry.close()
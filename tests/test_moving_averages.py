@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from trading_app.moving_averages import RollingMean, MovingAverageEngine
+
+
+def test_rolling_mean_matches_pandas():
+    """
+    Test the streaming rolling mean against pandas rolling().mean().
+    """
+    rng = np.random.default_rng(7)
+    closes = 15800 + np.cumsum(rng.normal(0, 2.5, 5000))
+    closes[[10, 11, 400]] = np.nan  # Gaps count toward the window but not the mean
+
+    for window, min_periods in ((1, 1), (200, 1), (1000, 1), (200, 200)):
+        expected = pd.Series(closes).rolling(window=window, min_periods=min_periods).mean().to_numpy()
+        average = RollingMean(window, min_periods)
+        actual = np.array([average.update(close) for close in closes])
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, equal_nan=True)
+
+
+def test_moving_average_engine_per_symbol():
+    """
+    Test that each symbol keeps independent moving average state.
+    """
+    engine = MovingAverageEngine((2, 3))
+    engine.update("NQ", 10.0)
+    engine.update("ES", 100.0)
+    engine.update("NQ", 20.0)
+    latest = engine.update("NQ", 30.0)
+
+    assert latest == {2: 25.0, 3: 20.0}
+    assert engine.latest("ES") == {2: 100.0, 3: 100.0}
+    print("Moving average engine test passed!")
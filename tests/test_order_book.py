@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+from trading_app.auth import Authenticator
+from trading_app.constants import DEMO_CREDENTIALS, LIVE_CREDENTIALS
+from trading_app.credential_service import CredentialService
+from trading_app.streamID_handler import StreamIDHandler
+from trading_app.websocket_handler import WebSocketHandler
+from trading_app.order_entry import OrderEntry
+from trading_app.order_gateway import AsyncOrderGateway
+from trading_app.order_book import OrderBook
+from trading_app.mock_exchange import MockExchange
+
+
+def test_events_move_positions_once():
+    """
+    Test that partial fills build the position and its average price, and that
+    an order event or fill seen again (stream and poll) is not counted twice.
+    """
+    book = OrderBook()
+    book.add_submitted({"orderId": "A1", "status": "WORKING"},
+                       {"symbol": "NQ.Z24", "side": "BUY", "quantity": 3, "orderType": "LIMIT"})
+    assert book.working_orders("NQ.Z24") == {"A1": book.get("A1")}
+
+    book.apply({"fills": [{"fillId": "F1", "orderId": "A1", "quantity": 1, "price": 21000.0}]})
+    book.apply({"fills": [{"fillId": "F1", "orderId": "A1", "quantity": 1, "price": 21000.0}]})
+    assert book.position("NQ.Z24") == 1 and book.side("NQ.Z24") == "LONG"
+
+    book.apply({"orders": [{"orderId": "A1", "status": "FILLED", "filledQuantity": 3, "avgFillPrice": 21002.0}]})
+    book.on_order({"orderId": "A1", "status": "FILLED", "filledQuantity": 3, "avgFillPrice": 21002.0}, streamed=False)
+    assert book.position("NQ.Z24") == 3
+    assert book.average_prices["NQ.Z24"] == pytest.approx(21002.0)
+    assert book.working_orders("NQ.Z24") == {}
+
+    book.apply({"orders": [{"orderId": "S1", "symbol": "NQ.Z24", "side": "SELL", "quantity": 3,
+                            "status": "FILLED", "filledQuantity": 3, "avgFillPrice": 21010.0}]})
+    assert book.position("NQ.Z24") == 0 and book.sides == {}
+    assert book.stats()["events"] == 4
+
+
+def test_partial_fill_reported_by_order_event_and_fill_counts_once():
+    """
+    Test that a partial fill reported both by an order event and by a fill
+    event moves the position once, whichever of the two arrives first.
+    """
+    order_first = OrderBook()
+    order_first.add_submitted({"orderId": "A1", "status": "WORKING"},
+                              {"symbol": "NQ.Z24", "side": "BUY", "quantity": 3, "orderType": "LIMIT"})
+    order_first.apply({"orders": [{"orderId": "A1", "status": "WORKING", "filledQuantity": 1,
+                                   "avgFillPrice": 21000.0}]})
+    order_first.apply({"fills": [{"fillId": "a", "orderId": "A1", "quantity": 1, "price": 21000.0}]})
+    assert order_first.position("NQ.Z24") == 1
+    order_first.apply({"fills": [{"fillId": "b", "orderId": "A1", "quantity": 1, "price": 21002.0}]})
+    assert order_first.position("NQ.Z24") == 2
+
+    fill_first = OrderBook()
+    fill_first.add_submitted({"orderId": "A1", "status": "WORKING"},
+                             {"symbol": "NQ.Z24", "side": "BUY", "quantity": 3, "orderType": "LIMIT"})
+    fill_first.apply({"fills": [{"fillId": "a", "orderId": "A1", "quantity": 1, "price": 21000.0}]})
+    fill_first.apply({"orders": [{"orderId": "A1", "status": "WORKING", "filledQuantity": 1,
+                                  "avgFillPrice": 21000.0}]})
+    assert fill_first.position("NQ.Z24") == 1
+    fill_first.apply({"orders": [{"orderId": "A1", "status": "WORKING", "filledQuantity": 2,
+                                  "avgFillPrice": 21001.0}]})
+    fill_first.apply({"fills": [{"fillId": "b", "orderId": "A1", "quantity": 1, "price": 21002.0}]})
+    assert fill_first.position("NQ.Z24") == 2
+    assert fill_first.average_prices["NQ.Z24"] == pytest.approx(21001.0)
+
+
+def test_poll_replaces_positions_and_old_orders_are_forgotten():
+    """
+    Test that a bulk poll sets positions (flattening symbols it does not list)
+    and that only `retention` closed orders are kept.
+    """
+    book = OrderBook(retention=2)
+    book.on_position({"symbol": "ESZ24", "quantity": 2})
+    book.sync([{"orderId": f"C{number}", "symbol": "NQ.Z24", "side": "BUY", "quantity": 1, "status": "CANCELLED"}
+               for number in range(4)], [{"symbol": "NQ.Z24", "quantity": 1, "side": "SHORT"}])
+
+    assert book.positions == {"NQ.Z24": -1} and book.sides == {"NQ.Z24": "SHORT"}
+    assert list(book.orders) == ["C2", "C3"] and book.polls == 1
+
+
+@pytest.mark.asyncio
+async def test_order_book_follows_the_stream_and_the_poll():
+    """
+    Test that order events from the mock exchange reach the book over the
+    stream connection, and that a bulk poll gives the same positions.
+    """
+    with MockExchange(rate=200) as exchange:
+        authenticator = Authenticator(DEMO_CREDENTIALS, LIVE_CREDENTIALS, api_url=exchange.api_url)
+        service = CredentialService(authenticator=authenticator, api_url=exchange.api_url)
+        handler = WebSocketHandler(StreamIDHandler(service), stream_url=exchange.stream_url)
+        book = OrderBook()
+        handler.add_order_listener(book.apply)
+        task = asyncio.create_task(handler.connect())
+        for _ in range(100):
+            if exchange.order_streams and exchange.last_prices:
+                break
+            await asyncio.sleep(0.02)
+
+        gateway = AsyncOrderGateway(OrderEntry(authenticator=service, api_url=exchange.api_url))
+        try:
+            await gateway.place_market_order("NQ.Z24", 2, "BUY")
+            working = await gateway.place_limit_order("NQ.Z24", 1, 20000.0, "SELL")
+            for _ in range(100):
+                if book.get(working["orderId"]) is not None:
+                    break
+                await asyncio.sleep(0.02)
+            assert book.position("NQ.Z24") == 2
+            assert list(book.working_orders("NQ.Z24")) == [working["orderId"]]
+
+            polled = OrderBook()
+            await polled.refresh(gateway)
+            assert polled.positions == book.positions == {"NQ.Z24": 2}
+            assert polled.working_orders("NQ.Z24").keys() == book.working_orders("NQ.Z24").keys()
+        finally:
+            gateway.close()
+            await handler.close_connection()
+            await task
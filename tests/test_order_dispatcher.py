@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from trading_app.order_dispatcher import OrderDispatcher, TokenBucket, PRIORITY_PROTECTIVE
+
+
+class RecordingGateway:
+    """
+    Stand-in for AsyncOrderGateway recording each request as it is sent.
+    """
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = []
+        self.closed = False
+
+    def __getattr__(self, method):
+        async def request(**kwargs):
+            self.requests.append((method, kwargs))
+            await asyncio.sleep(self.latency)
+            return {"method": method, **kwargs}
+        return request
+
+    def close(self):
+        self.closed = True
+
+
+def test_token_bucket_allows_bursts_then_the_rate():
+    """
+    Test that the bucket allows `burst` requests at once, then one per 1/rate seconds.
+    """
+    now = [0.0]
+    bucket = TokenBucket(4, burst=2, clock=lambda: now[0])
+    assert [bucket.take() for _ in range(3)] == [True, True, False]
+    assert bucket.delay() == pytest.approx(0.25)
+    now[0] = 0.25
+    assert bucket.take() and not bucket.take()
+
+
+@pytest.mark.asyncio
+async def test_modifies_are_merged_and_absorbed_by_cancels():
+    """
+    Test that queued modifies of an order go out as one request with the
+    latest values, that a cancel replaces queued modifies, and that every
+    caller gets the result of the request its action went out in.
+    """
+    gateway = RecordingGateway()
+    dispatcher = OrderDispatcher(gateway, rate=50, burst=1)
+
+    entry = asyncio.ensure_future(dispatcher.place_limit_order("NQ.Z24", 1, 21000.0, "BUY"))
+    await asyncio.sleep(0)  # The entry takes the only token
+    modifies = [asyncio.ensure_future(dispatcher.modify_order("A1", new_price=21000.0 + step)) for step in range(5)]
+    resize = asyncio.ensure_future(dispatcher.modify_order("A1", new_quantity=2))
+    repriced = asyncio.ensure_future(dispatcher.modify_order("B2", new_price=20990.0))
+    cancel = asyncio.ensure_future(dispatcher.cancel_order("B2"))
+    late_modify = asyncio.ensure_future(dispatcher.modify_order("B2", new_price=20980.0))
+    results = await asyncio.gather(entry, *modifies, resize, repriced, cancel, late_modify)
+
+    assert gateway.requests == [
+        ("place_limit_order", {"symbol": "NQ.Z24", "quantity": 1, "price": 21000.0, "side": "BUY"}),
+        ("cancel_order", {"order_id": "B2"}),  # Cancels go out before other modifies
+        ("modify_order", {"order_id": "A1", "new_price": 21004.0, "new_quantity": 2}),
+    ]
+    assert all(result == results[1] for result in results[1:7])
+    assert results[7] == results[8] == results[9] == {"method": "cancel_order", "order_id": "B2"}
+    assert dispatcher.stats()["coalesced"] == 7
+    dispatcher.close()
+    assert gateway.closed
+
+
+@pytest.mark.asyncio
+async def test_protective_orders_go_out_first_and_orders_stay_in_sequence():
+    """
+    Test that a protective stop and a flatten jump the queue while rate
+    limited, and that a second action for an order waits for the first.
+    """
+    gateway = RecordingGateway(latency=0.05)
+    dispatcher = OrderDispatcher(gateway, rate=100, burst=1)
+
+    first = asyncio.ensure_future(dispatcher.modify_order("A1", new_price=21001.0))
+    await asyncio.sleep(0)  # In flight for 50 ms
+    orders = [asyncio.ensure_future(dispatcher.place_market_order("NQ.Z24", 1, "BUY")) for _ in range(3)]
+    cancel = asyncio.ensure_future(dispatcher.cancel_order("A1"))
+    stop = asyncio.ensure_future(dispatcher.place_stop_order("NQ.Z24", 1, 20990.0, "SELL"))
+    flatten = asyncio.ensure_future(dispatcher.flatten("ESZ24", 2, "SELL"))
+    moved = asyncio.ensure_future(dispatcher.modify_order("C3", new_price=20995.0, priority=PRIORITY_PROTECTIVE))
+    await asyncio.gather(first, *orders, cancel, stop, flatten, moved)
+
+    methods = [(method, kwargs.get("order_id") or kwargs.get("symbol")) for method, kwargs in gateway.requests]
+    assert methods[:4] == [
+        ("modify_order", "A1"), ("place_stop_order", "NQ.Z24"), ("place_market_order", "ESZ24"), ("modify_order", "C3"),
+    ]
+    # The cancel outranks new orders but waits until the modify of the same order has completed
+    assert methods.index(("cancel_order", "A1")) > methods.index(("place_market_order", "NQ.Z24"))
+    assert len(methods) == 8 and dispatcher.stats()["sent"] == 8
+    dispatcher.close()
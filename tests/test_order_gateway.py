@@ -0,0 +1,76 @@
+import json
+import time
+import pytest
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from trading_app.order_entry import OrderEntry
+from trading_app.order_gateway import AsyncOrderGateway
+
+
+class StaticToken:
+    """
+    Stand-in authenticator returning a fixed token.
+    """
+    def get_token(self):
+        return "test-token"
+
+
+class SlowOrderHandler(BaseHTTPRequestHandler):
+    """
+    Order endpoint that takes 200 ms per request and records client ports.
+    """
+    protocol_version = "HTTP/1.1"
+    client_ports = set()
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.client_ports.add(self.client_address[1])
+        time.sleep(0.2)
+        payload = json.dumps({"path": self.path, "request": body}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_gateway_runs_orders_concurrently_on_pooled_connections():
+    """
+    Test that several order actions are in flight at once and reuse connections.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowOrderHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+    gateway = AsyncOrderGateway(OrderEntry(authenticator=StaticToken(), api_url=api_url), max_in_flight=4)
+    try:
+        for _ in range(2):
+            start = time.monotonic()
+            results = await asyncio.gather(
+                gateway.place_bracket_order("NQ.Z24", 1, None, 21000, 21030, "BUY", order_type="MARKET"),
+                gateway.cancel_order("A1"),
+                gateway.modify_order("A2", new_price=21010),
+                gateway.get_order_status("A3"),
+            )
+            elapsed = time.monotonic() - start
+
+            # Four 200 ms requests finish together instead of back to back
+            assert elapsed < 0.6
+            assert [result["path"] for result in results] == [
+                "/v2/orders", "/v2/orders/A1/cancel", "/v2/orders/A2/modify", "/v2/orders/A3",
+            ]
+
+        # The second round reused the keep-alive connections of the first
+        assert len(SlowOrderHandler.client_ports) <= 4
+    finally:
+        gateway.close()
+        server.shutdown()
+        server.server_close()
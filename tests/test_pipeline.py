@@ -0,0 +1,79 @@
+import pytest
+import asyncio
+from trading_app.pipeline import Stage, TradingPipeline
+from trading_app.websocket_handler import WebSocketHandler
+from trading_app.decoders import JsonDecoder
+from trading_app.data_aggregation import DataAggregator
+from trading_app.indicators import Indicators
+from trading_app.trading_logic import TradingLogic
+from trading_app.replay import RecordingOrderEntry
+
+
+@pytest.mark.asyncio
+async def test_stages_forward_only_new_outputs():
+    """
+    Test that items flow through chained stages and stats are recorded.
+    """
+    received = []
+    doubler = Stage("doubler", lambda item: [item * 2], maxsize=4)
+    sink = Stage("sink", lambda item: received.append(item), maxsize=4)
+    doubler.connect(sink)
+
+    for item in range(3):
+        await doubler.put(item)
+    assert doubler.depth == 3
+
+    doubler.start()
+    sink.start()
+    await doubler.queue.join()
+    await sink.queue.join()
+
+    assert received == [0, 2, 4]
+    assert doubler.depth == 0
+    stats = doubler.stats()
+    assert stats["processed"] == 3
+    assert stats["max_lag"] >= stats["last_lag"] > 0
+
+    await doubler.stop()
+    await sink.stop()
+
+
+@pytest.mark.asyncio
+async def test_stage_queue_is_bounded():
+    """
+    Test that a full stage queue makes producers wait.
+    """
+    stage = Stage("bounded", lambda item: None, maxsize=1)
+    await stage.put("first")
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(stage.put("second"), timeout=0.05)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_routes_each_symbol_to_its_own_stages():
+    """
+    Test that bars of each symbol get their own indicator and strategy stages
+    and that both symbols keep all of their 1-minute bars.
+    """
+    handler = WebSocketHandler(decoder=JsonDecoder())
+    trading_logic = TradingLogic(indicators=Indicators(handler), order_entry=RecordingOrderEntry())
+    pipeline = TradingPipeline(handler, DataAggregator(), trading_logic)
+    pipeline.aggregator_stage.start()
+
+    base = 1_733_218_200_000_000_000
+    for second in range(0, 181, 10):
+        trades = [
+            {"symbol": symbol, "price": price + second, "volume": 1, "timestamp": base + second * 10**9}
+            for symbol, price in (("NQ.Z24", 21000.0), ("ES.Z24", 6000.0))
+        ]
+        await handler.route_message({"trades": trades})
+    await pipeline.join()
+    await pipeline.stop()
+
+    assert set(pipeline.stats()) == {
+        "aggregator", "indicators[NQ.Z24]", "strategy[NQ.Z24]", "indicators[ES.Z24]", "strategy[ES.Z24]",
+    }
+    assert pipeline.stats()["strategy[ES.Z24]"]["processed"] == 3
+    for symbol in ("NQ.Z24", "ES.Z24"):
+        assert len(trading_logic.indicators.latest_moving_averages(10, symbol)) == 3
@@ -0,0 +1,76 @@
+import pickle
+import pandas as pd
+from trading_app.records import Bar, BarSeries
+from trading_app.data_aggregation import DataAggregator
+
+
+def make_bar_dicts(count, symbols=("NQ.Z24", "ESZ24")):
+    """
+    Bar dictionaries in the old format, alternating between symbols.
+    """
+    start = pd.Timestamp("2024-12-02 14:30")
+    return [
+        {"timestamp": start + pd.Timedelta(seconds=30 * (number // len(symbols))), "symbol": symbols[number % len(symbols)],
+         "open": 21000.0 + number, "high": 21002.0 + number, "low": 20999.0 + number, "close": 21001.0 + number,
+         "volume": float(number)}
+        for number in range(count)
+    ]
+
+
+def test_bars_read_like_the_old_dictionaries():
+    """
+    Test that a Bar keeps the dictionary interface of the bars it replaces.
+    """
+    bar_dict = make_bar_dicts(1)[0]
+    bar = Bar.from_mapping(bar_dict)
+
+    assert bar["open"] == 21000.0 and bar["timestamp"] == pd.Timestamp("2024-12-02 14:30")
+    assert bar == bar_dict and dict(bar) == bar_dict
+    assert bar.get("missing") is None and "close" in bar
+    assert pickle.loads(pickle.dumps(bar)) == bar
+    assert pd.DataFrame([bar]).to_dict("records") == [bar_dict]
+
+
+def test_series_behaves_like_a_list_of_bars():
+    """
+    Test the list operations used on bar lists, the DataFrame export and the
+    memory saved by storing columns.
+    """
+    bar_dicts = make_bar_dicts(1000)
+    series = BarSeries(bar_dicts)
+
+    assert len(series) == 1000 and series == bar_dicts
+    assert series[-1] == bar_dicts[-1] and series[10:13] == bar_dicts[10:13]
+    del series[:400]
+    assert series == bar_dicts[400:]
+    assert bar_dicts[:400] + series == bar_dicts
+    assert pickle.loads(pickle.dumps(series)) == series
+
+    frame = series.to_dataframe()
+    pd.testing.assert_frame_equal(frame, pd.DataFrame(bar_dicts[400:]).reset_index(drop=True), check_dtype=False)
+    assert series.nbytes < 100 * 1000
+
+
+def test_aggregator_keeps_open_bars_instead_of_ticks():
+    """
+    Test that ticks are folded into an open Bar and finalized bars are stored in
+    a BarSeries, with the same bars from the per-tick and batch paths.
+    """
+    timestamps = pd.date_range("2024-12-02 14:30", periods=12, freq="10s")
+    prices = [21000.0, 21003.0, 20998.0, 21001.0, 21002.0, 21004.0, 21000.0, 20999.0, 21005.0, 21001.0, 21000.0, 21002.0]
+
+    per_tick = DataAggregator()
+    for timestamp, price in zip(timestamps, prices):
+        per_tick.add_tick({"timestamp": timestamp, "symbol": "NQ.Z24", "price": price, "volume": 1.0})
+    batch = DataAggregator()
+    batch.add_ticks("NQ.Z24", timestamps, prices, [1.0] * len(prices))
+
+    for aggregator in (per_tick, batch):
+        assert isinstance(aggregator.aggregated_bars["NQ.Z24"], BarSeries)
+        assert aggregator.open_bars["NQ.Z24"] == Bar(timestamps[9].value, "NQ.Z24", 21001.0, 21002.0, 21000.0,
+                                                     21002.0, 3.0)
+        assert aggregator.aggregated_bars["NQ.Z24"][0] == {
+            "timestamp": timestamps[0], "symbol": "NQ.Z24", "open": 21000.0, "high": 21003.0, "low": 20998.0,
+            "close": 20998.0, "volume": 3.0,
+        }
+    assert per_tick.get_aggregated_bars("NQ.Z24") == batch.get_aggregated_bars("NQ.Z24")
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from trading_app.replay import ReplayEngine, SimulatedClock, RecordingOrderEntry, replay_parallel
+
+
+def make_trend_ticks(minutes=2000, turn=1200, symbol="NQ.Z24"):
+    """
+    Ticks every 10 seconds: a falling market that turns up after `turn` minutes.
+    """
+    timestamps = pd.date_range("2024-12-02", periods=minutes * 6, freq="10s")
+    elapsed = np.arange(len(timestamps)) / 6
+    prices = np.where(elapsed < turn, 21000 - elapsed, 21000 - turn + 3 * (elapsed - turn))
+    return pd.DataFrame({"timestamp": timestamps, "symbol": symbol, "price": prices, "volume": 1.0})
+
+
+def test_replay_records_crossover_order_at_simulated_time():
+    """
+    Test that a replay runs the strategy and records the order it would send,
+    stamped with the simulated time rather than wall time.
+    """
+    engine = ReplayEngine()
+    stats = engine.replay(make_trend_ticks())
+
+    assert stats["bars_1min"] == 1999  # The last minute is still open
+    assert stats["simulated_time"] == pd.Timestamp("2024-12-03 09:19:50")
+
+    buys = [order for order in engine.orders if order["side"] == "BUY"]
+    assert len(buys) == 1
+    order = buys[0]
+    assert order["action"] == "bracket" and order["order_type"] == "MARKET"
+    assert pd.Timestamp("2024-12-02 20:00") < order["time"] < pd.Timestamp("2024-12-03 09:20")
+    assert order["stop_loss"] == order["take_profit"] - 30
+    assert engine.trading_logic.positions == {"NQ.Z24": "LONG"}
+
+
+def test_chunk_size_does_not_change_results():
+    """
+    Test that small and large replay chunks give the same indicators and orders.
+    """
+    ticks = make_trend_ticks(minutes=1500, turn=900)
+    small = ReplayEngine(chunk_size=997)
+    large = ReplayEngine(chunk_size=1_000_000)
+    small.replay(ticks)
+    large.replay(ticks)
+
+    assert small.indicators.moving_averages.equals(large.indicators.moving_averages)
+    assert small.order_entry.to_dataframe().equals(large.order_entry.to_dataframe())
+
+
+def test_recording_order_entry_uses_clock():
+    """
+    Test that recorded orders carry the simulated time they were made at.
+    """
+    clock = SimulatedClock(pd.Timestamp("2024-12-03 14:30").value)
+    order_entry = RecordingOrderEntry(clock)
+    order_entry.place_limit_order("NQ.Z24", 1, 21000.0, "BUY")
+    clock.advance(pd.Timestamp("2024-12-03 14:31").value)
+    order_entry.cancel_order("replay-1")
+
+    assert [order["time"].minute for order in order_entry.orders] == [30, 31]
+
+
+def test_symbols_keep_independent_state():
+    """
+    Test that two symbols replayed together trade exactly as each does alone,
+    in one engine and with one process per symbol.
+    """
+    nq = make_trend_ticks(symbol="NQ.Z24")
+    es = make_trend_ticks(minutes=2000, turn=1400, symbol="ES.Z24")
+    es["price"] = es["price"] / 4
+    both = pd.concat([nq, es], ignore_index=True)
+
+    def orders_of(engine):
+        return engine.order_entry.to_dataframe().drop(columns="orderId")
+
+    together = ReplayEngine()
+    together.replay(both)
+    alone = []
+    for ticks in (nq, es):
+        engine = ReplayEngine()
+        engine.replay(ticks)
+        alone.append(orders_of(engine))
+    expected = pd.concat(alone).sort_values("time", kind="stable").reset_index(drop=True)
+
+    assert len(together.indicators.one_minute_records) == 2 * 1999
+    assert together.trading_logic.positions == {"NQ.Z24": "LONG", "ES.Z24": "LONG"}
+    pd.testing.assert_frame_equal(orders_of(together).sort_values("time", kind="stable").reset_index(drop=True), expected)
+
+    orders, stats = replay_parallel(both, workers=2)
+    pd.testing.assert_frame_equal(orders.drop(columns="orderId"), expected)
+    assert stats["ES.Z24"]["bars_1min"] == 1999
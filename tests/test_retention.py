@@ -0,0 +1,98 @@
+import pandas as pd
+from trading_app.data_aggregation import DataAggregator
+from trading_app.indicators import Indicators
+from trading_app.retention import RetentionPolicy, memory_report
+
+
+def feed_minutes(indicators, minutes, symbols=("NQ.Z24", "ESZ24")):
+    """
+    Feed two 30-second bars per minute for each symbol and update the averages.
+    """
+    start = pd.Timestamp("2024-12-02")
+    for minute in range(minutes):
+        for symbol in symbols:
+            for half in range(2):
+                price = 21000.0 + (minute % 37) + half
+                bar = {"timestamp": start + pd.Timedelta(seconds=60 * minute + 30 * half), "symbol": symbol,
+                       "open": price, "high": price, "low": price, "close": price, "volume": 1.0}
+                for minute_bar in indicators.add_bar(bar):
+                    indicators.update_moving_averages(minute_bar)
+
+
+def test_policy_trims_in_batches_and_spills_oldest_first():
+    """
+    Test that a list is cut back to the limit only after growing past the slack.
+    """
+    spilled = []
+    policy = RetentionPolicy(8, spill=spilled.extend, slack=0.25)
+    records = []
+    for number in range(30):
+        records.append(number)
+        policy.trim(records)
+        assert len(records) <= 10
+    assert records == list(range(21, 30))
+    assert spilled == list(range(21))
+    assert policy.dropped == 21
+
+
+def test_indicator_history_stays_bounded_without_changing_the_averages():
+    """
+    Test that retention bounds every history list per symbol, spills the dropped
+    1-minute bars in order, and leaves the moving averages untouched.
+    """
+    spilled = []
+    bounded = Indicators(windows=(5, 50), retention=100, ma_retention=20, spill=spilled.extend)
+    unbounded = Indicators(windows=(5, 50), retention=0, ma_retention=0)
+    feed_minutes(bounded, 1000)
+    feed_minutes(unbounded, 1000)
+
+    assert len(unbounded.one_minute_records) == 2 * 1000
+    assert 2 * 100 <= len(bounded.one_minute_records) <= 2 * 125
+    assert spilled + bounded.one_minute_records == unbounded.one_minute_records
+    for symbol in ("NQ.Z24", "ESZ24"):
+        assert 20 <= len(bounded.ma_records_by_symbol[symbol]) <= 25
+        assert bounded.latest_moving_averages(2, symbol) == unbounded.latest_moving_averages(2, symbol)
+    assert len(bounded.ma_records) <= 2 * 25
+
+    gauges = bounded.memory_usage()
+    assert gauges["one_minute_records"]["items"] == len(bounded.one_minute_records)
+    assert gauges["one_minute_records"]["bytes"] < unbounded.memory_usage()["one_minute_records"]["bytes"]
+
+
+def test_batch_larger_than_the_retention_reaches_the_averages():
+    """
+    Test that 1-minute bars aggregated in one batch larger than the retention
+    are all fed to the moving averages before the history is trimmed.
+    """
+    bounded = Indicators(windows=(5, 50), retention=10)
+    unbounded = Indicators(windows=(5, 50), retention=0)
+    start = pd.Timestamp("2024-12-02")
+    bars = [{"timestamp": start + pd.Timedelta(seconds=30 * number), "symbol": "NQ.Z24",
+             "open": 21000.0 + number, "high": 21000.0 + number, "low": 21000.0 + number,
+             "close": 21000.0 + number, "volume": 1.0} for number in range(200)]
+    for indicators in (bounded, unbounded):
+        indicators.aggregate_to_one_minute(bars)
+        indicators.calculate_moving_averages()
+
+    assert len(bounded.ma_records) == len(unbounded.ma_records) == len(unbounded.one_minute_records) == 100
+    assert bounded.latest_moving_averages(1, "NQ.Z24") == unbounded.latest_moving_averages(1, "NQ.Z24")
+    assert 10 <= len(bounded.one_minute_records) <= 12
+    assert bounded.bars_processed == len(bounded.one_minute_records)
+
+
+def test_aggregator_keeps_recent_bars_and_reports_memory():
+    """
+    Test that the aggregator keeps the newest bars per symbol and that the
+    memory report includes every component and the process.
+    """
+    aggregator = DataAggregator(retention=50)
+    timestamps = pd.date_range("2024-12-02", periods=20_000, freq="1s").as_unit("ns").asi8
+    aggregator.add_ticks("NQ.Z24", timestamps, [21000.0] * len(timestamps), [1.0] * len(timestamps))
+
+    bars = aggregator.aggregated_bars["NQ.Z24"]
+    assert 50 <= len(bars) <= 62
+    assert bars[-1]["timestamp"] == pd.Timestamp(timestamps[-1]).floor("30s") - pd.Timedelta("30s")
+
+    report = memory_report(aggregator=aggregator)
+    assert report["aggregator"]["aggregated_bars"]["items"] == len(bars)
+    assert report["process"]["rss_bytes"] > 0
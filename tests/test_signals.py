@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from trading_app.signals import CrossoverSignals, crossover_signals
+from trading_app.indicators import Indicators
+from trading_app.trading_logic import TradingLogic
+from trading_app.replay import RecordingOrderEntry
+
+
+def streamed_signals(fast, slow, symbol="NQ.Z24"):
+    """
+    Signals of the state machine fed one bar at a time.
+    """
+    crossovers = CrossoverSignals()
+    signals = []
+    for index, (fast_value, slow_value) in enumerate(zip(fast, slow)):
+        signal = crossovers.update(symbol, fast_value, slow_value)
+        if signal is not None:
+            signals.append((index, signal))
+    return signals
+
+
+def test_crosses_through_a_tie_are_caught():
+    """
+    Test that a cross landing on an exact tie fires when the fast average
+    leaves the tie on the other side, and a touch that turns back does not fire.
+    """
+    fast = [np.nan, 1.0, 2.0, 2.0, 3.0, 2.0, 3.0, 1.0]
+    slow = [np.nan, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0]
+    assert crossover_signals(fast, slow) == [(4, "BUY"), (7, "SELL")]
+    assert streamed_signals(fast, slow) == crossover_signals(fast, slow)
+
+
+def test_streamed_and_vectorized_signals_agree():
+    """
+    Test the per-bar state machine against the one-pass vectorized mode on
+    averages that often tie.
+    """
+    rng = np.random.default_rng(11)
+    closes = pd.Series(np.round((21000 + np.cumsum(rng.normal(0, 2, 5000))) * 4) / 4)
+    fast = closes.rolling(5).mean().round(1).to_numpy()
+    slow = closes.rolling(20).mean().round(1).to_numpy()
+
+    signals = crossover_signals(fast, slow)
+    assert len(signals) > 50
+    assert streamed_signals(fast, slow) == signals
+    assert all(first[1] != second[1] for first, second in zip(signals, signals[1:]))
+
+
+def test_strategy_catches_up_on_rows_added_between_calls():
+    """
+    Test that TradingLogic feeds every moving average row added since its last
+    call, trading a cross it did not see on the latest two rows and not trading
+    a cross that was undone before it looked.
+    """
+    indicators = Indicators(windows=(2, 3), retention=0, ma_retention=0)
+    trading_logic = TradingLogic(indicators=indicators, order_entry=RecordingOrderEntry())
+    indicators.last_close["NQ.Z24"] = 21000.0
+    rows = indicators.ma_records_by_symbol["NQ.Z24"]
+    start = pd.Timestamp("2024-12-02 14:30")
+
+    def add_rows(*pairs):
+        for fast, slow in pairs:
+            rows.append({"timestamp": start + pd.Timedelta(minutes=len(rows)), "symbol": "NQ.Z24",
+                         "2_minute": fast, "3_minute": slow})
+
+    add_rows((1.0, 2.0))
+    trading_logic.execute_strategy("NQ.Z24")
+    add_rows((3.0, 2.0), (4.0, 2.0), (4.0, 2.0))  # Crossed up two bars ago
+    trading_logic.execute_strategy("NQ.Z24")
+    assert [order["side"] for order in trading_logic.order_entry.orders] == ["BUY"]
+
+    add_rows((1.0, 2.0), (3.0, 2.0))  # Down and back up between calls: still long
+    trading_logic.execute_strategy("NQ.Z24")
+    assert len(trading_logic.order_entry.orders) == 1
+    assert trading_logic.positions == {"NQ.Z24": "LONG"}
+    assert trading_logic.snapshot()["regimes"] == {"NQ.Z24": 1}
@@ -0,0 +1,85 @@
+import asyncio
+import numpy as np
+import pytest
+from trading_app.auth import Authenticator
+from trading_app.constants import DEMO_CREDENTIALS, LIVE_CREDENTIALS
+from trading_app.credential_service import CredentialService
+from trading_app.decoders import TradeBatch
+from trading_app.mock_exchange import MockExchange
+from trading_app.stream_shards import TickMerger, ShardedWebSocketHandler
+
+SYMBOLS = {"NQ": "NQ.Z24", "ES": "ESZ24", "CL": "CLZ24", "GC": "GCZ24"}
+
+
+def make_service(exchange):
+    authenticator = Authenticator(DEMO_CREDENTIALS, LIVE_CREDENTIALS, api_url=exchange.api_url)
+    return CredentialService(authenticator=authenticator, api_url=exchange.api_url)
+
+
+def make_batch(symbol, timestamps):
+    return TradeBatch.from_trades([
+        {"symbol": symbol, "price": 100.0, "volume": 1, "timestamp": timestamp} for timestamp in timestamps
+    ])
+
+
+def test_merger_holds_ticks_until_every_active_shard_has_caught_up():
+    """
+    Test that ticks are released in time order up to the slowest active shard,
+    and that a quiet shard stops holding the others back after max_delay.
+    """
+    merger = TickMerger(2, max_delay=1.0)
+    merger.add(0, 10.0, make_batch("NQ.Z24", [1, 3, 5]), now=0.0)
+    assert merger.take(now=0.0)[1].timestamps.tolist() == [1, 3, 5]  # Only one shard has sent anything
+
+    merger.add(0, 10.1, make_batch("NQ.Z24", [7, 9]), now=0.1)
+    merger.add(1, 10.2, make_batch("ES", [6, 8]), now=0.2)
+    origin, batch = merger.take(now=0.2)
+    assert batch.timestamps.tolist() == [6, 7, 8]
+    assert batch.symbols.tolist() == ["ES", "NQ.Z24", "ES"]
+    assert origin == 10.1
+
+    # Shard 1 goes quiet: after max_delay the held tick is released
+    assert merger.take(now=0.5) is None
+    assert merger.take(now=1.25)[1].timestamps.tolist() == [9]
+    assert merger.stats() == {"released": 7, "late": 0, "pending": 0}
+
+
+@pytest.mark.asyncio
+async def test_shards_stream_on_their_own_stream_ids_into_one_ordered_feed():
+    """
+    Test that each shard connects with its own streamId, subscribes in batches,
+    and that the merged feed carries every live tick in timestamp order.
+    """
+    with MockExchange(rate=2000, max_ticks=200) as exchange:
+        sharded = ShardedWebSocketHandler(
+            SYMBOLS, shards=2, credential_service=make_service(exchange), stream_url=exchange.stream_url,
+            subscription_batch=2, max_delay=1.0,
+        )
+        feed = asyncio.Queue()
+        sharded.add_tick_queue(feed)
+        task = asyncio.create_task(sharded.connect())
+        for _ in range(100):
+            if sum(len(handler.live_ticks) for handler in sharded.handlers) >= 400:
+                break
+            await asyncio.sleep(0.05)
+        await sharded.close_connection()
+        await task
+
+    stream_ids = [handler.stream_id for handler in sharded.handlers]
+    assert len(set(stream_ids)) == 2
+    assert [handler.symbols for handler in sharded.handlers] == [
+        {"NQ": "NQ.Z24", "CL": "CLZ24"}, {"ES": "ESZ24", "GC": "GCZ24"},
+    ]
+    assert sorted(message["symbols"] for message in exchange.subscriptions) == [
+        ["ESZ24", "GCZ24"], ["NQ.Z24", "CLZ24"],
+    ]
+
+    batches = []
+    while not feed.empty():
+        batches.append(feed.get_nowait()[1])
+    merged = TradeBatch.concatenate(batches)
+    assert len(merged) == 400
+    assert set(merged.symbols.tolist()) == set(SYMBOLS.values())
+    assert (np.diff(merged.timestamps) >= 0).all()
+    assert sharded.stats()["merge"] == {"released": 400, "late": 0, "pending": 0}
+    assert len(sharded.live_data) == 400
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from trading_app.replay import ReplayEngine
+from trading_app.sweep import rolling_means, crossover_signals, simulate_trades, run_sweep
+
+
+def make_wave_ticks(minutes=4000):
+    """
+    Ticks every 10 seconds following a slow sine wave, so averages cross several times.
+    """
+    timestamps = pd.date_range("2024-12-02", periods=minutes * 6, freq="10s")
+    elapsed = np.arange(len(timestamps)) / 6
+    prices = np.round((21000 + 80 * np.sin(elapsed / 250)) * 4) / 4
+    return pd.DataFrame({"timestamp": timestamps, "symbol": "NQ.Z24", "price": prices, "volume": 1.0})
+
+
+def test_sweep_signals_match_replayed_strategy():
+    """
+    Test that the vectorized signals are the orders the live strategy places
+    when the same data is replayed through it.
+    """
+    engine = ReplayEngine()
+    engine.replay(make_wave_ticks())
+    bars = engine.indicators.one_minute_bars
+
+    closes = bars["close"].to_numpy(dtype="float64")
+    prefix = np.concatenate(([0.0], np.cumsum(closes)))
+    signals = crossover_signals(rolling_means(prefix, 200), rolling_means(prefix, 1000))
+
+    assert len(signals) >= 3
+    expected = [(order["time"], order["side"]) for order in engine.orders]
+    found = [(bars["timestamp"][index] + pd.Timedelta("1min"), side) for index, side in signals]
+    assert found == expected
+
+
+def test_simulated_brackets_exit_at_stop_target_or_next_signal():
+    """
+    Test bracket exits, with the stop taken first when a bar reaches both levels.
+    """
+    close = np.array([100.0, 101.0, 102.0, 100.0, 99.0, 98.0])
+    high = np.array([100.0, 103.0, 110.0, 101.0, 99.5, 98.5])
+    low = np.array([100.0, 99.0, 101.0, 94.0, 98.5, 97.5])
+    signals = [(0, "BUY"), (3, "SELL")]
+
+    # Long from 100: bar 2 reaches the 108 target; short from 100 never hits, exits at the last close
+    assert simulate_trades(signals, close, high, low, stop=5, target=8).tolist() == [8.0, 2.0]
+    # Long from 100 with a tight stop and target: bar 1 reaches both, the stop counts
+    assert simulate_trades(signals, close, high, low, stop=1, target=3).tolist() == [-1.0, 2.0]
+
+
+def test_parallel_sweep_matches_in_process_sweep():
+    """
+    Test that the process pool gives the same ranked table as a single process.
+    """
+    engine = ReplayEngine()
+    engine.replay(make_wave_ticks(2000))
+    bars = engine.indicators.one_minute_bars
+    grid = dict(fast_windows=[20, 50, 100], slow_windows=[100, 300], stops=[5, 10], targets=[10, 20])
+
+    serial = run_sweep(bars, workers=1, **grid)
+    parallel = run_sweep(bars, workers=2, **grid)
+
+    assert len(serial) == 5 * 4  # (20, 100), (20, 300), (50, 100), (50, 300), (100, 300)
+    assert serial["total_points"].is_monotonic_decreasing
+    pd.testing.assert_frame_equal(serial, parallel)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from trading_app.tick_store import TickBuffer, TickStore
+
+
+def test_tick_buffer_grows_and_wraps():
+    """
+    Test that the ring buffer grows, then overwrites the oldest ticks once full.
+    """
+    buffer = TickBuffer(capacity=5, initial_size=2)
+
+    for i in range(7):
+        buffer.append(i, 100.0 + i, i)
+
+    timestamps, prices, volumes = buffer.view()
+    assert len(buffer) == 5
+    assert buffer.total == 7
+    assert timestamps.tolist() == [2, 3, 4, 5, 6]
+    assert prices.tolist() == [102.0, 103.0, 104.0, 105.0, 106.0]
+    assert len(buffer.segments()) == 2
+
+    # Only the ticks appended after a sequence number are returned
+    timestamps, _, _ = buffer.since(5)
+    assert timestamps.tolist() == [5, 6]
+    print("Tick buffer wraparound test passed!")
+
+
+def test_tick_buffer_extend_matches_append():
+    """
+    Test that batch appends land in the same order as single appends.
+    """
+    single = TickBuffer(capacity=8, initial_size=1)
+    batch = TickBuffer(capacity=8, initial_size=1)
+    timestamps = np.arange(11, dtype="int64")
+    prices = timestamps * 0.25
+    volumes = np.ones(11)
+
+    for t, p, v in zip(timestamps, prices, volumes):
+        single.append(t, p, v)
+    batch.extend(timestamps[:3], prices[:3], volumes[:3])
+    batch.extend(timestamps[3:], prices[3:], volumes[3:])
+
+    for expected, actual in zip(single.view(), batch.view()):
+        assert expected.tolist() == actual.tolist()
+
+
+def test_tick_buffer_views_are_zero_copy():
+    """
+    Test that an unwrapped buffer hands out views of its storage.
+    """
+    buffer = TickBuffer(capacity=10)
+    buffer.append("2024-12-03T09:30:00", 15800.5, 10)
+    timestamps, prices, _ = buffer.view()
+    assert np.shares_memory(prices, buffer.prices)
+    assert timestamps[0] == pd.Timestamp("2024-12-03T09:30:00").value
+
+
+def test_tick_store_dataframe_export():
+    """
+    Test the per-symbol store exports a DataFrame ordered by timestamp.
+    """
+    store = TickStore(capacity=100)
+    store.append("NQ", "2024-12-03T09:30:00", 15800.5, 10)
+    store.append("NQ", "2024-12-03T09:30:10", 15802.0, 15)
+    store.append("ES", "2024-12-03T09:30:05", 6050.25, 3)
+
+    frame = store.to_dataframe()
+    assert list(frame.columns) == ["timestamp", "symbol", "price", "volume"]
+    assert frame["symbol"].tolist() == ["NQ", "ES", "NQ"]
+    assert frame["timestamp"].is_monotonic_increasing
+    assert len(store) == 3
+    assert TickStore().to_dataframe().empty
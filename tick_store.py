@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+from trading_app.constants import TICK_BUFFER_CAPACITY
+
+TICK_COLUMNS = ["timestamp", "symbol", "price", "volume"]
+
+
+def to_nanoseconds(timestamp):
+    """
+    Convert a timestamp to integer nanoseconds since the epoch.
+    Integers are taken as nanoseconds, matching pd.to_datetime.
+    :param timestamp: Integer, string, datetime or pandas Timestamp.
+    :return: Nanoseconds since the epoch as an int.
+    """
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    return pd.Timestamp(timestamp).value
+
+
+def to_nanoseconds_array(timestamps):
+    """
+    Convert a sequence of timestamps to an int64 array of nanoseconds since the epoch.
+    :param timestamps: Integer nanoseconds, datetime64 values, strings or Timestamps.
+    :return: numpy int64 array.
+    """
+    timestamps = np.asarray(timestamps)
+    if timestamps.dtype.kind in "iu":
+        return timestamps.astype("int64", copy=False)
+    if timestamps.dtype.kind == "M":
+        return timestamps.astype("datetime64[ns]").astype("int64")
+    return pd.DatetimeIndex(pd.to_datetime(timestamps)).as_unit("ns").asi8
+
+
+def _as_float(value):
+    return np.nan if value is None else value
+
+
+class TickBuffer:
+    def __init__(self, capacity=TICK_BUFFER_CAPACITY, initial_size=1024):
+        """
+        Columnar ring buffer of ticks for a single symbol.
+        Storage starts small and doubles until it reaches capacity, after which
+        the oldest ticks are overwritten.
+        :param capacity: Maximum number of ticks held.
+        :param initial_size: Number of slots allocated up front.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        size = min(initial_size, capacity)
+        self.timestamps = np.empty(size, dtype="int64")
+        self.prices = np.empty(size, dtype="float64")
+        self.volumes = np.empty(size, dtype="float64")
+        self.cursor = 0  # Next slot to write
+        self.count = 0  # Number of valid ticks held
+        self.total = 0  # Number of ticks ever appended (sequence number)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        """
+        Bytes allocated for the buffer's arrays.
+        """
+        return self.timestamps.nbytes + self.prices.nbytes + self.volumes.nbytes
+
+    def _grow(self, needed):
+        """
+        Grow the arrays so that at least `needed` ticks fit (bounded by capacity).
+        Only called before the buffer has wrapped, so data is contiguous from 0.
+        """
+        size = len(self.timestamps)
+        new_size = size
+        while new_size < needed and new_size < self.capacity:
+            new_size = min(new_size * 2, self.capacity)
+        if new_size == size:
+            return
+        for name in ("timestamps", "prices", "volumes"):
+            old = getattr(self, name)
+            new = np.empty(new_size, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def append(self, timestamp, price, volume):
+        """
+        Append a single tick in amortized O(1).
+        :param timestamp: Tick time (see to_nanoseconds).
+        :param price: Trade price.
+        :param volume: Trade volume.
+        """
+        if self.cursor == len(self.timestamps) and self.count < self.capacity:
+            self._grow(self.count + 1)
+        i = self.cursor
+        self.timestamps[i] = to_nanoseconds(timestamp)
+        self.prices[i] = _as_float(price)
+        self.volumes[i] = _as_float(volume)
+        self.cursor = (i + 1) % len(self.timestamps) if self.count + 1 >= self.capacity else i + 1
+        self.count = min(self.count + 1, self.capacity)
+        self.total += 1
+
+    def extend(self, timestamps, prices, volumes):
+        """
+        Append a batch of ticks given as equal-length arrays.
+        :param timestamps: Integer nanosecond timestamps.
+        :param prices: Trade prices.
+        :param volumes: Trade volumes.
+        """
+        timestamps = np.asarray(timestamps, dtype="int64")
+        prices = np.asarray(prices, dtype="float64")
+        volumes = np.asarray(volumes, dtype="float64")
+        n = len(timestamps)
+        if n == 0:
+            return
+        self.total += n
+
+        # Only the newest `capacity` ticks can survive the write
+        if n > self.capacity:
+            timestamps, prices, volumes = timestamps[-self.capacity:], prices[-self.capacity:], volumes[-self.capacity:]
+            n = self.capacity
+
+        if self.count + n > len(self.timestamps) and len(self.timestamps) < self.capacity:
+            self._grow(self.count + n)
+
+        size = len(self.timestamps)
+        first = min(n, size - self.cursor)
+        for column, values in ((self.timestamps, timestamps), (self.prices, prices), (self.volumes, volumes)):
+            column[self.cursor:self.cursor + first] = values[:first]
+            column[:n - first] = values[first:]
+        self.cursor = (self.cursor + n) % size if self.count + n >= self.capacity else self.cursor + n
+        self.count = min(self.count + n, self.capacity)
+
+    def segments(self):
+        """
+        Zero-copy views of the held ticks in chronological order.
+        :return: List of one or two (timestamps, prices, volumes) tuples of array views.
+        """
+        if self.count < len(self.timestamps):
+            # Not wrapped yet, ticks occupy the front of the arrays
+            return [(self.timestamps[:self.count], self.prices[:self.count], self.volumes[:self.count])]
+        if self.cursor == 0:
+            return [(self.timestamps, self.prices, self.volumes)]
+        return [
+            (self.timestamps[self.cursor:], self.prices[self.cursor:], self.volumes[self.cursor:]),
+            (self.timestamps[:self.cursor], self.prices[:self.cursor], self.volumes[:self.cursor]),
+        ]
+
+    def view(self):
+        """
+        Chronological (timestamps, prices, volumes) arrays.
+        Zero-copy until the buffer wraps; a wrapped buffer is stitched into a copy.
+        """
+        segments = self.segments()
+        if len(segments) == 1:
+            return segments[0]
+        return tuple(np.concatenate(parts) for parts in zip(*segments))
+
+    def since(self, sequence):
+        """
+        Ticks appended after the given sequence number.
+        :param sequence: A previous value of `total`.
+        :return: (timestamps, prices, volumes) arrays, possibly empty.
+        """
+        n = min(self.total - sequence, self.count)
+        timestamps, prices, volumes = self.view()
+        if n <= 0:
+            return timestamps[:0], prices[:0], volumes[:0]
+        return timestamps[-n:], prices[-n:], volumes[-n:]
+
+    def to_dataframe(self, symbol=None):
+        """
+        Export the held ticks as a DataFrame.
+        :param symbol: Symbol to fill into the symbol column.
+        :return: DataFrame with timestamp, symbol, price and volume columns.
+        """
+        timestamps, prices, volumes = self.view()
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(timestamps),
+            "symbol": symbol,
+            "price": prices,
+            "volume": volumes,
+        }, columns=TICK_COLUMNS)
+
+
+class TickStore:
+    def __init__(self, capacity=TICK_BUFFER_CAPACITY):
+        """
+        Per-symbol collection of tick ring buffers.
+        :param capacity: Capacity of each symbol's buffer.
+        """
+        self.capacity = capacity
+        self.buffers = {}  # {symbol: TickBuffer}
+
+    def buffer(self, symbol):
+        """
+        Get the buffer for a symbol, creating it on first use.
+        """
+        buffer = self.buffers.get(symbol)
+        if buffer is None:
+            buffer = self.buffers[symbol] = TickBuffer(self.capacity)
+        return buffer
+
+    def append(self, symbol, timestamp, price, volume):
+        """
+        Append a single tick for a symbol.
+        """
+        self.buffer(symbol).append(timestamp, price, volume)
+
+    def extend(self, symbol, timestamps, prices, volumes):
+        """
+        Append a batch of ticks for a symbol from arrays.
+        """
+        self.buffer(symbol).extend(timestamps, prices, volumes)
+
+    def __len__(self):
+        return sum(len(buffer) for buffer in self.buffers.values())
+
+    @property
+    def nbytes(self):
+        """
+        Bytes allocated for the ticks of every symbol.
+        """
+        return sum(buffer.nbytes for buffer in self.buffers.values())
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def symbols(self):
+        return list(self.buffers)
+
+    def to_dataframe(self):
+        """
+        Export the ticks of every symbol as one DataFrame ordered by timestamp.
+        :return: DataFrame with timestamp, symbol, price and volume columns.
+        """
+        frames = [buffer.to_dataframe(symbol) for symbol, buffer in self.buffers.items() if len(buffer)]
+        if not frames:
+            return pd.DataFrame(columns=TICK_COLUMNS)
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True).sort_values("timestamp", kind="stable", ignore_index=True)
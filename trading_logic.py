@@ -1,17 +1,57 @@
+import asyncio
+import functools
 import pandas as pd
 from trading_app.indicators import Indicators
 from trading_app.order_entry import OrderEntry
+from trading_app.signals import CrossoverSignals, BUY
+from trading_app.latency import stamp
+from trading_app.constants import STOP_LOSS_POINTS, TAKE_PROFIT_POINTS
+from trading_app.utils.logger import get_logger
+
+log = get_logger("strategy")
 
 
 class TradingLogic:
-    def __init__(self):
+    def __init__(self, indicators=None, order_entry=None, order_gateway=None, order_book=None,
+                 stop_loss=STOP_LOSS_POINTS, take_profit=TAKE_PROFIT_POINTS):
         """
         Initialize the trading logic, including indicators and order entry.
+
+        :param indicators: Shared Indicators instance (a new one is created if omitted).
+        :param order_entry: Shared OrderEntry instance (a new one is created if omitted).
+        :param order_gateway: Optional AsyncOrderGateway or OrderDispatcher; when set, orders placed from
+                              the event loop are sent without blocking it.
+        :param order_book: Optional OrderBook fed by the broker's order events; when set,
+                           positions are the filled ones it holds and sent orders are added to it.
+        :param stop_loss: Bracket stop distance in points.
+        :param take_profit: Bracket target distance in points.
         """
-        self.indicators = Indicators()
-        self.order_entry = OrderEntry()
-        self.last_signal = None  # To avoid duplicate orders
-        self.position = None  # Track the current position ('LONG', 'SHORT', or None)
+        self.indicators = indicators if indicators is not None else Indicators()
+        self.order_entry = order_entry if order_entry is not None else OrderEntry()
+        self.order_gateway = order_gateway
+        self.pending_orders = set()  # Gateway requests still in flight
+        self.last_signals = {}  # {symbol: last signal traded}, to avoid duplicate orders
+        self.crossovers = CrossoverSignals()
+        self.last_rows = {}  # {symbol: last moving average row fed to the crossovers}
+        self.evaluated = {}  # {symbol: timestamp of that row}, when restored from a checkpoint
+        self.order_book = order_book
+        self.signal_positions = {}  # {symbol: 'LONG' or 'SHORT'} of the last order sent for each symbol
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        # Crossover of the shortest moving average over the longest
+        self.fast_column = f"{min(self.indicators.windows)}_minute"
+        self.slow_column = f"{max(self.indicators.windows)}_minute"
+
+    @property
+    def positions(self):
+        """
+        {symbol: 'LONG' or 'SHORT'}; symbols without a position are absent.
+        Filled positions from the order book when there is one, otherwise the
+        side of the last order sent.
+        """
+        if self.order_book is not None:
+            return self.order_book.sides
+        return self.signal_positions
 
     def process_data_and_trade(self, one_minute_bars):
         """
@@ -28,45 +68,103 @@ class TradingLogic:
         # Step 3: Make trading decisions based on moving average crossovers
         self.execute_strategy()
 
-    def execute_strategy(self):
+    def execute_strategy(self, symbol=None):
         """
         Execute the trading strategy based on moving average crossovers.
-        """
-        # Fetch the latest moving averages
-        moving_averages = self.indicators.moving_averages
 
-        if moving_averages.empty:
-            return  # No data to trade on
+        :param symbol: Symbol whose latest 1-minute bar just closed; every symbol
+                       with moving averages is checked when omitted.
+        """
+        symbols = self.indicators.symbols() if symbol is None else [symbol]
+        for symbol in symbols:
+            self._execute_symbol(symbol)
+        stamp("execute_strategy")
 
-        # Get the most recent data points
-        latest_data = moving_averages.iloc[-1]
-        prev_data = moving_averages.iloc[-2] if len(moving_averages) > 1 else None
+    def catch_up(self):
+        """
+        Feed every symbol's new moving average rows to the crossover state
+        machines without trading, e.g. rows replayed after a restart: a
+        crossover among them may already have been traded before the restart.
+        Only bars closing after this call can send an order.
+        """
+        for symbol in self.indicators.symbols():
+            signal = self._update_crossovers(symbol)
+            if signal is not None:
+                log.info("Crossover %s for %s in replayed bars; not traded.", signal, symbol)
+                self.last_signals[symbol] = signal
 
-        # Current moving averages
-        ma_200 = latest_data["200_minute"]
-        ma_1000 = latest_data["1000_minute"]
+    def _execute_symbol(self, symbol):
+        """
+        Feed a symbol's new moving average rows to its crossover state machine
+        and trade the latest signal.
+        """
+        signal = self._update_crossovers(symbol)
+        if signal is None or signal == self.last_signals.get(symbol):
+            return
+        if signal == BUY:
+            log.info("Bullish crossover detected for %s. Placing buy order.", symbol)
+            self.place_order(symbol, side="BUY")
+            self.signal_positions[symbol] = "LONG"
+        else:
+            log.info("Bearish crossover detected for %s. Placing sell order.", symbol)
+            self.place_order(symbol, side="SELL")
+            self.signal_positions[symbol] = "SHORT"
+        self.last_signals[symbol] = signal
 
-        # Previous moving averages
-        prev_ma_200 = prev_data["200_minute"] if prev_data is not None else None
-        prev_ma_1000 = prev_data["1000_minute"] if prev_data is not None else None
+    def _update_crossovers(self, symbol):
+        """
+        Feed a symbol's moving average rows added since the last call to its
+        crossover state machine. A bar close adds one row, so this is constant
+        work per bar; rows added since the last call (e.g. several bars
+        calculated at once) are all fed, so no crossover between calls is missed.
+        :return: The latest signal among the new rows, or None.
+        """
+        rows = self.indicators.ma_records_by_symbol.get(symbol)
+        if not rows:
+            return None  # No data to trade on
 
-        symbol = latest_data["symbol"]
+        last_row = self.last_rows.get(symbol)
+        if last_row is not None and rows[-1] is last_row:
+            start = len(rows)
+        elif len(rows) > 1 and rows[-2] is last_row:
+            start = len(rows) - 1  # One bar closed since the last call
+        else:
+            last = last_row["timestamp"] if last_row is not None else self.evaluated.get(symbol)
+            if last is None:
+                # First look at the symbol: the previous row sets its regime
+                start = max(0, len(rows) - 2)
+            else:
+                start = len(rows)
+                while start > 0 and rows[start - 1]["timestamp"] > last:
+                    start -= 1
+        signal = None
+        for index in range(start, len(rows)):
+            row = rows[index]
+            signal = self.crossovers.update(symbol, row[self.fast_column], row[self.slow_column]) or signal
+        self.last_rows[symbol] = rows[-1]
+        return signal
 
-        # Check for crossover signals
-        if prev_ma_200 is not None and prev_ma_1000 is not None:
-            # Bullish crossover
-            if prev_ma_200 < prev_ma_1000 and ma_200 > ma_1000 and self.last_signal != "BUY":
-                print("Bullish crossover detected. Placing buy order.")
-                self.place_order(symbol, side="BUY")
-                self.last_signal = "BUY"
-                self.position = "LONG"
+    def snapshot(self):
+        """
+        Signals and signalled positions per symbol, for a checkpoint. Filled
+        positions come from the broker again after a restart.
+        """
+        return {
+            "last_signals": dict(self.last_signals),
+            "positions": dict(self.signal_positions),
+            "regimes": self.crossovers.snapshot(),
+            "evaluated": {**self.evaluated, **{symbol: row["timestamp"] for symbol, row in self.last_rows.items()}},
+        }
 
-            # Bearish crossover
-            elif prev_ma_200 > prev_ma_1000 and ma_200 < ma_1000 and self.last_signal != "SELL":
-                print("Bearish crossover detected. Placing sell order.")
-                self.place_order(symbol, side="SELL")
-                self.last_signal = "SELL"
-                self.position = "SHORT"
+    def restore(self, state):
+        """
+        Continue from a snapshot(), so a crossover already traded is not traded again.
+        """
+        self.last_signals = dict(state["last_signals"])
+        self.signal_positions = dict(state["positions"])
+        self.crossovers.restore(state.get("regimes", {}))
+        self.evaluated = dict(state.get("evaluated", {}))
+        self.last_rows = {}
 
     def place_order(self, symbol, side):
         """
@@ -79,30 +177,80 @@ class TradingLogic:
             # Define order quantity and placeholder prices for bracket orders
             quantity = 1  # Example: trade 1 contract
             entry_price = None  # For market orders, entry price is not needed
-            stop_loss = 10  # Stop-loss value (adjust based on strategy)
-            take_profit = 20  # Take-profit value (adjust based on strategy)
+            stop_loss = self.stop_loss
+            take_profit = self.take_profit
+
+            # Bracket levels are set from the latest 1-minute close
+            reference_price = self.indicators.last_close.get(symbol)
+            if reference_price is None:
+                log.warning("No reference price for %s. Order not placed.", symbol)
+                return
 
             if side == "BUY":
                 # Place a market order with a bracket
-                self.order_entry.place_bracket_order(
+                self._submit_bracket_order(
                     symbol=symbol,
                     quantity=quantity,
                     entry_price=entry_price,  # Market price
-                    stop_loss=entry_price - stop_loss,
-                    take_profit=entry_price + take_profit,
+                    stop_loss=reference_price - stop_loss,
+                    take_profit=reference_price + take_profit,
                     side="BUY",
                     order_type="MARKET"
                 )
             elif side == "SELL":
                 # Place a market order with a bracket
-                self.order_entry.place_bracket_order(
+                self._submit_bracket_order(
                     symbol=symbol,
                     quantity=quantity,
                     entry_price=entry_price,  # Market price
-                    stop_loss=entry_price + stop_loss,
-                    take_profit=entry_price - take_profit,
+                    stop_loss=reference_price + stop_loss,
+                    take_profit=reference_price - take_profit,
                     side="SELL",
                     order_type="MARKET"
                 )
         except Exception as e:
-            print(f"Error placing order: {e}")
+            log.error("Error placing order: %s", e)
+
+    def _submit_bracket_order(self, **order):
+        """
+        Send a bracket order through the async gateway when called on a running
+        event loop, otherwise through the blocking OrderEntry.
+        """
+        stamp("place_bracket_order")
+        if self.order_gateway is not None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                task = asyncio.ensure_future(self.order_gateway.place_bracket_order(**order))
+                self.pending_orders.add(task)
+                task.add_done_callback(functools.partial(self._order_done, order))
+                return task
+        result = self.order_entry.place_bracket_order(**order)
+        stamp("order_ack")
+        self._record_order(order, result)
+        return result
+
+    def _order_done(self, order, task):
+        """
+        Report the outcome of an order sent through the gateway.
+        """
+        self.pending_orders.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            log.error("Error placing order: %s", task.exception())
+        else:
+            stamp("order_ack")
+            self._record_order(order, task.result())
+
+    def _record_order(self, order, ack):
+        """
+        Add an acknowledged order to the order book, if there is one.
+        """
+        if self.order_book is not None:
+            self.order_book.add_submitted(ack, {
+                "symbol": order["symbol"], "side": order["side"], "quantity": order["quantity"],
+                "orderType": order["order_type"],
+            })
@@ -0,0 +1,248 @@
+"""
+Asynchronous, structured logging for the trading application.
+
+Records are handed to a background thread through a bounded queue, so code on
+the event loop never waits for terminal or file I/O; when the queue is full the
+record is dropped and counted instead. Each category ("trades", "bars",
+"stream", ...) is a child of the "trading_app" logger with its own level, and
+high-volume categories can be sampled (keep one record in N) and rate limited
+(at most N records per second, with the number suppressed reported on the next
+record that gets through).
+
+    from trading_app.utils.logger import get_logger
+    log = get_logger("trades")
+    log.debug("Live trade", extra={"data": trade})
+
+Structured fields go in extra={"data": {...}}; the JSON formatter writes them
+as top-level keys, the text formatter appends them after the message.
+"""
+
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from trading_app.constants import (
+    LOG_LEVEL, LOG_LEVELS, LOG_SAMPLING, LOG_RATE_LIMITS, LOG_FORMAT, LOG_PATH, LOG_QUEUE_SIZE,
+)
+
+ROOT = "trading_app"
+
+_listener = None
+_handler = None
+_configured = set()  # Categories given their own level or filters
+
+
+def parse_settings(text, kind=str):
+    """
+    Parse "category=value,category=value" settings.
+    :return: {category: value}
+    """
+    settings = {}
+    for item in (text or "").split(","):
+        if "=" in item:
+            category, value = item.split("=", 1)
+            settings[category.strip()] = kind(value.strip())
+    return settings
+
+
+def get_logger(category):
+    """
+    Logger for one category, e.g. get_logger("trades") -> "trading_app.trades".
+    """
+    return logging.getLogger(f"{ROOT}.{category}")
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, every):
+        """
+        Keep one record in every `every`, counted per logger.
+        Records at WARNING and above are always kept.
+        """
+        super().__init__()
+        self.every = max(1, int(every))
+        self.seen = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        self.seen += 1
+        return self.seen % self.every == 1 or self.every == 1
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, per_second, burst=None, clock=time.monotonic):
+        """
+        Token bucket: at most `per_second` records per second, bursts up to `burst`.
+        The next record let through carries the number suppressed before it.
+        Records at WARNING and above are always kept.
+        """
+        super().__init__()
+        self.rate = float(per_second)
+        self.capacity = float(burst or max(1.0, per_second))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self.suppressed = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                self.suppressed += 1
+                return False
+            self.tokens -= 1
+            suppressed, self.suppressed = self.suppressed, 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        """
+        Queue handler that never blocks and leaves formatting to the listener thread.
+        """
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens in the listener thread; exception text is rendered
+        # now because the traceback cannot be kept alive across threads
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # The stop sentinel waits for room in a full queue instead of raising
+        # queue.Full; the writer thread is still emptying it
+        self.queue.put(self._sentinel)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, category, message and the record's data.
+    """
+    def format(self, record):
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "category": record.name[len(ROOT) + 1:] if record.name.startswith(ROOT + ".") else record.name,
+            "message": record.getMessage(),
+        }
+        data = getattr(record, "data", None)
+        if data:
+            entry.update(data)
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    "time level [category] message key=value ..." lines.
+    """
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(category)s] %(message)s")
+
+    def format(self, record):
+        record.category = record.name[len(ROOT) + 1:] if record.name.startswith(ROOT + ".") else record.name
+        line = super().format(record)
+        data = getattr(record, "data", None)
+        if data:
+            line += " " + " ".join(f"{key}={value}" for key, value in data.items())
+        if getattr(record, "suppressed", 0):
+            line += f" (+{record.suppressed} suppressed)"
+        return line
+
+
+def configure_logging(level=LOG_LEVEL, levels=LOG_LEVELS, sampling=LOG_SAMPLING, rate_limits=LOG_RATE_LIMITS,
+                      log_format=LOG_FORMAT, path=LOG_PATH, queue_size=LOG_QUEUE_SIZE, stream=None):
+    """
+    Route every "trading_app" logger through a background writer.
+    Calling it again replaces the previous configuration.
+    :param level: Default level name for all categories.
+    :param levels: {category: level} or "category=LEVEL,..." overrides.
+    :param sampling: {category: N} or "category=N,..." to keep one record in N.
+    :param rate_limits: {category: per_second} or "category=N,..." record rate caps.
+    :param log_format: "text" or "json".
+    :param path: File to append to (standard error when omitted).
+    :param queue_size: Records held for the writer before new ones are dropped.
+    :param stream: Stream to write to instead of standard error.
+    :return: The NonBlockingQueueHandler, whose `dropped` counts lost records.
+    """
+    global _listener, _handler
+    shutdown_logging()
+
+    levels = parse_settings(levels) if isinstance(levels, str) else dict(levels or {})
+    sampling = parse_settings(sampling, int) if isinstance(sampling, str) else dict(sampling or {})
+    rate_limits = parse_settings(rate_limits, float) if isinstance(rate_limits, str) else dict(rate_limits or {})
+
+    if path:
+        output = logging.FileHandler(path)
+    else:
+        output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+    _handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    root = logging.getLogger(ROOT)
+    root.handlers = [_handler]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+
+    for category in set(levels) | set(sampling) | set(rate_limits):
+        logger = get_logger(category)
+        _configured.add(category)
+        logger.setLevel(levels[category].upper() if category in levels else logging.NOTSET)
+        if category in sampling:
+            logger.addFilter(SamplingFilter(sampling[category]))
+        if category in rate_limits:
+            logger.addFilter(RateLimitFilter(rate_limits[category]))
+
+    _listener = DrainingQueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return _handler
+
+
+def shutdown_logging():
+    """
+    Write out every queued record and stop the background writer.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    if _handler is not None:
+        root = logging.getLogger(ROOT)
+        root.removeHandler(_handler)
+        root.setLevel(logging.NOTSET)
+        root.propagate = True
+        _handler = None
+    for category in _configured:
+        get_logger(category).filters = []
+        get_logger(category).setLevel(logging.NOTSET)
+    _configured.clear()
+
+
+atexit.register(shutdown_logging)
@@ -6,79 +6,153 @@ Created on Tue Dec  3 16:12:50 2024
 @author: duncan
 """
 import asyncio
+import time
+import logging
 import websockets
 import json
-import pandas as pd
 from trading_app.streamID_handler import StreamIDHandler
-from trading_app.constants import API_URL, SYMBOLS
+from trading_app.constants import STREAM_URL, SYMBOLS, SUBSCRIPTION_BATCH_SIZE, ACCOUNT_ID
+from trading_app.tick_store import TickStore
+from trading_app.decoders import TradeFrameDecoder, TradeBatch
+from trading_app.latency import set_origin, reset_origin, current_origin, stamp
+from trading_app.utils.logger import get_logger
+
+log = get_logger("stream")
+trade_log = get_logger("trades")
 
 
 class WebSocketHandler:
-    def __init__(self):
+    def __init__(self, stream_id_handler=None, decoder=None, stream_url=STREAM_URL, archive=None,
+                 symbols=None, subscription_batch=SUBSCRIPTION_BATCH_SIZE):
         """
         Initialize the WebSocket handler.
+        Credentials come from the shared credential service when connecting.
+        :param stream_id_handler: StreamIDHandler to use (one is created if omitted).
+        :param decoder: Frame decoder; defaults to TradeFrameDecoder, which turns
+                        trade frames into columnar TradeBatch objects.
+        :param stream_url: WebSocket base URL (ws:// or wss://).
+        :param archive: Optional TickArchive, or ArchiveWriter wrapping one, every received
+                        trade is appended to.
+        :param symbols: {name: contract} to subscribe to (defaults to SYMBOLS).
+        :param subscription_batch: Symbols per subscribe message; 1 sends one
+                                   message per symbol, larger values send a
+                                   "symbols" list.
         """
-        self.stream_id_handler = StreamIDHandler()
-        self.token = self.stream_id_handler.authenticator.get_token()
+        self.stream_id_handler = stream_id_handler or StreamIDHandler()
+        self.decoder = decoder or TradeFrameDecoder()
+        self.stream_url = stream_url
+        self.archive = archive
+        self.symbols = SYMBOLS if symbols is None else symbols
+        self.subscription_batch = max(1, subscription_batch)
+        self.token = None
         self.stream_id = None
         self.connection = None
-        self.historical_data = pd.DataFrame(columns=["timestamp", "symbol", "price", "volume"])
-        self.live_data = pd.DataFrame(columns=["timestamp", "symbol", "price", "volume"])
+        self.closing = False  # Set by close_connection so a deliberate close is not retried
+        self.historical_ticks = TickStore()  # Columnar per-symbol tick buffers
+        self.live_ticks = TickStore()
+        self.tick_queues = []  # Bounded queues receiving (enqueued_at, ticks) for each live batch
+        self.history_queues = []  # Queues receiving (enqueued_at, TradeBatch) for each historical batch
+        self.order_listeners = []  # Callables receiving each order, fill or position message
         self.reconnect_attempts = 0
 
+    @property
+    def historical_data(self):
+        """
+        Historical trades exported as a DataFrame (built on demand).
+        """
+        return self.historical_ticks.to_dataframe()
+
+    @property
+    def live_data(self):
+        """
+        Live trades exported as a DataFrame (built on demand).
+        """
+        return self.live_ticks.to_dataframe()
+
     async def connect(self):
         """
         Connect to the WebSocket using the current streamId.
         """
+        self.token = self.stream_id_handler.token
         self.stream_id = self.stream_id_handler.get_stream_id()
-        websocket_url = f"wss://{API_URL.split('://')[1]}/stream/{self.stream_id}?token={self.token}"
-        print(f"Connecting to WebSocket: {websocket_url}")
+        websocket_url = f"{self.stream_url}/stream/{self.stream_id}?token={self.token}"
+        log.info("Connecting to WebSocket: %s/stream/%s", self.stream_url, self.stream_id)
 
         try:
             self.connection = await websockets.connect(websocket_url)
             self.reconnect_attempts = 0
-            print("WebSocket connection established.")
+            log.info("WebSocket connection established.")
 
             # Subscribe to both live and historical trades
             await self.subscribe_trades()
+            if self.order_listeners:
+                await self.subscribe_orders()
 
             await self.handle_messages()
 
         except websockets.ConnectionClosed as e:
-            print(f"WebSocket connection closed: {e}")
+            log.warning("WebSocket connection closed: %s", e)
             await self.reconnect()
 
         except Exception as e:
-            print(f"WebSocket connection failed: {e}")
+            log.error("WebSocket connection failed: %s", e)
             await self.reconnect()
 
     async def reconnect(self):
         """
         Handle WebSocket reconnection.
         """
+        if self.closing:
+            return
+
         self.reconnect_attempts += 1
         if self.reconnect_attempts > 5:
-            print("Max reconnection attempts reached. Exiting.")
+            log.error("Max reconnection attempts reached. Exiting.")
             return
 
-        print(f"Reconnecting... Attempt {self.reconnect_attempts}")
+        log.warning("Reconnecting... Attempt %d", self.reconnect_attempts)
         self.stream_id_handler.refresh_stream_id()
         await asyncio.sleep(5)  # Wait before retrying
-        await self.connect()
+        if not self.closing:
+            await self.connect()
 
     async def subscribe_trades(self):
         """
         Subscribe to live trades and historical tick data for each symbol.
+        With a subscription batch above 1, symbols are sent as lists so a shard
+        with many symbols subscribes in a few messages.
         """
-        for symbol, current_symbol in SYMBOLS.items():
+        items = list(self.symbols.items())
+        if self.subscription_batch == 1:
+            for symbol, current_symbol in items:
+                subscription_message = {
+                    "action": "subscribe",
+                    "type": "trades",
+                    "symbol": current_symbol,
+                    "flags": ["live", "historical"]  # Flags to indicate both live and historical data
+                }
+                await self.connection.send(json.dumps(subscription_message))
+                log.info("Subscribed to live and historical trades for %s (%s).", symbol, current_symbol)
+            return
+
+        for start in range(0, len(items), self.subscription_batch):
+            batch = items[start:start + self.subscription_batch]
             subscription_message = {
                 "action": "subscribe",
                 "type": "trades",
-                "symbol": current_symbol,
-                "flags": ["live", "historical"]  # Flags to indicate both live and historical data
+                "symbols": [current_symbol for _, current_symbol in batch],
+                "flags": ["live", "historical"]
             }
             await self.connection.send(json.dumps(subscription_message))
-            print(f"Subscribed to live and historical trades for {symbol} ({current_symbol}).")
+            log.info("Subscribed to live and historical trades for %s.", ", ".join(symbol for symbol, _ in batch))
+
+    async def subscribe_orders(self):
+        """
+        Subscribe to the account's order, fill and position events.
+        """
+        subscription_message = {"action": "subscribe", "type": "orders", "accountId": ACCOUNT_ID}
+        await self.connection.send(json.dumps(subscription_message))
+        log.info("Subscribed to order and position events.")
 
     async def handle_messages(self):
         """
@@ -86,25 +160,102 @@ class WebSocketHandler:
         """
         try:
             async for message in self.connection:
-                data = json.loads(message)
-                await self.route_message(data)
+                # Every later latency stamp is measured from the frame's arrival
+                token = set_origin(time.monotonic_ns())
+                try:
+                    data = self.decoder.decode(message)
+                    stamp("decode")
+                    await self.route_message(data)
+                    stamp("route_message")
+                finally:
+                    reset_origin(token)
         except websockets.ConnectionClosed:
-            print("WebSocket connection closed.")
+            log.warning("WebSocket connection closed.")
             await self.reconnect()
         except Exception as e:
-            print(f"Error handling WebSocket messages: {e}")
+            log.exception("Error handling WebSocket messages: %s", e)
+
+    def add_tick_queue(self, queue):
+        """
+        Register a queue that receives every batch of new live ticks.
+        :param queue: asyncio.Queue; items are (enqueued_at, [tick, ...]) tuples.
+        """
+        self.tick_queues.append(queue)
+
+    def add_history_queue(self, queue):
+        """
+        Register a queue that receives the historical trades sent on subscription,
+        e.g. to warm up indicators before live ticks are processed.
+        :param queue: asyncio.Queue; items are (enqueued_at, TradeBatch) tuples
+                      whose trades are all flagged is_historical.
+        """
+        self.history_queues.append(queue)
+
+    def add_order_listener(self, listener):
+        """
+        Register a callable receiving every order, fill and position message
+        (e.g. OrderBook.apply). Order events are subscribed to when connecting
+        if a listener is registered.
+        :param listener: Called with the decoded message, a dict holding
+                         "orders", "fills" and/or "positions" lists.
+        """
+        self.order_listeners.append(listener)
 
     async def route_message(self, data):
         """
         Route incoming data based on its type.
         """
-        if "trades" in data:
-            self.handle_trade_data(data["trades"])
+        if isinstance(data, TradeBatch):
+            live_ticks = self.handle_trade_batch(data)
+            if self.history_queues and len(live_ticks) < len(data):
+                await self.publish_ticks(data.select(data.is_historical), self.history_queues)
+            if len(live_ticks):
+                await self.publish_ticks(live_ticks)
+        elif "trades" in data:
+            live_ticks = self.handle_trade_data(data["trades"])
+            if self.history_queues and len(live_ticks) < len(data["trades"]):
+                historical = [trade for trade in data["trades"] if trade.get("is_historical", False)]
+                await self.publish_ticks(TradeBatch.from_trades(historical), self.history_queues)
+            if live_ticks:
+                await self.publish_ticks(live_ticks)
+        elif "orders" in data or "fills" in data or "positions" in data:
+            for listener in self.order_listeners:
+                listener(data)
+
+    async def publish_ticks(self, ticks, queues=None):
+        """
+        Push new live ticks to every registered queue, waiting when a queue is full.
+        Items are stamped with the arrival time of the frame when it is known.
+        :param ticks: List of tick dictionaries or a TradeBatch.
+        :param queues: Queues to push to (the live tick queues by default).
+        """
+        origin = current_origin()
+        enqueued_at = time.monotonic() if origin is None else origin / 1e9
+        for queue in self.tick_queues if queues is None else queues:
+            await queue.put((enqueued_at, ticks))
+
+    def handle_trade_batch(self, batch):
+        """
+        Store a decoded TradeBatch column-wise, without per-trade dictionaries.
+        :return: TradeBatch of the live trades.
+        """
+        if self.archive is not None:
+            self.archive.append_batch(batch)
+        historical, live = batch.split_historical()
+        for store, trades in ((self.historical_ticks, historical), (self.live_ticks, live)):
+            for symbol, timestamps, prices, volumes in trades.by_symbol():
+                store.extend(symbol, timestamps, prices, volumes)
+        trade_log.info("[Trades] %d live, %d historical", len(live), len(historical))
+        return live
 
     def handle_trade_data(self, trade_data):
         """
         Handle incoming trade data for live and historical trades.
+        :return: List of the live trades in this batch.
         """
+        live_ticks = []
+        historical_ticks = []
+        debug = trade_log.isEnabledFor(logging.DEBUG)
         for trade in trade_data:
             trade_entry = {
                 "timestamp": trade.get("timestamp"),
@@ -115,22 +266,37 @@ class WebSocketHandler:
 
             # Determine if the trade is historical or live based on timestamp logic or API fields
             if trade.get("is_historical", False):
-                self.historical_data = pd.concat([
-                    self.historical_data,
-                    pd.DataFrame([trade_entry])
-                ])
-                print(f"[Historical Trade] {trade_entry}")
+                self.historical_ticks.append(**trade_entry)
+                historical_ticks.append(trade_entry)
+                if debug:
+                    trade_log.debug("[Historical Trade]", extra={"data": trade_entry})
             else:
-                self.live_data = pd.concat([
-                    self.live_data,
-                    pd.DataFrame([trade_entry])
-                ])
-                print(f"[Live Trade] {trade_entry}")
+                self.live_ticks.append(**trade_entry)
+                live_ticks.append(trade_entry)
+                if debug:
+                    trade_log.debug("[Live Trade]", extra={"data": trade_entry})
+        if self.archive is not None:
+            if live_ticks:
+                self.archive.append_records(live_ticks)
+            if historical_ticks:
+                # History is sent again on every subscription: store it once
+                self.archive.append_records(historical_ticks, history=True)
+        return live_ticks
+
+    def memory_usage(self):
+        """
+        Gauges of the tick buffers (each bounded by its ring capacity).
+        """
+        return {
+            "live_ticks": {"items": len(self.live_ticks), "bytes": self.live_ticks.nbytes},
+            "historical_ticks": {"items": len(self.historical_ticks), "bytes": self.historical_ticks.nbytes},
+        }
 
     async def close_connection(self):
         """
         Close the WebSocket connection.
         """
+        self.closing = True
         if self.connection:
             await self.connection.close()
-            print("WebSocket connection closed.")
+            log.info("WebSocket connection closed.")